@@ -12,116 +12,52 @@ from reranker import Reranker, HybridRetriever
 from prompt_builder import PromptBuilder, OutputFormatter
 import config
 import time
+import asyncio
+import atexit
+import collections
+import concurrent.futures
+import functools
+import importlib
+import json
+import logging
+import os
+import re
+import threading
+import numpy as np
 
-# 可选增强模块
-try:
-    from ner_extractor import EntityExtractor
-    NER_AVAILABLE = True
-except ImportError:
-    NER_AVAILABLE = False
-    print("提示: ner_extractor 未找到，实体抽取不可用")
+# 逐步骤的过程日志为INFO级别，是否输出由入口程序按 config.VERBOSE_LOGGING 配置（见 app.configure_logging）
+logger = logging.getLogger(__name__)
 
-try:
-    from reflection import ReflectionAgent
-    REFLECTION_AVAILABLE = True
-except ImportError:
-    REFLECTION_AVAILABLE = False
-    print("提示: reflection 未找到，反思链不可用")
+def _optional_import(module_name: str, attr: str, hint: str):
+    """
+    按需导入可选增强模块中的对象，模块缺失时返回None
 
-try:
-    from multi_agent import MultiAgentOrchestrator
-    MULTI_AGENT_AVAILABLE = True
-except ImportError:
-    MULTI_AGENT_AVAILABLE = False
-    print("提示: multi_agent 未找到，多智能体协作不可用")
+    Args:
+        module_name: 模块名
+        attr: 模块内的类或全局实例名
+        hint: 模块缺失时的提示
+    """
+    try:
+        module = importlib.import_module(module_name)
+    except ImportError:
+        print(f"提示: {module_name} 未找到，{hint}")
+        return None
+    return getattr(module, attr, None)
 
-try:
-    from plugin_manager import PluginManager
-    PLUGIN_AVAILABLE = True
-except ImportError:
-    PLUGIN_AVAILABLE = False
-    print("提示: plugin_manager 未找到，插件系统不可用")
 
-try:
-    from cache_manager import CacheManager, cache_manager
-    CACHE_AVAILABLE = True
-except ImportError:
-    CACHE_AVAILABLE = False
-    cache_manager = None
-    print("提示: cache_manager 未找到，缓存功能不可用")
+# 推荐场景可识别的产品名，以及金额提取模式（模块加载时编译一次）
+PRODUCT_KEYWORDS = ["冰箱", "洗衣机", "电视", "手机", "平板", "空调"]
+_PRODUCT_RE = re.compile("|".join(map(re.escape, PRODUCT_KEYWORDS)))
+_AMOUNT_RE = re.compile(r'\d+')
 
-# 新增增强模块
-try:
-    from monitor import monitoring_system
-    MONITOR_AVAILABLE = True
-except ImportError:
-    MONITOR_AVAILABLE = False
-    monitoring_system = None
-    print("提示: monitor 未找到，监控功能不可用")
-
-try:
-    from feedback_system import feedback_system
-    FEEDBACK_AVAILABLE = True
-except ImportError:
-    FEEDBACK_AVAILABLE = False
-    feedback_system = None
-    print("提示: feedback_system 未找到，反馈功能不可用")
-
-try:
-    from urgency_detector import urgency_detector
-    URGENCY_AVAILABLE = True
-except ImportError:
-    URGENCY_AVAILABLE = False
-    urgency_detector = None
-    print("提示: urgency_detector 未找到，紧急度识别不可用")
-
-try:
-    from quality_validator import quality_validator
-    QUALITY_AVAILABLE = True
-except ImportError:
-    QUALITY_AVAILABLE = False
-    quality_validator = None
-    print("提示: quality_validator 未找到，质量验证不可用")
-
-try:
-    from location_service import location_service
-    LOCATION_AVAILABLE = True
-except ImportError:
-    LOCATION_AVAILABLE = False
-    location_service = None
-    print("提示: location_service 未找到，地理位置功能不可用")
-
-try:
-    from emotion_intelligence import emotion_intelligence
-    EMOTION_AVAILABLE = True
-except ImportError:
-    EMOTION_AVAILABLE = False
-    emotion_intelligence = None
-    print("提示: emotion_intelligence 未找到，情感智能不可用")
-
-try:
-    from contradiction_detector import contradiction_detector
-    CONTRADICTION_AVAILABLE = True
-except ImportError:
-    CONTRADICTION_AVAILABLE = False
-    contradiction_detector = None
-    print("提示: contradiction_detector 未找到，矛盾检测不可用")
-
-try:
-    from policy_validator import policy_validator
-    POLICY_VALIDATOR_AVAILABLE = True
-except ImportError:
-    POLICY_VALIDATOR_AVAILABLE = False
-    policy_validator = None
-    print("提示: policy_validator 未找到，政策验证不可用")
-
-try:
-    from external_api_manager import external_api_manager
-    EXTERNAL_API_AVAILABLE = True
-except ImportError:
-    EXTERNAL_API_AVAILABLE = False
-    external_api_manager = None
-    print("提示: external_api_manager 未找到，外部API不可用")
+# 数据查询索引的主题关键词（索引键为 "产品:主题"，未提及产品时为 ":主题"）
+# 只用明确指向补贴标准/适用产品的词，泛化词（如"可以""多少"）会把申请流程等问题误判为查表
+DATA_QUERY_TOPICS = {
+    "标准": ["补贴标准", "补贴比例", "最高补贴", "补贴上限"],
+    "范围": ["哪些产品", "哪些商品", "适用产品", "适用范围", "补贴范围"],
+}
+# 索引不含型号级数据，涉及这些词的问题交给检索
+DATA_QUERY_DETAIL_KEYWORDS = ["型号", "品牌", "参数"]
 
 
 class PolicyAgent:
@@ -135,7 +71,7 @@ class PolicyAgent:
         self.llm = LLMClient()
         
         # 双层意图识别
-        self.intent_recognizer = IntentRecognizer()
+        self.intent_recognizer = IntentRecognizer(embed_fn=self._embed_question)
         
         # 工具链
         self.calculator = SubsidyCalculator()
@@ -149,31 +85,24 @@ class PolicyAgent:
         self.prompt_builder = PromptBuilder()
         self.output_formatter = OutputFormatter()
         
-        # 增强模块（可选）
+        # 数据查询索引（常见产品/范围类问题直接查表，无需检索和LLM），由补贴规则表生成
+        self._data_query_index = self._build_data_query_index()
+        
+        # 增强模块（可选）：均在首次访问时才导入，见下方的 cached_property
         self.enable_advanced = enable_advanced_features
-        self.ner_extractor = EntityExtractor(self.llm) if NER_AVAILABLE and enable_advanced_features else None
-        self.reflection_agent = ReflectionAgent(self.llm) if REFLECTION_AVAILABLE and enable_advanced_features else None
-        self.multi_agent = None  # 在 initialize 中设置
-        
-        # 插件系统
-        self.plugin_manager = None
-        if PLUGIN_AVAILABLE and enable_advanced_features:
-            self.plugin_manager = PluginManager()
-            self.plugin_manager.load_all_plugins()
-        
-        # 缓存管理器
-        self.cache_manager = cache_manager if CACHE_AVAILABLE else None
-        
-        # 新增增强模块
-        self.monitoring_system = monitoring_system if MONITOR_AVAILABLE else None
-        self.feedback_system = feedback_system if FEEDBACK_AVAILABLE else None
-        self.urgency_detector = urgency_detector if URGENCY_AVAILABLE else None
-        self.quality_validator = quality_validator if QUALITY_AVAILABLE else None
-        self.location_service = location_service if LOCATION_AVAILABLE else None
-        self.emotion_intelligence = emotion_intelligence if EMOTION_AVAILABLE else None
-        self.contradiction_detector = contradiction_detector if CONTRADICTION_AVAILABLE else None
-        self.policy_validator = policy_validator if POLICY_VALIDATOR_AVAILABLE else None
-        self.external_api = external_api_manager if EXTERNAL_API_AVAILABLE else None
+        
+        # 共享IO线程池（批量查询等场景复用，避免每次调用创建线程）
+        self._io_pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=8,
+            thread_name_prefix="agent-io"
+        )
+        atexit.register(self._io_pool.shutdown, wait=False)
+        # 政策检查单独使用小线程池：批量查询占满 _io_pool 时，嵌套提交的检查任务不会排在查询之后而超时
+        self._check_pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=4,
+            thread_name_prefix="agent-check"
+        )
+        atexit.register(self._check_pool.shutdown, wait=False)
         
         # 对话历史
         self.conversation_history = []
@@ -183,15 +112,22 @@ class PolicyAgent:
             "total_queries": 0,
             "successful_queries": 0,
             "rejected_queries": 0,
-            "failed_queries": 0,
-            "avg_latency": 0,
-            "latency_history_ms": []
+            "failed_queries": 0
         }
+        # 最近N次延迟（毫秒）的环形缓冲区，配合累计和在读取指标时O(1)求均值
+        self._latency_ring = collections.deque(maxlen=4096)
+        self._latency_sum_ms = 0.0
+        # batch_query 会并发调用 query()，指标的读-改-写统一在此锁内完成
+        self._metrics_lock = threading.Lock()
     
     def initialize(self, force_rebuild: bool = False):
         """初始化知识库和混合检索器"""
         self.kb.build_knowledge_base(force_rebuild=force_rebuild)
         
+        # 重建后向量模型已重新训练，旧的问题向量不再可比
+        if force_rebuild and self.cache_manager:
+            self.cache_manager.semantic_clear()
+        
         # 初始化混合检索器
         if self.kb.vectorstore:
             self.hybrid_retriever = HybridRetriever(
@@ -200,13 +136,100 @@ class PolicyAgent:
             )
         
         print("智能体初始化完成!")
-        
-        # 初始化多智能体编排器
-        if MULTI_AGENT_AVAILABLE and self.enable_advanced:
-            self.multi_agent = MultiAgentOrchestrator(self.kb, self.llm, self.calculator)
-            print("✓ 多智能体协作已启用")
     
-    def query(self, question: str, return_sources: bool = True, user_location: Optional[Dict] = None) -> Dict:
+    # ========== 可选增强模块（按需加载） ==========
+    
+    @functools.cached_property
+    def ner_extractor(self):
+        """实体抽取器"""
+        if not self.enable_advanced:
+            return None
+        extractor_cls = _optional_import("ner_extractor", "EntityExtractor", "实体抽取不可用")
+        return extractor_cls(self.llm) if extractor_cls else None
+    
+    @functools.cached_property
+    def reflection_agent(self):
+        """反思链"""
+        if not self.enable_advanced:
+            return None
+        agent_cls = _optional_import("reflection", "ReflectionAgent", "反思链不可用")
+        return agent_cls(self.llm) if agent_cls else None
+    
+    @functools.cached_property
+    def multi_agent(self):
+        """多智能体编排器"""
+        if not self.enable_advanced:
+            return None
+        orchestrator_cls = _optional_import("multi_agent", "MultiAgentOrchestrator", "多智能体协作不可用")
+        if not orchestrator_cls:
+            return None
+        print("✓ 多智能体协作已启用")
+        return orchestrator_cls(self.kb, self.llm, self.calculator)
+    
+    @functools.cached_property
+    def plugin_manager(self):
+        """插件系统"""
+        if not self.enable_advanced:
+            return None
+        manager_cls = _optional_import("plugin_manager", "PluginManager", "插件系统不可用")
+        if not manager_cls:
+            return None
+        manager = manager_cls()
+        manager.load_all_plugins()
+        return manager
+    
+    @functools.cached_property
+    def cache_manager(self):
+        """缓存管理器"""
+        return _optional_import("cache_manager", "cache_manager", "缓存功能不可用")
+    
+    @functools.cached_property
+    def monitoring_system(self):
+        """监控系统"""
+        return _optional_import("monitor", "monitoring_system", "监控功能不可用")
+    
+    @functools.cached_property
+    def feedback_system(self):
+        """反馈系统"""
+        return _optional_import("feedback_system", "feedback_system", "反馈功能不可用")
+    
+    @functools.cached_property
+    def urgency_detector(self):
+        """紧急度识别"""
+        return _optional_import("urgency_detector", "urgency_detector", "紧急度识别不可用")
+    
+    @functools.cached_property
+    def quality_validator(self):
+        """回答质量验证"""
+        return _optional_import("quality_validator", "quality_validator", "质量验证不可用")
+    
+    @functools.cached_property
+    def location_service(self):
+        """地理位置服务"""
+        return _optional_import("location_service", "location_service", "地理位置功能不可用")
+    
+    @functools.cached_property
+    def emotion_intelligence(self):
+        """情感智能"""
+        return _optional_import("emotion_intelligence", "emotion_intelligence", "情感智能不可用")
+    
+    @functools.cached_property
+    def contradiction_detector(self):
+        """政策矛盾检测"""
+        return _optional_import("contradiction_detector", "contradiction_detector", "矛盾检测不可用")
+    
+    @functools.cached_property
+    def policy_validator(self):
+        """政策时效性验证"""
+        return _optional_import("policy_validator", "policy_validator", "政策验证不可用")
+    
+    @functools.cached_property
+    def external_api(self):
+        """外部API管理器"""
+        return _optional_import("external_api_manager", "external_api_manager", "外部API不可用")
+    
+    def query(self, question: str, return_sources: bool = True, user_location: Optional[Dict] = None,
+              stream: bool = False):
         """
         处理用户问题（企业级流程）
         
@@ -214,98 +237,148 @@ class PolicyAgent:
             question: 用户问题
             return_sources: 是否返回检索到的原文
             user_location: 用户位置信息，格式: {"province": "山东省", "city": "济南市", "district": "历下区"}
+            stream: 是否流式返回。为True时返回事件生成器，依次产出
+                    {"type": "chunk", "content": 答案片段} 和最终的 {"type": "complete", "result": 结果字典}
             
         Returns:
-            包含答案和相关信息的字典
+            包含答案和相关信息的字典（stream=True时为事件生成器）
         """
-        start_time = time.time()
-        self.metrics["total_queries"] += 1
+        events = self._query_events(question, return_sources, user_location, stream)
+        if stream:
+            return events
+        
+        result = None
+        for event in events:
+            if event["type"] == "complete":
+                result = event["result"]
+        return result
+    
+    def _query_events(self, question: str, return_sources: bool, user_location: Optional[Dict],
+                      stream: bool):
+        """查询主流程（生成器），非流式模式下只产出complete事件"""
+        start_time = time.monotonic()
+        self._incr_metric("total_queries")
         
         # ========== 新增: 地理位置处理 ==========
         if user_location and self.location_service:
             location_keywords = self.location_service.get_location_keywords(user_location)
-            print(f"\n📍 用户位置: {user_location.get('city', '')} {user_location.get('district', '')}")
-            print(f"   位置关键词: {', '.join(location_keywords[:3])}")
+            logger.info("📍 用户位置: %s %s, 位置关键词: %s",
+                        user_location.get('city', ''), user_location.get('district', ''),
+                        ', '.join(location_keywords[:3]))
         
         # ========== 新增: 紧急程度识别 ==========
         urgency_info = None
         if self.urgency_detector:
             urgency_info = self.urgency_detector.detect(question)
             if urgency_info["fast_track"]:
-                print(f"\n⚡ 检测到紧急查询 (P{urgency_info['priority']}): {urgency_info['level']}")
-                print(f"   原因: {', '.join(urgency_info['reasons'])}")
+                logger.info("⚡ 检测到紧急查询 (P%s): %s, 原因: %s",
+                            urgency_info['priority'], urgency_info['level'],
+                            ', '.join(urgency_info['reasons']))
         
         # ========== 新增: 情感智能分析 ==========
         emotion_analysis = None
         if self.emotion_intelligence:
             emotion_analysis = self.emotion_intelligence.analyze(question, urgency_info)
             if emotion_analysis["emotion"] != "neutral":
-                print(f"\n💝 情感状态: {emotion_analysis['user_state']}")
-                print(f"   建议语气: {emotion_analysis['recommended_tone']}")
+                logger.info("💝 情感状态: %s, 建议语气: %s",
+                            emotion_analysis['user_state'], emotion_analysis['recommended_tone'])
         
         # ========== 缓存检查 ==========
+        # 问题内容哈希只计算一次，答案缓存与语义缓存共用
+        question_embedding = None
+        qhash = self.cache_manager.hash_query(question) if self.cache_manager else None
         if self.cache_manager:
-            cached_result = self.cache_manager.get(question)
+            cached_result = self.cache_manager.get_by_hash(qhash)
             if cached_result:
                 # 更新指标
-                self.metrics["successful_queries"] += 1
-                latency = time.time() - start_time
-                self.metrics["latency_history_ms"].append(latency * 1000)
-                self._update_latency(latency)
-                print(f"\n✓ 缓存命中 (耗时: {latency:.2f}秒)")
-                print(f"{'='*60}\n")
-                return cached_result
+                latency = time.monotonic() - start_time
+                self._record_success(latency)
+                logger.info("✓ 缓存命中 (耗时: %.2f秒)", latency)
+                yield from self._complete_events(cached_result, stream)
+                return
         
         try:
-            print(f"\n{'='*60}")
-            print(f"用户问题: {question}")
-            print(f"{'='*60}")
+            logger.info("用户问题: %s", question)
             
             # ========== 步骤1: 双层意图识别 ==========
-            print("\n[1/5] 意图识别...")
+            logger.info("[1/5] 意图识别...")
             intent_result = self.intent_recognizer.recognize(question)
             
             # 如果应该拒绝
             if intent_result["should_reject"]:
-                self.metrics["rejected_queries"] += 1
+                self._incr_metric("rejected_queries")
                 rejection_response = RejectionHandler.get_rejection_response(
                     intent_result["rejection_reason"]
                 )
-                return {
+                yield from self._complete_events({
                     "answer": rejection_response,
                     "sources": [],
                     "confidence": 0.0,
                     "intent_type": None,
                     "rejected": True
-                }
+                }, stream)
+                return
             
             intent_type = intent_result["intent_type"]
-            print(f"✓ 意图类型: {intent_type} ({config.INTENT_TYPES[intent_type]})")
-            print(f"✓ 置信度: {intent_result['confidence']:.2%}")
+            logger.info("✓ 意图类型: %s (%s), 置信度: %.2f%%",
+                        intent_type, config.INTENT_TYPES[intent_type], intent_result['confidence'] * 100)
+            
+            # 精确匹配未命中时，尝试语义缓存（近似问题）：须在意图识别和拒绝判定之后，
+            # 且只对允许语义复用的意图类型查询，条目的意图类型也须一致
+            if (self.cache_manager and config.ENABLE_SEMANTIC_CACHE and not user_location
+                    and intent_type in config.SEMANTIC_CACHE_INTENTS):
+                question_embedding = self._embed_question(question)
+                cached_result = self.cache_manager.semantic_get(
+                    question,
+                    question_embedding,
+                    threshold=config.SEMANTIC_CACHE_THRESHOLD,
+                    intent=intent_type
+                )
+                if cached_result:
+                    latency = time.monotonic() - start_time
+                    self._record_success(latency)
+                    logger.info("✓ 语义缓存命中 (耗时: %.2f秒)", latency)
+                    yield from self._complete_events(cached_result, stream)
+                    return
             
             # ========== 步骤2: 任务路由与执行 ==========
-            print(f"\n[2/5] 任务路由与执行...")
+            logger.info("[2/5] 任务路由与执行...")
             
-            if intent_type == "CALCULATION":
-                result = self._handle_calculation(question)
+            streamed = False
+            if stream and intent_type == "POLICY_QA":
+                # 政策问答流式生成，首个片段无需等待完整回答
+                result, streamed = yield from self._stream_policy_qa(
+                    question, user_location=user_location, return_sources=return_sources
+                )
+            elif intent_type == "CALCULATION":
+                result = self._handle_calculation(question, return_sources=return_sources)
             elif intent_type == "RECOMMENDATION":
-                result = self._handle_recommendation(question)
+                result = self._handle_recommendation(question, entities=intent_result.get("entities"))
             elif intent_type == "DATA_QUERY":
-                result = self._handle_data_query(question, user_location=user_location)
+                result = self._handle_data_query(question, user_location=user_location,
+                                                 return_sources=return_sources)
             elif intent_type == "COMPLEX":
-                result = self._handle_complex(question)
+                result = self._handle_complex(question, return_sources=return_sources)
             else:  # POLICY_QA
-                result = self._handle_policy_qa(question, user_location=user_location)
+                result = self._handle_policy_qa(question, user_location=user_location,
+                                                return_sources=return_sources)
             
             # ========== 步骤3: 输出格式化 ==========
-            print(f"\n[5/5] 输出格式化...")
-            result["answer"] = self.output_formatter.format(
-                result["answer"],
-                metadata={
-                    "sources": result.get("sources", []),
-                    "confidence": result.get("confidence", 0.0)
-                }
-            )
+            logger.info("[5/5] 输出格式化...")
+            format_metadata = {
+                "sources": result.get("sources", []),
+                "confidence": result.get("confidence", 0.0)
+            }
+            if streamed:
+                # 正文已逐段输出，只补充来源、置信度等结尾信息
+                tail = self.output_formatter.format_tail(format_metadata)
+                yield {"type": "chunk", "content": tail}
+                result["answer"] = self.output_formatter.format_chunk(result["answer"]) + tail
+            else:
+                result["answer"] = self.output_formatter.format(
+                    result["answer"],
+                    metadata=format_metadata
+                )
             
             # ========== 新增: 质量验证 ==========
             if self.quality_validator:
@@ -319,11 +392,10 @@ class PolicyAgent:
                 
                 # 如果质量不过关，记录问题
                 if not validation_result["passed"]:
-                    print(f"\n⚠️ 质量验证: {validation_result['overall_score']}/100 (不过关)")
-                    if validation_result["issues"]:
-                        print(f"   问题: {validation_result['issues'][:2]}")
+                    logger.warning("⚠️ 质量验证: %s/100 (不过关), 问题: %s",
+                                   validation_result['overall_score'], validation_result['issues'][:2])
                 else:
-                    print(f"\n✅ 质量验证: {validation_result['overall_score']}/100 (通过)")
+                    logger.info("✅ 质量验证: %s/100 (通过)", validation_result['overall_score'])
             
             # 添加意图类型到结果
             result["intent_type"] = intent_type
@@ -335,10 +407,8 @@ class PolicyAgent:
             self._save_conversation(question, result)
             
             # 更新指标
-            self.metrics["successful_queries"] += 1
-            latency = time.time() - start_time
-            self.metrics["latency_history_ms"].append(latency * 1000)
-            self._update_latency(latency)
+            latency = time.monotonic() - start_time
+            self._record_success(latency)
             
             # ========== 新增: 性能监控 ==========
             if self.monitoring_system:
@@ -349,27 +419,28 @@ class PolicyAgent:
                     "confidence": result.get("confidence", 0),
                 })
             
-            print(f"\n✓ 查询完成 (耗时: {latency:.2f}秒)")
-            print(f"{'='*60}\n")
+            logger.info("✓ 查询完成 (耗时: %.2f秒)", latency)
             
             # ========== 缓存结果 ==========
-            if self.cache_manager:
+            # 未构建来源的结果不写缓存，避免之后需要来源的请求命中不完整结果
+            if self.cache_manager and return_sources:
                 # 缓存常见问题类型的答案（政策问答、计算、推荐）
                 if intent_type in ["POLICY_QA", "CALCULATION", "RECOMMENDATION"]:
-                    self.cache_manager.set(question, result)
-                    print(f"✓ 结果已缓存")
+                    self.cache_manager.set_by_hash(qhash, result)
+                    logger.info("✓ 结果已缓存")
+                if intent_type in config.SEMANTIC_CACHE_INTENTS and question_embedding is not None:
+                    self.cache_manager.semantic_set(question, question_embedding, result, key=qhash,
+                                                    intent=intent_type)
             
-            return result
+            yield from self._complete_events(result, stream, streamed)
             
         except Exception as e:
-            print(f"\n✗ 查询失败: {e}")
-            import traceback
-            traceback.print_exc()
-            self.metrics["failed_queries"] += 1
+            logger.exception("✗ 查询失败: %s", e)
+            self._incr_metric("failed_queries")
             
             # ========== 新增: 错误监控 ==========
             if self.monitoring_system:
-                latency = time.time() - start_time
+                latency = time.monotonic() - start_time
                 self.monitoring_system.record_query({
                     "query": question,
                     "status": "error",
@@ -378,54 +449,33 @@ class PolicyAgent:
                     "error_msg": str(e)
                 })
             
-            return {
+            yield from self._complete_events({
                 "answer": "抱歉，系统处理您的问题时出现错误，请稍后重试或联系人工客服。",
                 "sources": [],
                 "confidence": 0.0,
                 "intent_type": None,
                 "rejected": False,
                 "error": str(e)
-            }
+            }, stream)
+    
+    def _complete_events(self, result: Dict, stream: bool, streamed: bool = False):
+        """产出结束事件；流式模式下尚未逐段输出的答案作为一个整体片段先发出"""
+        if stream and not streamed:
+            yield {"type": "chunk", "content": result.get("answer", "")}
+        yield {"type": "complete", "result": result}
     
-    def _handle_policy_qa(self, question: str, user_location: Optional[Dict] = None) -> Dict:
+    def _handle_policy_qa(self, question: str, user_location: Optional[Dict] = None,
+                          return_sources: bool = True) -> Dict:
         """处理政策文本问答"""
-        print("执行: 政策文本问答")
+        logger.info("执行: 政策文本问答")
         
         # 混合检索
         docs = self._retrieve_documents(question, user_location=user_location)
         if not docs:
             return self._no_result_response()
         
-        # ========== 新增: 政策验证 ==========
-        if self.policy_validator and len(docs) > 0:
-            policies_to_validate = []
-            for doc in docs[:3]:  # 验证前3个
-                policies_to_validate.append({
-                    "content": doc.page_content,
-                    "source": doc.metadata.get('source', 'Unknown'),
-                    "date": doc.metadata.get('date', '')
-                })
-            
-            validation_result = self.policy_validator.batch_validate(policies_to_validate)
-            stats = validation_result["statistics"]
-            
-            if stats["expired"] > 0 or stats["obsolete"] > 0:
-                print(f"\n⚠️ 政策时效性检查: {stats['expired']}个已过期, {stats['obsolete']}个已废止")
-        
-        # ========== 新增: 矛盾检测 ==========
-        if self.contradiction_detector and len(docs) >= 2:
-            policies_to_check = []
-            for doc in docs[:5]:  # 检查前5个
-                policies_to_check.append({
-                    "content": doc.page_content,
-                    "source": doc.metadata.get('source', 'Unknown'),
-                    "date": doc.metadata.get('date', '')
-                })
-            
-            contradiction_result = self.contradiction_detector.detect(policies_to_check)
-            if contradiction_result["has_contradiction"]:
-                print(f"\n⚠️ 发现 {len(contradiction_result['contradictions'])} 个政策矛盾")
-                print(f"   一致性分数: {contradiction_result['consistency_score']:.2f}")
+        # 政策验证与矛盾检测只读取检索结果，放到线程池与LLM生成并行
+        check_futures = self._submit_policy_checks(docs)
         
         # 构建Prompt
         messages = self.prompt_builder.build_policy_qa_prompt(question, docs)
@@ -433,27 +483,95 @@ class PolicyAgent:
         # LLM生成
         answer = self.llm.chat(messages)
         
-        # 提取来源
-        sources = [{
-            "source": doc.metadata.get('source', 'Unknown'),
-            "content": doc.page_content[:200],
-            "similarity": 0.85  # 简化
-        } for doc in docs]
+        self._collect_policy_checks(check_futures)
         
         return {
             "answer": answer,
-            "sources": sources,
+            "sources": self._build_sources(docs, similarity=0.85) if return_sources else [],  # 相关度简化
             "confidence": 0.85
         }
     
-    def _handle_calculation(self, question: str) -> Dict:
+    def _stream_policy_qa(self, question: str, user_location: Optional[Dict] = None,
+                          return_sources: bool = True):
+        """
+        流式政策问答：逐段产出LLM生成内容
+        
+        Returns:
+            (结果字典, 是否已流式输出正文)，通过 yield from 获取
+        """
+        logger.info("执行: 政策文本问答（流式）")
+        
+        docs = self._retrieve_documents(question, user_location=user_location)
+        if not docs:
+            return self._no_result_response(), False
+        
+        check_futures = self._submit_policy_checks(docs)
+        messages = self.prompt_builder.build_policy_qa_prompt(question, docs)
+        
+        parts = []
+        for piece in self.llm.stream_chat(messages):
+            parts.append(piece)
+            yield {"type": "chunk", "content": self.output_formatter.format_chunk(piece)}
+        
+        self._collect_policy_checks(check_futures)
+        
+        return {
+            "answer": "".join(parts),
+            "sources": self._build_sources(docs, similarity=0.85) if return_sources else [],
+            "confidence": 0.85
+        }, True
+    
+    def _submit_policy_checks(self, docs: List) -> Tuple:
+        """提交政策时效性验证和矛盾检测任务（只读，可与LLM调用并行）"""
+        policies = [{
+            "content": doc.page_content,
+            "source": doc.metadata.get('source', 'Unknown'),
+            "date": doc.metadata.get('date', '')
+        } for doc in docs[:5]]
+        
+        validation_future = None
+        if self.policy_validator and policies:
+            # 验证前3个
+            validation_future = self._check_pool.submit(self.policy_validator.batch_validate, policies[:3])
+        
+        contradiction_future = None
+        if self.contradiction_detector and len(policies) >= 2:
+            # 检查前5个
+            contradiction_future = self._check_pool.submit(self.contradiction_detector.detect, policies)
+        
+        return validation_future, contradiction_future
+    
+    def _collect_policy_checks(self, futures: Tuple, timeout: float = 1.0):
+        """汇总政策检查结果（仅输出告警，不影响回答）"""
+        validation_future, contradiction_future = futures
+        
+        # ========== 新增: 政策验证 ==========
+        if validation_future is not None:
+            try:
+                stats = validation_future.result(timeout=timeout)["statistics"]
+                if stats["expired"] > 0 or stats["obsolete"] > 0:
+                    logger.warning("⚠️ 政策时效性检查: %s个已过期, %s个已废止", stats['expired'], stats['obsolete'])
+            except Exception as e:
+                logger.warning("⚠ 政策时效性检查失败: %s", e)
+        
+        # ========== 新增: 矛盾检测 ==========
+        if contradiction_future is not None:
+            try:
+                contradiction_result = contradiction_future.result(timeout=timeout)
+                if contradiction_result["has_contradiction"]:
+                    logger.warning("⚠️ 发现 %d 个政策矛盾, 一致性分数: %.2f",
+                                   len(contradiction_result['contradictions']),
+                                   contradiction_result['consistency_score'])
+            except Exception as e:
+                logger.warning("⚠ 政策矛盾检测失败: %s", e)
+    
+    def _handle_calculation(self, question: str, return_sources: bool = True) -> Dict:
         """处理补贴计算"""
-        print("执行: 补贴精确计算")
+        logger.info("执行: 补贴精确计算")
         
         # 提取金额和类型（简化实现）
         # 实际应使用NER或LLM提取
-        import re
-        amounts = re.findall(r'(\d+)', question)
+        amounts = _AMOUNT_RE.findall(question)
         
         if amounts:
             amount = float(amounts[0])
@@ -479,32 +597,27 @@ class PolicyAgent:
             }
         else:
             # 金额未明确，转为政策问答
-            return self._handle_policy_qa(question)
+            return self._handle_policy_qa(question, return_sources=return_sources)
     
-    def _handle_recommendation(self, question: str) -> Dict:
+    def _handle_recommendation(self, question: str, entities: Optional[Dict] = None) -> Dict:
         """处理智能推荐（使用动态规划全局最优）"""
-        print("执行: 智能方案推荐（动态规划）")
+        logger.info("执行: 智能方案推荐（动态规划）")
         
         # 提取预算和需求
         if self.ner_extractor:
-            # 使用 NER 提取（如果可用）
-            entities = self.ner_extractor.extract(question)
+            # 使用 NER 提取（如果可用），意图识别阶段已抽取的实体可直接复用
+            entities = self.ner_extractor.extract(question, llm_entities=entities)
             budget = entities.get("amounts", [10000])[0] if entities.get("amounts") else 10000
             needs = entities.get("products", [])
         else:
             # 回退到正则提取
-            import re
-            budgets = re.findall(r'(\d+)', question)
+            budgets = _AMOUNT_RE.findall(question)
             budget = float(budgets[0]) if budgets else 10000
             
-            # 提取需求（只匹配定义的产品名）
-            product_keywords = ["冰箱", "洗衣机", "电视", "手机", "平板", "空调"]
-            needs = []
-            for product in product_keywords:
-                if product in question:
-                    needs.append(product)
+            # 提取需求（只匹配定义的产品名，单次扫描并去重）
+            needs = list(dict.fromkeys(_PRODUCT_RE.findall(question)))
         
-        print(f"[DEBUG Agent] 提取预算: {budget}, 需求: {needs}")
+        logger.debug("提取预算: %s, 需求: %s", budget, needs)
         
         # 调用动态规划推荐（全局最优）
         recommendation = self.recommender.recommend_max_subsidy_plan(
@@ -513,7 +626,8 @@ class PolicyAgent:
             algorithm="dp"  # 使用动态规划
         )
         
-        print(f"[DEBUG Agent] 推荐结果: {len(recommendation.get('selected_products', []))}件产品, 总补贴￥{recommendation.get('total_subsidy', 0)}")
+        logger.debug("推荐结果: %d件产品, 总补贴￥%s",
+                     len(recommendation.get('selected_products', [])), recommendation.get('total_subsidy', 0))
         
         # 调用价格比较插件（如果可用）
         price_comparison = None
@@ -525,9 +639,9 @@ class PolicyAgent:
                         "price_comparator",
                         {"products": products, "budget": budget}
                     )
-                    print(f"✓ 价格比较插件运行成功: 总节省￥{price_comparison.get('total_savings', 0)}")
+                    logger.info("✓ 价格比较插件运行成功: 总节省￥%s", price_comparison.get('total_savings', 0))
             except Exception as e:
-                print(f"⚠ 价格比较插件执行失败: {e}")
+                logger.warning("⚠ 价格比较插件执行失败: %s", e)
         
         # 构建 Prompt
         messages = self.prompt_builder.build_recommendation_prompt(
@@ -547,15 +661,89 @@ class PolicyAgent:
             "price_comparison": price_comparison  # 添加价格比较结果
         }
     
-    def _handle_data_query(self, question: str, user_location: Optional[Dict] = None) -> Dict:
-        """处理数据/型号查询"""
-        print("执行: 数据查询")
-        # 简化：转为政策问答
-        return self._handle_policy_qa(question, user_location=user_location)
+    def _handle_data_query(self, question: str, user_location: Optional[Dict] = None,
+                           return_sources: bool = True) -> Dict:
+        """处理数据/型号查询：优先查静态索引，未命中再转为政策问答"""
+        logger.info("执行: 数据查询")
+        
+        # 索引内容来自济南市细则，其他城市的用户仍走检索
+        city = (user_location or {}).get("city", "")
+        entry = self._lookup_data_query(question) if not city or "济南" in city else None
+        if entry:
+            logger.info("✓ 数据查询索引命中")
+            return {
+                "answer": entry["answer"],
+                "sources": [{
+                    "source": source,
+                    "content": entry["answer"][:200],
+                    "similarity": 1.0
+                } for source in entry.get("sources", [])] if return_sources else [],
+                "confidence": 0.99
+            }
+        
+        return self._handle_policy_qa(question, user_location=user_location, return_sources=return_sources)
     
-    def _handle_complex(self, question: str) -> Dict:
+    def _lookup_data_query(self, question: str) -> Optional[Dict]:
+        """按 "产品:主题" 查找数据查询索引，问题涉及多个产品或无法确定主题时返回None"""
+        if not self._data_query_index or any(kw in question for kw in DATA_QUERY_DETAIL_KEYWORDS):
+            return None
+        
+        products = set(_PRODUCT_RE.findall(question))
+        if len(products) > 1:
+            return None
+        product = products.pop() if products else ""
+        
+        for topic, keywords in DATA_QUERY_TOPICS.items():
+            if any(kw in question for kw in keywords):
+                return self._data_query_index.get(f"{product}:{topic}")
+        return None
+    
+    def _build_data_query_index(self) -> Dict:
+        """
+        由 SubsidyCalculator 的规则表生成数据查询索引（"产品:主题" -> 答案），
+        与计算工具共用同一份补贴数据；文件中只保存各补贴大类对应的政策原文
+        """
+        sources = {}
+        try:
+            if os.path.isfile(config.DATA_QUERY_INDEX_FILE):
+                with open(config.DATA_QUERY_INDEX_FILE, "r", encoding="utf-8") as f:
+                    sources = json.load(f)
+        except Exception as e:
+            print(f"加载数据查询索引来源失败: {e}")
+        
+        appliance = self.calculator.rules["家电"]
+        digital = self.calculator.rules["数码"]
+        appliance_sources = sources.get("家电", [])
+        digital_sources = sources.get("数码", [])
+        
+        index = {}
+        for product in appliance["categories"]:
+            index[f"{product}:标准"] = {
+                "answer": f"{product}属于家电以旧换新补贴范围，按购新金额的{appliance['rate']:.0%}给予补贴，"
+                          f"单台最高不超过{appliance['max_per_item']}元，购新金额需不低于{appliance['min_purchase']}元。",
+                "sources": appliance_sources
+            }
+        for product, rule in digital.items():
+            index[f"{product}:标准"] = {
+                "answer": f"{product}属于数码产品购新补贴范围，按购新金额的{rule['rate']:.0%}给予补贴，"
+                          f"单件最高不超过{rule['max']}元，购新金额需不低于{rule['min_purchase']}元。",
+                "sources": digital_sources
+            }
+        digital_summary = "、".join(
+            f"{product}（按{rule['rate']:.0%}补贴，单件最高{rule['max']}元）" for product, rule in digital.items()
+        )
+        index[":范围"] = {
+            "answer": "当前补贴适用产品包括：\n"
+                      f"- 家电类：{'、'.join(appliance['categories'])}"
+                      f"（按购新金额的{appliance['rate']:.0%}补贴，单台最高{appliance['max_per_item']}元）\n"
+                      f"- 数码类：{digital_summary}",
+            "sources": appliance_sources + digital_sources
+        }
+        return index
+    
+    def _handle_complex(self, question: str, return_sources: bool = True) -> Dict:
         """处理复杂综合问题"""
-        print("执行: 复杂综合分析")
+        logger.info("执行: 复杂综合分析")
         # 简化：使用增强检索
         docs = self._retrieve_documents(question, top_k=config.RERANK_TOP_K)
         
@@ -568,45 +756,37 @@ class PolicyAgent:
         
         answer = self.llm.chat(messages)
         
-        sources = [{
-            "source": doc.metadata.get('source', 'Unknown'),
-            "content": doc.page_content[:200],
-            "similarity": 0.80
-        } for doc in docs[:3]]
-        
         return {
             "answer": answer,
-            "sources": sources,
+            "sources": self._build_sources(docs[:3], similarity=0.80) if return_sources else [],
             "confidence": 0.75
         }
     
     def _retrieve_documents(self, query: str, top_k: int = None, user_location: Optional[Dict] = None) -> List:
         """检索文档(优化版:并行检索+智能缓存)"""
-        print(f"[3/5] 混合检索...")
+        logger.info("[3/5] 混合检索...")
         
         if top_k is None:
             top_k = config.RERANK_TOP_K
         
-        # 生成缓存键
-        cache_key = f"docs:{query}:{top_k}:{user_location.get('city') if user_location else 'none'}"
+        # 生成缓存键（定长内容哈希，不拼接原始问题）
+        cache_key = None
+        if self.cache_manager:
+            city = user_location.get('city') if user_location else 'none'
+            cache_key = f"docs:{self.cache_manager.hash_query(query)}:{top_k}:{city}"
         
         # 尝试从缓存获取
         if self.cache_manager:
-            cached_docs = self.cache_manager.get(cache_key)
+            cached_docs = self.cache_manager.get_by_hash(cache_key)
             if cached_docs:
-                print(f"✓ 文档缓存命中")
+                logger.info("✓ 文档缓存命中")
                 return cached_docs
         
-        # 并行检索
-        import concurrent.futures
-        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
-            # 同时进行向量检索和关键词检索
-            if self.hybrid_retriever:
-                future = executor.submit(self.hybrid_retriever.retrieve, query, top_k)
-                docs = future.result(timeout=3.0)  # 3秒超时
-            else:
-                future = executor.submit(self.kb.search, query, top_k)
-                docs = future.result(timeout=3.0)
+        # 检索（混合检索器内部已合并向量与关键词召回）
+        if self.hybrid_retriever:
+            docs = self.hybrid_retriever.retrieve(query, top_k)
+        else:
+            docs = self.kb.search(query, top_k)
         
         # ========== 新增: 基于地理位置重排 ==========
         if user_location and self.location_service and docs:
@@ -630,15 +810,30 @@ class PolicyAgent:
             # 转换回原始格式
             docs = [d["original_doc"] for d in reranked_dicts]
             
-            print(f"✓ 基于位置重排序完成 (权重: 0.3)")
+            logger.info("✓ 基于位置重排序完成 (权重: 0.3)")
         
         # 缓存结果(5分钟TTL)
         if self.cache_manager and docs:
-            self.cache_manager.set(cache_key, docs, ttl=300)
+            self.cache_manager.set_by_hash(cache_key, docs, ttl=300)
         
-        print(f"✓ 检索到 {len(docs)} 条相关文档")
+        logger.info("✓ 检索到 %d 条相关文档", len(docs))
         return docs
     
+    def _build_sources(self, docs: List, similarity: float) -> List[Dict]:
+        """提取来源信息"""
+        return [{
+            "source": doc.metadata.get('source', 'Unknown'),
+            "content": doc.page_content[:200],
+            "similarity": similarity
+        } for doc in docs]
+    
+    def _embed_question(self, question: str) -> Optional[List[float]]:
+        """问题向量化（用于语义缓存），向量模型不可用时返回None"""
+        try:
+            return self.kb.embeddings.embed_query(question)
+        except Exception:
+            return None
+    
     def _no_result_response(self) -> Dict:
         """无结果响应"""
         return {
@@ -657,44 +852,93 @@ class PolicyAgent:
             "timestamp": time.time()
         })
     
-    def _update_latency(self, latency: float):
-        """更新平均延迟"""
-        total = self.metrics["total_queries"]
-        current_avg = self.metrics["avg_latency"]
-        self.metrics["avg_latency"] = (
-            (current_avg * (total - 1) + latency) / total
-        )
+    def _incr_metric(self, name: str):
+        """线程安全地累加计数类指标"""
+        with self._metrics_lock:
+            self.metrics[name] += 1
     
-    def batch_query(self, questions: List[str]) -> List[Dict]:
-        """批量处理问题(优化版:并行处理)"""
-        import concurrent.futures
+    def _record_success(self, latency: float):
+        """记录一次成功查询：计数与延迟在同一把锁内更新，保证彼此一致"""
+        with self._metrics_lock:
+            self.metrics["successful_queries"] += 1
+            self._record_latency(latency * 1000)
+    
+    def _record_latency(self, latency_ms: float):
+        """记录一次延迟到环形缓冲区，并维护累计和（调用方需持有 _metrics_lock）"""
+        if len(self._latency_ring) == self._latency_ring.maxlen:
+            self._latency_sum_ms -= self._latency_ring[0]
+        self._latency_ring.append(latency_ms)
+        self._latency_sum_ms += latency_ms
+    
+    def batch_query(self, questions: List[str], user_locations: Optional[List[Optional[Dict]]] = None,
+                    return_sources: bool = True, timeout: Optional[float] = 10.0) -> List[Dict]:
+        """
+        批量处理问题(优化版:并行处理)
+        
+        Args:
+            questions: 问题列表
+            user_locations: 与问题一一对应的用户位置（可选）
+            return_sources: 是否返回检索到的原文
+            timeout: 单个问题的等待超时（秒），None表示不限
+        """
+        if user_locations is None:
+            user_locations = [None] * len(questions)
+        
+        # 使用共享线程池并行处理，按提交顺序收集结果（与输入一一对应）
+        futures = [
+            self._io_pool.submit(self.query, question, return_sources, location)
+            for question, location in zip(questions, user_locations)
+        ]
         
-        # 使用线程池并行处理
         results = []
-        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
-            # 提交所有任务
-            future_to_question = {
-                executor.submit(self.query, question, True): question 
-                for question in questions
-            }
-            
-            # 按顺序收集结果
-            for question in questions:
-                for future, q in future_to_question.items():
-                    if q == question:
-                        try:
-                            result = future.result(timeout=10.0)  # 10秒超时
-                            results.append(result)
-                        except Exception as e:
-                            results.append({
-                                "answer": f"处理失败: {str(e)}",
-                                "sources": [],
-                                "confidence": 0.0
-                            })
-                        break
+        for future in futures:
+            try:
+                results.append(future.result(timeout=timeout))
+            except Exception as e:
+                results.append({
+                    "answer": f"处理失败: {str(e)}",
+                    "sources": [],
+                    "confidence": 0.0
+                })
         
         return results
     
+    async def abatch_query(self, questions: List[str], user_locations: Optional[List[Optional[Dict]]] = None,
+                           return_sources: bool = True, max_concurrency: int = 8) -> List[Dict]:
+        """
+        批量处理问题（异步版）：在事件循环中并发调度，不阻塞调用方
+        
+        Args:
+            questions: 问题列表
+            user_locations: 与问题一一对应的用户位置（可选）
+            return_sources: 是否返回检索到的原文
+            max_concurrency: 同时处理的最大问题数（对应LLM服务的并发额度）
+        """
+        if user_locations is None:
+            user_locations = [None] * len(questions)
+        
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def run_one(question: str, location: Optional[Dict]) -> Dict:
+            async with semaphore:
+                try:
+                    return await loop.run_in_executor(
+                        self._io_pool,
+                        functools.partial(self.query, question, return_sources, location)
+                    )
+                except Exception as e:
+                    return {
+                        "answer": f"处理失败: {str(e)}",
+                        "sources": [],
+                        "confidence": 0.0
+                    }
+        
+        # gather 按输入顺序返回结果
+        return await asyncio.gather(*[
+            run_one(question, location) for question, location in zip(questions, user_locations)
+        ])
+    
     def evaluate(self, cases: List[Dict]) -> Dict:
         """批量评测：根据期望关键词粗略计算准确率与响应时间"""
         total = len(cases)
@@ -704,9 +948,9 @@ class PolicyAgent:
         for case in cases:
             q = case.get("question", "")
             expected = case.get("expected_keywords", [])
-            start = time.time()
+            start = time.monotonic()
             r = self.query(q, return_sources=True)
-            lat_ms = (time.time() - start) * 1000
+            lat_ms = (time.monotonic() - start) * 1000
             latencies.append(lat_ms)
             ans = (r.get("answer") or "")
             ok = False
@@ -737,32 +981,44 @@ class PolicyAgent:
     
     def get_metrics(self) -> Dict:
         """获取性能指标"""
-        sessions = self.metrics["total_queries"]
-        hist = self.metrics.get("latency_history_ms", [])
-        avg_ms = (sum(hist) / len(hist)) if hist else 0
-        p95_ms = (sorted(hist)[max(int(len(hist) * 0.95) - 1, 0)] if hist else 0)
-        error_rate = (self.metrics["failed_queries"] / max(sessions, 1))
+        # 在锁内取快照，锁外再做分位数等计算
+        with self._metrics_lock:
+            metrics = dict(self.metrics)
+            latencies = np.fromiter(self._latency_ring, dtype=float, count=len(self._latency_ring))
+            latency_sum_ms = self._latency_sum_ms
+        
+        sessions = metrics["total_queries"]
+        n = len(latencies)
+        avg_ms = (latency_sum_ms / n) if n else 0
+        p95_ms = 0
+        if n:
+            # 部分排序取分位数，O(n)
+            k = max(int(n * 0.95) - 1, 0)
+            p95_ms = float(np.partition(latencies, k)[k])
+        error_rate = (metrics["failed_queries"] / max(sessions, 1))
         return {
             "sessions": sessions,
             "avg_latency_ms": avg_ms,
             "p95_latency_ms": p95_ms,
             "success_rate": (
-                self.metrics["successful_queries"] /
-                max(self.metrics["total_queries"], 1)
+                metrics["successful_queries"] /
+                max(metrics["total_queries"], 1)
             ),
             "rejection_rate": (
-                self.metrics["rejected_queries"] /
-                max(self.metrics["total_queries"], 1)
+                metrics["rejected_queries"] /
+                max(metrics["total_queries"], 1)
             ),
             "error_rate": error_rate,
-            "total_queries": self.metrics["total_queries"],
-            "successful_queries": self.metrics["successful_queries"],
-            "rejected_queries": self.metrics["rejected_queries"],
-            "avg_latency": self.metrics["avg_latency"]
+            "total_queries": metrics["total_queries"],
+            "successful_queries": metrics["successful_queries"],
+            "rejected_queries": metrics["rejected_queries"],
+            "avg_latency": avg_ms / 1000
         }
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     # 测试企业级智能体
     agent = PolicyAgent()
     agent.initialize(force_rebuild=False)
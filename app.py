@@ -2,26 +2,111 @@
 Web服务 - FastAPI后端接口
 企业级政策咨询智能体API
 """
-from fastapi import FastAPI, HTTPException, APIRouter, Request, Header
+from fastapi import FastAPI, HTTPException, APIRouter, Request, Response, Header, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
 from agent import PolicyAgent
+from document_loader import DocumentLoader
+from rate_limiter import SlidingWindowLimiter
+import config
 import uvicorn
+import concurrent.futures
+import functools
+import math
 import time
 import os
 import json
+import logging
+import threading
 import asyncio
-from collections import defaultdict
-from datetime import datetime, timedelta
+import difflib
+from contextlib import asynccontextmanager
+
+logger = logging.getLogger("app.query")
+
+# 可选的C实现JSON序列化（用于接口响应与SSE帧）
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# 可选的行级Myers差分（diff-match-patch，纯Python实现，用于版本对比）
+try:
+    from diff_match_patch import diff_match_patch
+    DMP_AVAILABLE = True
+except ImportError:
+    DMP_AVAILABLE = False
+
+# 可选的高性能事件循环与HTTP解析器
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
+try:
+    import httptools
+    HTTPTOOLS_AVAILABLE = True
+except ImportError:
+    HTTPTOOLS_AVAILABLE = False
+
+
+def configure_logging():
+    """
+    为当前进程安装日志处理器并设置级别
+    
+    以 "app:app" 导入字符串启动的worker不会执行 __main__，因此在lifespan中调用，每个worker各自配置。
+    全局级别默认WARNING（排查问题时可设置 LOG_LEVEL=DEBUG），开启 VERBOSE_LOGGING 时智能体输出INFO级别的步骤日志。
+    """
+    root_level = logging.getLevelName(os.getenv("LOG_LEVEL", "WARNING").upper())
+    if not isinstance(root_level, int):
+        root_level = logging.WARNING
+    logging.basicConfig(level=root_level, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if config.VERBOSE_LOGGING:
+        logging.getLogger("agent").setLevel(min(root_level, logging.INFO))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """启动时初始化智能体（多worker部署时每个worker进程各初始化一次）"""
+    global agent
+    configure_logging()
+    # 同步的智能体调用统一放到共享线程池执行，避免阻塞事件循环
+    app.state.executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=min(32, (os.cpu_count() or 1) * 4),
+        thread_name_prefix="agent"
+    )
+    # 知识库重建/同步的后台任务（同一时间只允许一个）
+    app.state.kb_task = None
+    app.state.kb_task_name = None
+    app.state.kb_task_started = None
+    print("正在初始化政策咨询智能体...")
+    agent = PolicyAgent()
+    agent.initialize(force_rebuild=False)
+    print("智能体初始化完成！")
+    
+    # Redis可用时限流计数在各worker间共享
+    if agent.cache_manager and agent.cache_manager.use_redis:
+        rate_limiter.use_redis(agent.cache_manager.redis_client)
+    sweep_task = asyncio.create_task(sweep_rate_limit_store())
+    
+    yield
+    
+    sweep_task.cancel()
+    app.state.executor.shutdown(wait=False)
+
 
 # 创建FastAPI应用
 app = FastAPI(
     title="企业级政策咨询智能体API", 
     version="2.0.0",
-    description="支持双层意图识别、混合检索、工具链计算、智能推荐"
+    description="支持双层意图识别、混合检索、工具链计算、智能推荐",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse if ORJSON_AVAILABLE else JSONResponse
 )
 
 # 配置CORS - 优化版
@@ -44,44 +129,84 @@ app.add_middleware(
 # 全局智能体实例
 agent = None
 
-# 创建API路由器
-api_router = APIRouter(prefix="/api")
-
-# 限流器:基于IP的简单限流
-rate_limit_store = defaultdict(list)
+# 限流器:基于IP的滑动窗口限流
 RATE_LIMIT = 60  # 每分钟最多60次请求
 RATE_WINDOW = 60  # 60秒窗口
+RATE_MAX_CLIENTS = 100000  # 内存中最多跟踪的IP数，超出时淘汰最久未访问的IP
+rate_limiter = SlidingWindowLimiter(RATE_LIMIT, RATE_WINDOW, max_clients=RATE_MAX_CLIENTS)
 
-async def check_rate_limit(request: Request):
-    """限流检查"""
-    client_ip = request.client.host
-    now = datetime.now()
+async def check_rate_limit(request: Request, response: Response):
+    """限流检查（作为依赖挂在所有API路由上）"""
+    client_ip = request.client.host if request.client else "unknown"
+    allowed, remaining, reset = rate_limiter.hit(client_ip)
     
-    # 清理过期记录
-    rate_limit_store[client_ip] = [
-        ts for ts in rate_limit_store[client_ip]
-        if (now - ts).total_seconds() < RATE_WINDOW
-    ]
+    headers = {
+        "X-RateLimit-Limit": str(RATE_LIMIT),
+        "X-RateLimit-Remaining": str(max(remaining, 0)),
+        "X-RateLimit-Reset": str(math.ceil(reset))
+    }
     
     # 检查是否超限
-    if len(rate_limit_store[client_ip]) >= RATE_LIMIT:
+    if not allowed:
         raise HTTPException(
             status_code=429,
-            detail=f"请求过于频繁,每{RATE_WINDOW}秒最多{RATE_LIMIT}次请求"
+            detail=f"请求过于频繁,每{RATE_WINDOW}秒最多{RATE_LIMIT}次请求",
+            headers={**headers, "Retry-After": headers["X-RateLimit-Reset"]}
         )
     
-    # 记录本次请求
-    rate_limit_store[client_ip].append(now)
+    response.headers.update(headers)
 
 
-@app.on_event("startup")
-async def startup_event():
-    """启动时初始化智能体"""
-    global agent
-    print("正在初始化政策咨询智能体...")
-    agent = PolicyAgent()
-    agent.initialize(force_rebuild=False)
-    print("智能体初始化完成！")
+async def sweep_rate_limit_store():
+    """定期清理窗口内已无请求的IP，避免限流记录无限增长"""
+    while True:
+        await asyncio.sleep(RATE_WINDOW)
+        rate_limiter.sweep()
+
+
+def sse_event(data: dict) -> bytes:
+    """编码一帧SSE数据"""
+    if ORJSON_AVAILABLE:
+        try:
+            return b"data: " + orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) + b"\n\n"
+        except TypeError:
+            pass  # 含orjson不支持的类型时交给标准库处理
+    return f"data: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+
+class CachedStats:
+    """短TTL缓存的统计结果：过期后只由一个请求负责刷新，其余请求等待并复用结果"""
+    
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.value = None
+        self.expires_at = 0.0
+        self.lock = asyncio.Lock()
+    
+    async def get(self, func):
+        """返回缓存值，过期时在线程池中调用 func 刷新"""
+        if self.value is not None and time.monotonic() < self.expires_at:
+            return self.value
+        async with self.lock:
+            # 双重检查：等锁期间可能已被其他请求刷新
+            if self.value is None or time.monotonic() >= self.expires_at:
+                self.value = await asyncio.get_running_loop().run_in_executor(app.state.executor, func)
+                self.expires_at = time.monotonic() + self.ttl
+        return self.value
+    
+    def invalidate(self):
+        """使缓存立即失效"""
+        self.expires_at = 0.0
+
+
+# 统计类接口的缓存（健康检查等高频探测不再每次访问知识库）
+kb_stats_cache = CachedStats(ttl=5)
+metrics_cache = CachedStats(ttl=5)
+monitoring_stats_cache = CachedStats(ttl=5)
+
+
+# 创建API路由器
+api_router = APIRouter(prefix="/api", dependencies=[Depends(check_rate_limit)])
 
 
 # 请求模型
@@ -137,7 +262,7 @@ async def health_check():
     
     if agent is not None:
         try:
-            stats = agent.kb.get_stats()
+            stats = await kb_stats_cache.get(agent.kb.get_stats)
             kb_ready = stats.get('total_documents', 0) > 0
             kb_doc_count = stats.get('total_documents', 0)
         except:
@@ -151,7 +276,8 @@ async def health_check():
     }
 
 
-@api_router.post("/query", response_model=AnswerResponse)
+# 直接返回字典，不做输出模型的二次校验；AnswerResponse 仅用于接口文档
+@api_router.post("/query", responses={200: {"model": AnswerResponse}})
 async def query(request: QuestionRequest):
     """
     单个问题咨询（企业级）
@@ -164,7 +290,7 @@ async def query(request: QuestionRequest):
         raise HTTPException(status_code=400, detail="问题不能为空")
     
     try:
-        start_time = time.time()
+        start_time = time.monotonic()
         
         # 处理位置信息
         user_location = None
@@ -175,31 +301,36 @@ async def query(request: QuestionRequest):
                 "district": request.location.district
             }
         
-        result = agent.query(
-            request.question,
-            return_sources=request.return_sources,
-            user_location=user_location
+        # 在线程池中执行，不阻塞事件循环
+        result = await asyncio.get_running_loop().run_in_executor(
+            app.state.executor,
+            functools.partial(agent.query, request.question, request.return_sources, user_location)
         )
-        latency = time.time() - start_time
+        latency = time.monotonic() - start_time
         
-        # 调试日志
-        print(f"\n[DEBUG] API 返回数据:")
-        print(f"  - recommendation: {result.get('recommendation', {}).get('selected_products', [])}")
-        print(f"  - total_subsidy: {result.get('recommendation', {}).get('total_subsidy', 0)}")
-        print(f"  - algorithm: {result.get('algorithm')}")
-        print(f"  - is_optimal: {result.get('is_optimal')}\n")
+        # 调试日志（未开启DEBUG级别时不做任何格式化）
+        if logger.isEnabledFor(logging.DEBUG):
+            recommendation = result.get('recommendation') or {}
+            logger.debug(
+                "API 返回数据: recommendation=%s total_subsidy=%s algorithm=%s is_optimal=%s latency=%.2fs",
+                recommendation.get('selected_products', []),
+                recommendation.get('total_subsidy', 0),
+                result.get('algorithm'),
+                result.get('is_optimal'),
+                latency
+            )
         
-        return AnswerResponse(
-            question=request.question,
-            answer=result["answer"],
-            confidence=result["confidence"],
-            intent_type=result.get("intent_type"),
-            rejected=result.get("rejected", False),
-            sources=result.get("sources", []),
-            recommendation=result.get("recommendation"),  # 添加推荐详情
-            algorithm=result.get("algorithm"),  # 算法类型
-            is_optimal=result.get("is_optimal")  # 是否最优
-        )
+        return {
+            "question": request.question,
+            "answer": result["answer"],
+            "confidence": result["confidence"],
+            "intent_type": result.get("intent_type"),
+            "rejected": result.get("rejected", False),
+            "sources": result.get("sources", []),
+            "recommendation": result.get("recommendation"),  # 添加推荐详情
+            "algorithm": result.get("algorithm"),  # 算法类型
+            "is_optimal": result.get("is_optimal")  # 是否最优
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"处理问题时出错: {str(e)}")
 
@@ -216,7 +347,7 @@ async def batch_query(request: BatchQuestionRequest):
         raise HTTPException(status_code=400, detail="问题列表不能为空")
     
     try:
-        results = agent.batch_query(request.questions)
+        results = await agent.abatch_query(request.questions)
         return {
             "results": [
                 {
@@ -273,19 +404,58 @@ async def clear_history():
     return {"message": "对话历史已清空"}
 
 
+def start_kb_task(name: str, func, *args, **kwargs) -> dict:
+    """
+    在线程池中后台执行知识库维护任务（重建/同步）
+    已有任务在运行时不再启动新任务，重复请求合并到正在运行的任务上
+    """
+    task = app.state.kb_task
+    if task is not None and not task.done():
+        return {"status": "already_running", "task": app.state.kb_task_name}
+    
+    app.state.kb_task = asyncio.ensure_future(asyncio.get_running_loop().run_in_executor(
+        app.state.executor,
+        functools.partial(func, *args, **kwargs)
+    ))
+    app.state.kb_task.add_done_callback(lambda _: kb_stats_cache.invalidate())
+    app.state.kb_task_name = name
+    app.state.kb_task_started = time.time()
+    return {"status": "started", "task": name}
+
+
 @api_router.post("/rebuild_kb")
 async def rebuild_knowledge_base():
     """
-    重建知识库（用于政策更新）
+    重建知识库（用于政策更新），后台执行，进度通过 /rebuild_kb/status 查询
     """
     if agent is None:
         raise HTTPException(status_code=503, detail="智能体未初始化")
     
-    try:
-        agent.initialize(force_rebuild=True)
-        return {"message": "知识库重建成功"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"重建知识库时出错: {str(e)}")
+    result = start_kb_task("rebuild", agent.initialize, force_rebuild=True)
+    result["message"] = "知识库重建已开始" if result["status"] == "started" else "已有知识库任务在执行"
+    return result
+
+
+@api_router.get("/rebuild_kb/status")
+async def rebuild_knowledge_base_status():
+    """查询最近一次知识库重建/同步任务的状态"""
+    task = app.state.kb_task
+    if task is None:
+        return {"status": "idle"}
+    
+    status = {
+        "task": app.state.kb_task_name,
+        "started_at": app.state.kb_task_started,
+        "done": task.done()
+    }
+    if not task.done():
+        status["status"] = "running"
+    elif task.exception() is not None:
+        status["status"] = "failed"
+        status["error"] = str(task.exception())
+    else:
+        status["status"] = "succeeded"
+    return status
 
 
 @api_router.get("/metrics")
@@ -294,7 +464,7 @@ async def get_metrics():
     if agent is None:
         raise HTTPException(status_code=503, detail="智能体未初始化")
     
-    return agent.get_metrics()
+    return await metrics_cache.get(agent.get_metrics)
 
 
 @api_router.get("/kb_stats")
@@ -303,7 +473,7 @@ async def get_kb_stats():
     if agent is None:
         raise HTTPException(status_code=503, detail="智能体未初始化")
     try:
-        stats = agent.kb.get_stats()
+        stats = await kb_stats_cache.get(agent.kb.get_stats)
         return stats
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取知识库统计信息时出错: {str(e)}")
@@ -374,7 +544,9 @@ async def get_monitoring_statistics():
         raise HTTPException(status_code=501, detail="监控系统未启用")
     
     try:
-        stats = agent.monitoring_system.get_statistics(minutes=60)
+        stats = await monitoring_stats_cache.get(
+            functools.partial(agent.monitoring_system.get_statistics, minutes=60)
+        )
         return stats
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取监控数据时出错: {str(e)}")
@@ -446,15 +618,17 @@ async def get_external_api_status():
 
 
 @api_router.get("/policies")
-async def list_policies(q: Optional[str] = None, top_k: int = 10):
+async def list_policies(q: Optional[str] = None, top_k: int = 10, offset: int = 0):
     """
     列出/检索政策文档
+    未提供 q 时直接分页返回注册表中的文档，不触发向量检索
     """
     if agent is None:
         raise HTTPException(status_code=503, detail="智能体未初始化")
     try:
-        query = q.strip() if q else "以旧换新"
-        results = agent.kb.search_with_score(query, top_k=top_k)
+        if q is None or not q.strip():
+            return {"policies": agent.kb.list_documents(offset=offset, limit=top_k)}
+        results = agent.kb.search_with_score(q.strip(), top_k=top_k)
         return {
             "policies": [
                 {
@@ -470,14 +644,62 @@ async def list_policies(q: Optional[str] = None, top_k: int = 10):
 async def sync_policies():
     """
     增量同步政策库：新增文件增量入库，检测到修改则重建索引
+    后台执行，进度通过 /rebuild_kb/status 查询
     """
     if agent is None:
         raise HTTPException(status_code=503, detail="智能体未初始化")
-    try:
-        agent.kb.sync_knowledge_base(force_rebuild_on_modified=True)
-        return {"message": "政策库同步完成"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"同步政策库时出错: {str(e)}")
+    result = start_kb_task("sync", agent.kb.sync_knowledge_base, force_rebuild_on_modified=True)
+    result["message"] = "政策库同步已开始" if result["status"] == "started" else "已有知识库任务在执行"
+    return result
+
+COMPARE_MAX_FILE_SIZE = 5 * 1024 * 1024  # 版本对比单文件大小上限（字节）
+COMPARE_MAX_LINES = 200  # 差异预览最多返回行数
+
+# 版本对比共用的文档加载器（无状态，线程池中可并发使用）
+document_loader = DocumentLoader()
+
+
+def diff_preview(text_a: str, text_b: str, name_a: str, name_b: str) -> List[str]:
+    """
+    生成差异预览（只含增删行）
+    已安装diff-match-patch（纯Python实现）时按行做Myers差分，未安装时使用difflib
+    """
+    if not DMP_AVAILABLE:
+        return list(difflib.unified_diff(
+            text_a.splitlines(), text_b.splitlines(),
+            fromfile=name_a, tofile=name_b, lineterm=""
+        ))[:COMPARE_MAX_LINES]
+    
+    dmp = diff_match_patch()
+    chars_a, chars_b, line_array = dmp.diff_linesToChars(text_a, text_b)
+    diffs = dmp.diff_main(chars_a, chars_b, False)
+    dmp.diff_charsToLines(diffs, line_array)
+    
+    lines = [f"--- {name_a}", f"+++ {name_b}"]
+    for op, text in diffs:
+        if op == 0:  # 未变化的行不返回
+            continue
+        prefix = "+" if op > 0 else "-"
+        for line in text.splitlines():
+            lines.append(prefix + line)
+            if len(lines) >= COMPARE_MAX_LINES:
+                return lines
+    return lines
+
+
+def compare_documents(file_a: str, file_b: str) -> List[str]:
+    """读取两个文档并生成差异预览（同步执行，调用方放入线程池）"""
+    for path in (file_a, file_b):
+        if os.path.isfile(path) and os.path.getsize(path) > COMPARE_MAX_FILE_SIZE:
+            raise HTTPException(status_code=400, detail=f"文件超过{COMPARE_MAX_FILE_SIZE // (1024 * 1024)}MB上限: {os.path.basename(path)}")
+    
+    # 读取文本（按路径+修改时间缓存解析结果）
+    text_a = document_loader.load_document_cached(file_a)
+    text_b = document_loader.load_document_cached(file_b)
+    if not text_a or not text_b:
+        raise HTTPException(status_code=400, detail="文件内容为空或不可读取")
+    return diff_preview(text_a, text_b, os.path.basename(file_a), os.path.basename(file_b))
+
 
 @api_router.post("/compare_policies")
 async def compare_policies(file_a: str, file_b: str):
@@ -485,18 +707,11 @@ async def compare_policies(file_a: str, file_b: str):
     版本对比：传入两个文件绝对路径或相对路径，返回简要差异
     """
     try:
-        from document_loader import DocumentLoader
-        import difflib, os
-        loader = DocumentLoader()
-        # 读取文本
-        text_a = loader.load_document(file_a)
-        text_b = loader.load_document(file_b)
-        if not text_a or not text_b:
-            raise HTTPException(status_code=400, detail="文件内容为空或不可读取")
-        diff_lines = list(difflib.unified_diff(
-            text_a.splitlines(), text_b.splitlines(),
-            fromfile=os.path.basename(file_a), tofile=os.path.basename(file_b), lineterm=""
-        ))[:200]
+        # 文档解析与差分均为CPU密集操作，放到线程池避免阻塞其他请求
+        diff_lines = await asyncio.get_running_loop().run_in_executor(
+            app.state.executor,
+            functools.partial(compare_documents, file_a, file_b)
+        )
         return {"from": file_a, "to": file_b, "diff_preview": diff_lines}
     except HTTPException:
         raise
@@ -545,6 +760,7 @@ async def kb_clear_boost(target_type: str, key: str):
 
 @api_router.get("/stream_query")
 async def stream_query(
+    request: Request,
     question: str,
     province: Optional[str] = None,
     city: Optional[str] = None,
@@ -573,43 +789,51 @@ async def stream_query(
                 }
             
             # 阶段1：发送开始信号
-            yield f"data: {json.dumps({'type': 'start', 'message': '开始处理问题...'}, ensure_ascii=False)}\n\n"
-            await asyncio.sleep(0.1)
+            yield sse_event({'type': 'start', 'message': '开始处理问题...'})
             
-            # 阶段2：意图识别
-            yield f"data: {json.dumps({'type': 'intent', 'message': '正在识别问题意图...'}, ensure_ascii=False)}\n\n"
-            await asyncio.sleep(0.2)
-            
-            # 阶段3：检索知识库
+            # 阶段2：检索并生成答案
             if user_location:
                 location_msg = f"正在检索{user_location.get('city', '')}相关政策..."
             else:
                 location_msg = '正在检索相关政策...'
-            yield f"data: {json.dumps({'type': 'retrieval', 'message': location_msg}, ensure_ascii=False)}\n\n"
-            await asyncio.sleep(0.2)
+            yield sse_event({'type': 'retrieval', 'message': location_msg})
             
-            # 阶段4：生成答案（在单独线程中执行）
-            yield f"data: {json.dumps({'type': 'generating', 'message': '正在生成答案...'}, ensure_ascii=False)}\n\n"
+            # 同步的事件生成器在共享线程池中消费，经队列桥接回事件循环，
+            # 答案片段随LLM输出到达即刻推送
+            loop = asyncio.get_running_loop()
+            events = asyncio.Queue()
+            stopped = threading.Event()  # 客户端断开后置位，生产线程在下一个事件处退出
             
-            # 在线程池中执行同步查询
-            import concurrent.futures
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                future = executor.submit(agent.query, question, True, user_location)
-                result = future.result()
+            def emit(event):
+                try:
+                    loop.call_soon_threadsafe(events.put_nowait, event)
+                except RuntimeError:  # 事件循环已关闭
+                    stopped.set()
             
-            # 逐字发送答案（模拟打字机效果）
-            answer = result["answer"]
-            chunk_size = 10  # 每次10个字符
-            for i in range(0, len(answer), chunk_size):
-                chunk = answer[i:i+chunk_size]
-                yield f"data: {json.dumps({'type': 'chunk', 'content': chunk}, ensure_ascii=False)}\n\n"
-                await asyncio.sleep(0.05)  # 模拟打字延迟
+            def produce():
+                stream = agent.query(question, True, user_location, stream=True)
+                try:
+                    for event in stream:
+                        if stopped.is_set():
+                            break
+                        emit(event)
+                except Exception as e:
+                    emit({'type': 'error', 'message': str(e)})
+                finally:
+                    stream.close()  # 关闭生成器链，释放LLM流式响应
+                    emit(None)
             
-            # 阶段5：发送完整结果
-            yield f"data: {json.dumps({'type': 'complete', 'result': result}, ensure_ascii=False)}\n\n"
+            producer = loop.run_in_executor(request.app.state.executor, produce)
+            try:
+                while (event := await events.get()) is not None:
+                    # 阶段3：答案片段 / 完整结果
+                    yield sse_event(event)
+            finally:
+                stopped.set()
+                producer.cancel()  # 尚未开始执行时直接取消；已在执行时由 stopped 通知退出
             
         except Exception as e:
-            yield f"data: {json.dumps({'type': 'error', 'message': str(e)}, ensure_ascii=False)}\n\n"
+            yield sse_event({'type': 'error', 'message': str(e)})
     
     return StreamingResponse(generate(), media_type="text/event-stream")
 
@@ -621,12 +845,23 @@ if os.path.isdir('intelli-policy/dist'):
     app.mount('/', StaticFiles(directory='intelli-policy/dist', html=True), name='frontend')
 
 if __name__ == "__main__":
+    # 生产环境建议使用 gunicorn 管理多进程:
+    #   gunicorn app:app -k uvicorn.workers.UvicornWorker -w 9 --worker-connections 2048 -b 0.0.0.0:8000
+    # worker数默认 2*CPU+1，可通过环境变量 WEB_CONCURRENCY 覆盖
+    workers = int(os.getenv("WEB_CONCURRENCY", (os.cpu_count() or 1) * 2 + 1))
+    # 日志在各worker的lifespan中配置（configure_logging），排查问题时可设置 LOG_LEVEL=DEBUG
+    
     print("启动企业级政策咨询智能体服务...")
+    print(f"worker数: {workers}, 事件循环: {'uvloop' if UVLOOP_AVAILABLE else 'asyncio'}")
     print("访问 http://localhost:8000 查看API文档")
     print("访问 http://localhost:8000/docs 查看交互式API文档")
     uvicorn.run(
-        app,
+        "app:app",  # 多worker模式需要以导入字符串形式传入
         host="0.0.0.0",
         port=8000,
-        log_level="info"
+        workers=workers,
+        loop="uvloop" if UVLOOP_AVAILABLE else "asyncio",
+        http="httptools" if HTTPTOOLS_AVAILABLE else "h11",
+        log_level="warning",
+        access_log=False
     )
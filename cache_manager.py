@@ -3,9 +3,11 @@
 """
 import hashlib
 import json
+import logging
+import threading
 import time
-from functools import lru_cache
-from typing import Dict, Any, Optional
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
 
 # 尝试导入Redis，如果不可用则使用内存缓存
 try:
@@ -15,12 +17,68 @@ except ImportError:
     REDIS_AVAILABLE = False
     print("提示: Redis未安装，将使用内存缓存")
 
+logger = logging.getLogger(__name__)
+
+# orjson（C实现）序列化缓存内容，不可用时回退到标准库json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# 语义缓存依赖numpy做向量相似度计算
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    print("提示: numpy未安装，语义缓存不可用")
+
+
+# Redis连接池按 (host, port, db) 复用，多个 CacheManager 实例共享连接
+_redis_pools = {}
+_redis_pools_lock = threading.Lock()
+
+
+def _get_redis_pool(host: str, port: int, db: int):
+    """获取（必要时创建）共享的Redis连接池"""
+    with _redis_pools_lock:
+        pool = _redis_pools.get((host, port, db))
+        if pool is None:
+            pool = redis.ConnectionPool(
+                host=host,
+                port=port,
+                db=db,
+                decode_responses=True,
+                socket_connect_timeout=5,
+                socket_keepalive=True,
+                max_connections=50
+            )
+            _redis_pools[(host, port, db)] = pool
+        return pool
+
+
+def _dumps(data: Any):
+    """序列化缓存内容（orjson输出UTF-8字节，Redis可直接写入）"""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        except TypeError:
+            pass  # 含orjson不支持的类型时交给标准库处理
+    return json.dumps(data, ensure_ascii=False)
+
+
+def _loads(data) -> Any:
+    """反序列化缓存内容"""
+    return orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
+
 
 class CacheManager:
     """缓存管理器 - 支持内存缓存和Redis缓存"""
     
     def __init__(self, redis_host: str = "localhost", redis_port: int = 6379, 
-                 redis_db: int = 0, memory_maxsize: int = 1000, enable_prewarming: bool = True):
+                 redis_db: int = 0, memory_maxsize: int = 1000, enable_prewarming: bool = True,
+                 semantic_maxsize: int = 1000):
         """
         初始化缓存管理器
         
@@ -29,20 +87,32 @@ class CacheManager:
             redis_port: Redis端口
             redis_db: Redis数据库编号
             memory_maxsize: 内存缓存最大条目数
+            semantic_maxsize: 语义缓存最大条目数
         """
         self.memory_maxsize = memory_maxsize
         
+        # 内存LRU缓存：键 -> (过期时间(monotonic), 结果)，按访问顺序排列，队首最久未用
+        self._memory_cache = OrderedDict()
+        self._memory_stats = {"hits": 0, "misses": 0}
+        self._memory_lock = threading.Lock()
+        
+        # 语义缓存：int8量化向量矩阵的行与 _semantic_keys 一一对应，
+        # 条目中保留FP32向量，仅用于候选的精确复核
+        self.semantic_maxsize = semantic_maxsize
+        self._semantic_keys = []
+        self._semantic_codes = None
+        self._semantic_scale = None
+        self._semantic_calibration_size = 1000  # 用前N个向量标定量化尺度
+        self._semantic_inserted = 0
+        self._semantic_entries = {}
+        self._semantic_stats = {"hits": 0, "misses": 0}
+        self._semantic_lock = threading.Lock()
+        
         # 初始化Redis连接（如果可用）
         if REDIS_AVAILABLE:
             try:
                 self.redis_client = redis.Redis(
-                    host=redis_host, 
-                    port=redis_port, 
-                    db=redis_db,
-                    decode_responses=True,
-                    socket_connect_timeout=5,
-                    socket_keepalive=True,
-                    max_connections=50
+                    connection_pool=_get_redis_pool(redis_host, redis_port, redis_db)
                 )
                 # 测试连接
                 self.redis_client.ping()
@@ -84,16 +154,26 @@ class CacheManager:
         Returns:
             str: 缓存键
         """
-        # 归一化查询(去除多余空格,转小写)
-        normalized_query = ' '.join(query.strip().lower().split())
+        # 无上下文时与 hash_query 一致，get/set 与 get_by_hash/set_by_hash 共享缓存条目
+        if not context:
+            return self.hash_query(query)
         
-        # 创建查询和上下文的哈希值作为缓存键
-        content = {
-            "query": normalized_query,
-            "context": context or {}
-        }
-        content_str = json.dumps(content, sort_keys=True, ensure_ascii=False)
-        return hashlib.md5(content_str.encode('utf-8')).hexdigest()
+        # 归一化查询(去除多余空格,转小写)，与排序后的上下文直接拼成字节串哈希，不经过JSON序列化
+        normalized_query = ' '.join(query.strip().lower().split())
+        parts = [normalized_query.encode('utf-8'), b'\x00']
+        for k in sorted(context):
+            v = context[k]
+            parts.append(f"{k}={'' if v is None else v}".encode('utf-8'))
+            parts.append(b'\x1f')
+        return hashlib.blake2b(b''.join(parts), digest_size=8).hexdigest()
+    
+    def hash_query(self, query: str) -> str:
+        """
+        计算归一化问题的内容哈希（定长16位十六进制），入口处计算一次后
+        可复用于答案缓存、语义缓存和文档缓存的键
+        """
+        normalized_query = ' '.join(query.strip().lower().split())
+        return hashlib.blake2b(normalized_query.encode('utf-8'), digest_size=8).hexdigest()
     
     def get(self, query: str, context: Optional[Dict] = None) -> Optional[Dict]:
         """
@@ -106,58 +186,76 @@ class CacheManager:
         Returns:
             缓存的结果，如果未命中则返回None
         """
-        key = self._generate_key(query, context)
-        
+        return self._get_by_key(self._generate_key(query, context), query[:50])
+    
+    def get_by_hash(self, key: str) -> Optional[Dict]:
+        """按预先计算的键（如 hash_query 的结果）获取缓存结果"""
+        return self._get_by_key(key, key)
+    
+    def _get_by_key(self, key: str, label: str) -> Optional[Dict]:
+        """按缓存键获取结果，label仅用于日志"""
         if self.use_redis and self.redis_client:
             try:
                 # 从Redis获取
                 cached = self.redis_client.get(f"policy_cache:{key}")
                 if cached:
-                    data = json.loads(cached)
+                    data = _loads(cached)
                     # 检查是否过期
                     if time.time() < data.get("expires_at", 0):
-                        print(f"✓ Redis缓存命中: {query[:50]}...")
+                        logger.debug("✓ Redis缓存命中: %s...", label)
                         return data["result"]
                     else:
                         # 删除过期缓存
-                        self.redis_client.delete(f"policy_cache:{key}")
+                        self.redis_client.unlink(f"policy_cache:{key}")
             except Exception as e:
-                print(f"Redis获取失败: {e}")
+                logger.warning("Redis获取失败: %s", e)
         
         # 从内存缓存获取
         memory_result = self._get_memory_cache(key)
-        if memory_result:
-            print(f"✓ 内存缓存命中: {query[:50]}...")
+        if memory_result is not None:
+            logger.debug("✓ 内存缓存命中: %s...", label)
             return memory_result
         
         return None
     
-    @lru_cache(maxsize=1000)
-    def _get_memory_cache(self, key: str) -> Optional[Dict]:
+    def _get_memory_cache(self, key: str) -> Optional[Any]:
         """
-        内存缓存获取（使用LRU装饰器）
+        内存缓存获取（LRU + TTL）
         
         Args:
             key: 缓存键
             
         Returns:
-            缓存结果
+            缓存结果，未命中或已过期返回None
         """
-        # 这个方法主要用于LRU装饰器，实际存储在下面的_set_memory_cache中
-        return None
+        with self._memory_lock:
+            item = self._memory_cache.get(key)
+            if item is None:
+                self._memory_stats["misses"] += 1
+                return None
+            expires_at, result = item
+            if expires_at < time.monotonic():
+                del self._memory_cache[key]
+                self._memory_stats["misses"] += 1
+                return None
+            self._memory_cache.move_to_end(key)
+            self._memory_stats["hits"] += 1
+            return result
     
-    def _set_memory_cache(self, key: str, result: Dict, ttl: int = 3600):
+    def _set_memory_cache(self, key: str, result: Any, ttl: int = 3600):
         """
-        设置内存缓存
+        设置内存缓存，超出容量时淘汰最久未使用的条目
         
         Args:
             key: 缓存键
             result: 缓存结果
             ttl: 过期时间（秒）
         """
-        # 由于lru_cache的限制，我们使用一个简单的字典来存储
-        # 在实际应用中，可以使用更复杂的内存缓存实现
-        pass
+        with self._memory_lock:
+            self._memory_cache[key] = (time.monotonic() + ttl, result)
+            self._memory_cache.move_to_end(key)
+            while len(self._memory_cache) > self.memory_maxsize:
+                self._memory_cache.popitem(last=False)
     
     def set(self, query: str, result: Dict, context: Optional[Dict] = None, 
             ttl: int = 3600):
@@ -170,7 +268,15 @@ class CacheManager:
             context: 上下文信息
             ttl: 过期时间（秒），默认1小时
         """
-        key = self._generate_key(query, context)
+        self._set_by_key(self._generate_key(query, context), result, ttl, query[:50])
+    
+    def set_by_hash(self, key: str, result: Any, ttl: int = 3600):
+        """按预先计算的键（如 hash_query 的结果）设置缓存结果"""
+        self._set_by_key(key, result, ttl, key)
+    
+    def _set_by_key(self, key: str, result: Any, ttl: int, label: str):
+        """按缓存键写入结果，label仅用于日志"""
+        # Redis条目在多进程间共享，过期时间需使用墙上时间；进程内缓存使用单调时钟
         expires_at = time.time() + ttl
         cached_data = {
             "result": result,
@@ -184,33 +290,186 @@ class CacheManager:
                 self.redis_client.setex(
                     f"policy_cache:{key}",
                     ttl,
-                    json.dumps(cached_data, ensure_ascii=False)
+                    _dumps(cached_data)
                 )
-                print(f"✓ 结果已缓存到Redis: {query[:50]}...")
+                logger.debug("✓ 结果已缓存到Redis: %s...", label)
                 return
             except Exception as e:
-                print(f"Redis设置失败: {e}")
+                logger.warning("Redis设置失败: %s", e)
         
         # 存储到内存缓存
-        # 注意：由于Python的lru_cache限制，这里我们简化处理
-        # 在生产环境中建议使用更完善的内存缓存方案
-        self._get_memory_cache.cache_clear()  # 清理过期缓存的简单方法
-        print(f"✓ 结果已缓存到内存: {query[:50]}...")
+        self._set_memory_cache(key, result, ttl)
+        logger.debug("✓ 结果已缓存到内存: %s...", label)
+    
+    def semantic_get(self, query: str, embedding: Optional[List[float]],
+                     threshold: float = 0.92, intent: Optional[str] = None) -> Optional[Dict]:
+        """
+        语义缓存查询：与已缓存问题向量做余弦相似度检索，超过阈值即命中
+        
+        Args:
+            query: 查询内容（仅用于日志）
+            embedding: 查询向量（由调用方计算一次后复用）
+            threshold: 余弦相似度阈值
+            intent: 问题的意图类型，提供时只命中写入时意图相同的条目
+            
+        Returns:
+            命中的缓存结果，未命中返回None
+        """
+        vec = self._normalize_vector(embedding)
+        if vec is None:
+            return None
+        
+        with self._semantic_lock:
+            if self._semantic_codes is None or self._semantic_codes.shape[1] != vec.shape[0]:
+                self._semantic_stats["misses"] += 1
+                return None
+            
+            # 先在int8量化矩阵上粗排，再用FP32向量对少量候选精确复核
+            approx = self._semantic_codes @ vec
+            k = min(4, approx.shape[0])
+            candidates = np.argpartition(-approx, k - 1)[:k]
+            idx, similarity = -1, -1.0
+            for cand in candidates:
+                candidate = self._semantic_entries[self._semantic_keys[cand]]
+                if intent is not None and candidate["intent"] != intent:
+                    continue
+                exact = float(candidate["vector"] @ vec)
+                if exact > similarity:
+                    idx, similarity = int(cand), exact
+            if idx < 0:
+                self._semantic_stats["misses"] += 1
+                return None
+            entry = self._semantic_entries[self._semantic_keys[idx]]
+            
+            if time.monotonic() >= entry["expires_at"]:
+                self._semantic_remove(idx)
+                self._semantic_stats["misses"] += 1
+                return None
+            if similarity < threshold:
+                self._semantic_stats["misses"] += 1
+                return None
+            
+            self._semantic_stats["hits"] += 1
+        
+        logger.debug("✓ 语义缓存命中 (相似度: %.3f): %s...", similarity, query[:50])
+        return entry["result"]
+    
+    def semantic_set(self, query: str, embedding: Optional[List[float]], result: Dict,
+                     ttl: int = 3600, key: Optional[str] = None, intent: Optional[str] = None):
+        """
+        写入语义缓存
+        
+        Args:
+            query: 查询内容
+            embedding: 查询向量
+            result: 查询结果
+            ttl: 过期时间（秒），默认1小时
+            key: 预先计算的条目键（如 hash_query 的结果），缺省时按query生成
+            intent: 问题的意图类型，查询时按此过滤
+        """
+        vec = self._normalize_vector(embedding)
+        if vec is None:
+            return
+        
+        key = key or self._generate_key(query)
+        with self._semantic_lock:
+            # 向量维度变化（知识库重建后向量模型重新训练）时整体失效
+            if self._semantic_codes is not None and self._semantic_codes.shape[1] != vec.shape[0]:
+                self._semantic_reset()
+            
+            self._semantic_entries[key] = {
+                "query": query,
+                "result": result,
+                "vector": vec,
+                "expires_at": time.monotonic() + ttl,
+                "intent": intent
+            }
+            
+            if self._semantic_calibrate(vec):
+                # 尺度变化后按FP32向量重新量化已有条目（仅发生在标定阶段）
+                self._semantic_codes = np.stack([
+                    self._quantize(self._semantic_entries[k]["vector"]) for k in self._semantic_keys
+                ]) if self._semantic_keys else None
+            
+            row = self._quantize(vec).reshape(1, -1)
+            if key in self._semantic_keys:
+                self._semantic_codes[self._semantic_keys.index(key)] = row[0]
+            else:
+                if len(self._semantic_keys) >= self.semantic_maxsize:
+                    self._semantic_remove(0)  # 淘汰最早写入的条目
+                self._semantic_keys.append(key)
+                self._semantic_codes = row if self._semantic_codes is None else np.vstack([self._semantic_codes, row])
+    
+    def semantic_clear(self):
+        """清空语义缓存"""
+        with self._semantic_lock:
+            self._semantic_reset()
+    
+    def _normalize_vector(self, embedding: Optional[List[float]]):
+        """L2归一化，零向量（无有效词）返回None"""
+        if not NUMPY_AVAILABLE or embedding is None:
+            return None
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vec))
+        if norm == 0.0:
+            return None
+        return vec / norm
+    
+    def _semantic_calibrate(self, vec) -> bool:
+        """用前N个向量的最大绝对分量标定int8量化尺度，返回尺度是否发生变化"""
+        if self._semantic_inserted >= self._semantic_calibration_size:
+            return False
+        self._semantic_inserted += 1
+        peak = float(np.max(np.abs(vec)))
+        if self._semantic_scale is None or peak * self._semantic_scale > 127:
+            self._semantic_scale = 127.0 / peak
+            return True
+        return False
+    
+    def _quantize(self, vec):
+        """FP32向量对称量化为int8（超出标定范围的分量截断）"""
+        return np.clip(np.rint(vec * self._semantic_scale), -127, 127).astype(np.int8)
+    
+    def _semantic_remove(self, idx: int):
+        """删除第idx个语义缓存条目（调用方持有锁）"""
+        key = self._semantic_keys.pop(idx)
+        self._semantic_entries.pop(key, None)
+        if self._semantic_keys:
+            self._semantic_codes = np.delete(self._semantic_codes, idx, axis=0)
+        else:
+            self._semantic_codes = None
+    
+    def _semantic_reset(self):
+        """重置语义缓存（调用方持有锁）"""
+        self._semantic_keys = []
+        self._semantic_codes = None
+        self._semantic_entries = {}
+        self._semantic_scale = None
+        self._semantic_inserted = 0
     
     def clear(self):
         """清空所有缓存"""
         if self.use_redis and self.redis_client:
             try:
-                # 删除所有policy_cache前缀的键
-                keys = self.redis_client.keys("policy_cache:*")
-                if keys:
-                    self.redis_client.delete(*keys)
+                # 删除所有policy_cache前缀的键：SCAN分批遍历，管道批量UNLINK，不阻塞Redis
+                batch = []
+                pipe = self.redis_client.pipeline(transaction=False)
+                for key in self.redis_client.scan_iter(match="policy_cache:*", count=500):
+                    batch.append(key)
+                    if len(batch) >= 500:
+                        pipe.unlink(*batch)
+                        batch = []
+                if batch:
+                    pipe.unlink(*batch)
+                pipe.execute()
                 print("✓ Redis缓存已清空")
             except Exception as e:
                 print(f"Redis清空失败: {e}")
         
         # 清空内存缓存
-        self._get_memory_cache.cache_clear()
+        with self._memory_lock:
+            self._memory_cache.clear()
+        self.semantic_clear()
         print("✓ 内存缓存已清空")
     
     def stats(self) -> Dict[str, Any]:
@@ -222,7 +481,17 @@ class CacheManager:
         """
         stats = {
             "use_redis": self.use_redis,
-            "memory_cache_info": str(self._get_memory_cache.cache_info())
+            "memory_cache": {
+                "size": len(self._memory_cache),
+                "maxsize": self.memory_maxsize,
+                "hits": self._memory_stats["hits"],
+                "misses": self._memory_stats["misses"]
+            },
+            "semantic_cache": {
+                "size": len(self._semantic_keys),
+                "hits": self._semantic_stats["hits"],
+                "misses": self._semantic_stats["misses"]
+            }
         }
         
         if self.use_redis and self.redis_client:
@@ -230,7 +499,7 @@ class CacheManager:
                 stats["redis_info"] = {
                     "connected": True,
                     "db_size": self.redis_client.dbsize(),
-                    "cache_keys": len(self.redis_client.keys("policy_cache:*"))
+                    "cache_keys": sum(1 for _ in self.redis_client.scan_iter(match="policy_cache:*", count=500))
                 }
             except Exception as e:
                 stats["redis_info"] = {"error": str(e)}
@@ -24,6 +24,7 @@ DOCS_DIR = "./市级消费活动政策"  # 文档目录
 TEXT_KB_DIR = "./knowledge_base/text_kb"  # 文本知识库
 TABLE_KB_DIR = "./knowledge_base/table_kb"  # 表格知识库
 METADATA_KB_DIR = "./knowledge_base/metadata_kb"  # 元数据知识库
+DATA_QUERY_INDEX_FILE = "./knowledge_base/metadata_kb/data_query_index.json"  # 数据查询索引的政策来源（补贴大类 -> 文件名），答案由补贴规则表生成
 CHROMA_DB_DIR = "./chroma_db"  # 向量数据库存储路径
 CHUNK_SIZE = 500  # 文档切片大小
 CHUNK_OVERLAP = 100  # 切片重叠
@@ -32,6 +33,16 @@ CHUNK_OVERLAP = 100  # 切片重叠
 TOP_K = 10  # 初次检索数量(从15降低到10)
 RERANK_TOP_K = 5  # 重排序后保留数量(从10降低到5)
 SIMILARITY_THRESHOLD = 0.6  # 相似度阈值(从0.5提高到0.6)
+# 文本块数量达到阈值后改用HNSW图索引（亚线性检索），小知识库仍用精确的扁平索引
+FAISS_HNSW_MIN_CHUNKS = 5000
+FAISS_HNSW_M = 32  # 每个节点的邻居数
+FAISS_HNSW_EF_CONSTRUCTION = 200  # 建图时的候选列表长度
+FAISS_HNSW_EF_SEARCH = 64  # 检索时的候选列表长度（越大召回越高、越慢）
+
+# ========== 语义缓存配置 ==========
+ENABLE_SEMANTIC_CACHE = True  # 近似问题直接复用缓存答案
+SEMANTIC_CACHE_THRESHOLD = 0.92  # 余弦相似度阈值
+SEMANTIC_CACHE_INTENTS = ["POLICY_QA"]  # 计算/推荐依赖具体金额，不走语义缓存
 
 # ========== 双层意图识别配置 ==========
 # 意图识别-1: 基础相关性判定
@@ -46,6 +57,14 @@ INTENT_TYPES = {
     "CALCULATION": "补贴计算"  # 精确数值计算
 }
 
+# 关键词无法判定时，用一次LLM调用同时完成相关性判定、任务路由和实体抽取
+FUSED_PREPROCESSING = True
+FUSED_MIN_CONFIDENCE = 0.6  # 低于该置信度时回退到独立的LLM路由
+
+# LLM相关性判定/任务路由结果缓存：相同问题直接复用，近似问题按余弦相似度复用
+INTENT_CACHE_SIZE = 4096  # 每类判定最多缓存的问题数
+INTENT_CACHE_THRESHOLD = 0.92  # 余弦相似度阈值
+
 # ========== 工具链配置 ==========
 ENABLE_CALCULATOR = True  # 启用精确计算工具
 ENABLE_RECOMMENDER = True  # 启用智能推荐
@@ -62,6 +81,10 @@ OUTPUT_FORMAT = {
 # ========== Reranker配置 ==========
 USE_RERANKER = True  # 启用重排序
 RERANKER_MODEL = "cross-encoder"  # 重排序模型类型
+RERANKER_DEVICE = "auto"  # 推理设备: auto(有GPU时用cuda)/cuda/cpu
+RERANKER_FP16 = True  # GPU上以FP16推理
+RERANKER_QUANTIZED = False  # CPU上对线性层做动态INT8量化
+RERANKER_BATCH_SIZE = 32  # 交叉编码器推理批大小
 
 # ========== 拒绝机制配置 ==========
 REJECTION_KEYWORDS = [
@@ -103,6 +126,7 @@ AGENTS = {
 
 # ========== 监控配置 ==========
 ENABLE_MONITORING = True
+VERBOSE_LOGGING = True  # 输出查询各步骤的过程日志（生产环境可关闭）
 LOG_DIR = "./logs"
 ALERT_THRESHOLD = {
     "error_rate": 0.05,  # 错误率阈值
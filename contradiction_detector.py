@@ -1,23 +1,92 @@
 """
 政策矛盾检测模块 - 检测多个政策之间的冲突和矛盾
 """
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 import re
 from datetime import datetime
+import numpy as np
+
+# 可选：Aho-Corasick自动机做互斥/叠加表述扫描，不可用时回退到预编译正则
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# 可选：Numba编译补贴比例冲突内核，不可用时回退到NumPy广播
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+# 互斥表述（禁止叠加）与叠加表述（允许叠加）
+EXCLUSIVE_WORDS = ["仅限", "只能", "不得同时"]
+INCLUSIVE_WORDS = ["可以同时", "允许叠加"]
+
+# 冲突信号标记：文本不含其中任何一个时不可能参与任何冲突，跳过要素提取
+CONFLICT_MARKERS = ("%", "元", "废止", "失效") + tuple(EXCLUSIVE_WORDS) + tuple(INCLUSIVE_WORDS)
+
+# 能效等级：中文数字 -> 整数等级（1~5），整数等级-1即补贴比例矩阵的列下标
+_LEVEL_MAP = {"一": 1, "二": 2, "三": 3, "四": 4, "五": 5}
+ENERGY_LEVELS = ["一级", "二级", "三级", "四级", "五级"]  # 按整数等级排列，用于展示
+
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, cache=True)
+    def _rate_conflicts(rates):
+        """rates 为 (政策数, 能效等级数) 的补贴比例矩阵（缺失为-1），返回上三角冲突矩阵"""
+        n, levels = rates.shape
+        out = np.zeros((n, n), dtype=np.bool_)
+        for i in prange(n):
+            for j in range(i + 1, n):
+                for k in range(levels):
+                    r1 = rates[i, k]
+                    r2 = rates[j, k]
+                    if r1 >= 0 and r2 >= 0 and r1 != r2:
+                        out[i, j] = True
+                        break
+        return out
+else:
+    def _rate_conflicts(rates):
+        """rates 为 (政策数, 能效等级数) 的补贴比例矩阵（缺失为-1），返回冲突矩阵"""
+        present = rates >= 0
+        return (
+            present[:, None, :] & present[None, :, :] & (rates[:, None, :] != rates[None, :, :])
+        ).any(axis=2)
 
 
 class ContradictionDetector:
     """政策矛盾检测器"""
     
     def __init__(self):
-        # 关键政策要素提取模式
-        self.patterns = {
+        # 关键政策要素提取模式（初始化时预编译，两两比较时直接复用）
+        patterns = {
             "subsidy_rate": r'(\d+)%',  # 补贴比例
             "max_amount": r'最高(?:不超过)?(\d+)元',  # 最高金额
             "energy_level": r'([一二三四五]级)能效',  # 能效等级
             "date_range": r'(\d{4})年(\d{1,2})月(\d{1,2})日',  # 日期
             "product_type": r'(家电|汽车|电动车|手机|电脑|空调|冰箱|洗衣机)',  # 产品类型
         }
+        self.patterns = {name: re.compile(pattern) for name, pattern in patterns.items()}
+        # "XX级能效 XX%"模式
+        self._rate_re = re.compile(r'([一二三四五])级能效.*?(\d+)%')
+        
+        # 互斥/叠加表述合并为一个多模式匹配器，单次扫描同时判断两类表述
+        if AHOCORASICK_AVAILABLE:
+            self._excl_ac = ahocorasick.Automaton()
+            for word in EXCLUSIVE_WORDS:
+                self._excl_ac.add_word(word, "EX")
+            for word in INCLUSIVE_WORDS:
+                self._excl_ac.add_word(word, "IN")
+            self._excl_ac.make_automaton()
+        else:
+            self._excl_ac = None
+            self._excl_re = re.compile(
+                f"(?P<EX>{'|'.join(map(re.escape, EXCLUSIVE_WORDS))})"
+                f"|(?P<IN>{'|'.join(map(re.escape, INCLUSIVE_WORDS))})"
+            )
     
     def detect(self, policies: List[Dict]) -> Dict:
         """
@@ -41,20 +110,25 @@ class ContradictionDetector:
                 "consistency_score": 0-1
             }
         """
+        # 每个政策只提取一次要素（O(N)次正则扫描），两两比较只做矩阵运算
+        features = [self._extract_features(policy) for policy in policies]
         contradictions = []
-        
-        # 两两比较政策
-        for i in range(len(policies)):
-            for j in range(i + 1, len(policies)):
-                conflicts = self._compare_policies(policies[i], policies[j])
-                contradictions.extend(conflicts)
+        self._find_conflicts(policies, features, contradictions)
         
         # 计算一致性分数
         consistency_score = 1.0
         if contradictions:
-            high_severity = sum(1 for c in contradictions if c["severity"] == "HIGH")
-            medium_severity = sum(1 for c in contradictions if c["severity"] == "MEDIUM")
-            consistency_score = max(0, 1.0 - (high_severity * 0.3 + medium_severity * 0.15))
+            # 单次遍历统计各严重程度的数量
+            high_severity = medium_severity = 0
+            for c in contradictions:
+                severity = c["severity"]
+                if severity == "HIGH":
+                    high_severity += 1
+                elif severity == "MEDIUM":
+                    medium_severity += 1
+            consistency_score = 1.0 - (high_severity * 0.3 + medium_severity * 0.15)
+            if consistency_score < 0.0:
+                consistency_score = 0.0
         
         return {
             "has_contradiction": len(contradictions) > 0,
@@ -63,57 +137,127 @@ class ContradictionDetector:
             "total_policies": len(policies)
         }
     
-    def _compare_policies(self, policy1: Dict, policy2: Dict) -> List[Dict]:
-        """比较两个政策"""
-        conflicts = []
-        
-        text1 = policy1.get("content", "")
-        text2 = policy2.get("content", "")
-        
-        # 1. 检查补贴比例矛盾
-        rates1 = self._extract_subsidy_rates(text1)
-        rates2 = self._extract_subsidy_rates(text2)
-        
-        if rates1 and rates2:
-            # 相同产品不同补贴率
-            conflict = self._check_rate_contradiction(rates1, rates2, policy1, policy2)
-            if conflict:
-                conflicts.append(conflict)
-        
-        # 2. 检查金额上限矛盾
-        max1 = self._extract_max_amount(text1)
-        max2 = self._extract_max_amount(text2)
-        
-        if max1 and max2 and abs(max1 - max2) > 500:  # 差异超过500元
-            conflicts.append({
-                "type": "金额上限不一致",
-                "policy1": policy1,
-                "policy2": policy2,
-                "detail": f"政策1规定最高{max1}元，政策2规定最高{max2}元",
-                "severity": "MEDIUM"
-            })
-        
-        # 3. 检查时间冲突
-        time_conflict = self._check_time_conflict(text1, text2, policy1, policy2)
-        if time_conflict:
-            conflicts.append(time_conflict)
-        
-        # 4. 检查互斥条件
-        exclusive_conflict = self._check_exclusive_conditions(text1, text2, policy1, policy2)
-        if exclusive_conflict:
-            conflicts.append(exclusive_conflict)
+    def _extract_features(self, policy: Dict) -> Dict:
+        """提取单个政策中用于两两比较的要素"""
+        text = policy.get("content", "")
+        if not any(marker in text for marker in CONFLICT_MARKERS):
+            return {
+                "rates": {},
+                "max_amount": None,
+                "is_repealed": False,
+                "has_exclusive": False,
+                "has_inclusive": False,
+                "source": policy.get("source")
+            }
+        has_exclusive, has_inclusive = self._scan_exclusive_words(text)
+        return {
+            "rates": dict(self._extract_subsidy_rates(text)),  # 整数能效等级 -> 补贴比例
+            "max_amount": self._extract_max_amount(text),
+            "is_repealed": "废止" in text or "失效" in text,
+            "has_exclusive": has_exclusive,
+            "has_inclusive": has_inclusive,
+            "source": policy.get("source")
+        }
+    
+    def _feature_arrays(self, features: List[Dict]) -> Dict[str, np.ndarray]:
+        """将各政策要素按字段排列为数组（结构体数组 -> 数组结构体），便于向量化比较"""
+        n = len(features)
+        # 补贴比例为百分数，int16足够（缺失记为-1，异常大值截断到int16上限）
+        rate_cap = np.iinfo(np.int16).max
+        rates = np.full((n, len(ENERGY_LEVELS)), -1, dtype=np.int16)
+        for i, f in enumerate(features):
+            for level, rate in f["rates"].items():
+                rates[i, level - 1] = min(rate, rate_cap)
+        source_ids = {}
+        return {
+            "rates": rates,
+            "max_amount": np.fromiter((f["max_amount"] or 0 for f in features), dtype=np.int64, count=n),
+            "is_repealed": np.fromiter((f["is_repealed"] for f in features), dtype=bool, count=n),
+            "has_exclusive": np.fromiter((f["has_exclusive"] for f in features), dtype=bool, count=n),
+            "has_inclusive": np.fromiter((f["has_inclusive"] for f in features), dtype=bool, count=n),
+            "source_id": np.fromiter(
+                (source_ids.setdefault(f["source"], len(source_ids)) for f in features), dtype=np.int32, count=n
+            )
+        }
+    
+    def _conflict_masks(self, arrays: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        计算四类冲突的政策对掩码，返回形状为 (4, N, N) 的上三角布尔数组，
+        依次为：补贴比例、金额上限、政策时效、互斥条件
+        """
+        amounts = arrays["max_amount"]
+        has_amount = amounts > 0
+        source_id = arrays["source_id"]
+        masks = np.stack([
+            # 1. 补贴比例：同一能效等级两边都有且数值不同
+            _rate_conflicts(arrays["rates"]),
+            # 2. 金额上限：两边都有且差异超过500元
+            (np.abs(amounts[:, None] - amounts[None, :]) > 500) & np.outer(has_amount, has_amount),
+            # 3. 政策时效：政策1已废止/失效且与政策2同一来源
+            arrays["is_repealed"][:, None] & np.equal.outer(source_id, source_id),
+            # 4. 互斥条件：政策1禁止叠加且政策2允许叠加
+            np.outer(arrays["has_exclusive"], arrays["has_inclusive"]),
+        ])
+        return np.triu(masks, k=1)
+    
+    def _find_conflicts(self, policies: List[Dict], features: List[Dict], out: List[Dict]):
+        """
+        按政策对顺序（行优先，与逐对比较一致）将冲突直接追加到 out，只遍历存在冲突的政策对
+        """
+        if len(policies) < 2:
+            return
+        masks = self._conflict_masks(self._feature_arrays(features))
+        amounts = [f["max_amount"] for f in features]
+        append = out.append
         
+        for i, j in np.argwhere(masks.any(axis=0)):
+            policy1, policy2 = policies[i], policies[j]
+            if masks[0, i, j]:
+                append(self._check_rate_contradiction(
+                    features[i]["rates"], features[j]["rates"], policy1, policy2
+                ))
+            if masks[1, i, j]:
+                append(self._make_conflict(
+                    "金额上限不一致", policy1, policy2,
+                    f"政策1规定最高{amounts[i]}元，政策2规定最高{amounts[j]}元", "MEDIUM"
+                ))
+            if masks[2, i, j]:
+                append(self._make_conflict(
+                    "政策时效冲突", policy1, policy2, "存在已废止政策与现行政策同时出现", "HIGH"
+                ))
+            if masks[3, i, j]:
+                append(self._make_conflict(
+                    "权益叠加规则冲突", policy1, policy2, "一个政策禁止叠加，另一个政策允许叠加", "MEDIUM"
+                ))
+    
+    def _compare_policies(self, policy1: Dict, policy2: Dict,
+                          features1: Optional[Dict] = None, features2: Optional[Dict] = None) -> List[Dict]:
+        """比较两个政策（features1/features2 为预先提取的要素，缺省时现场提取）"""
+        conflicts = []
+        self._find_conflicts(
+            [policy1, policy2],
+            [features1 or self._extract_features(policy1), features2 or self._extract_features(policy2)],
+            conflicts
+        )
         return conflicts
     
-    def _extract_subsidy_rates(self, text: str) -> List[Tuple[str, int]]:
-        """提取补贴比例"""
+    @staticmethod
+    def _make_conflict(conflict_type: str, policy1: Dict, policy2: Dict, detail: str, severity: str) -> Dict:
+        """构造冲突记录"""
+        return {
+            "type": conflict_type,
+            "policy1": policy1,
+            "policy2": policy2,
+            "detail": detail,
+            "severity": severity
+        }
+    
+    def _extract_subsidy_rates(self, text: str) -> List[Tuple[int, int]]:
+        """提取补贴比例，返回 (整数能效等级, 补贴比例) 列表"""
         results = []
         
-        # 查找 "XX级能效 XX%"模式
-        pattern = r'([一二三四五]级)能效.*?(\d+)%'
-        matches = re.finditer(pattern, text)
-        for match in matches:
-            level = match.group(1)
+        for match in self._rate_re.finditer(text):
+            level = _LEVEL_MAP[match.group(1)]
             rate = int(match.group(2))
             results.append((level, rate))
         
@@ -121,62 +265,38 @@ class ContradictionDetector:
     
     def _extract_max_amount(self, text: str) -> int:
         """提取最高金额"""
-        match = re.search(self.patterns["max_amount"], text)
+        match = self.patterns["max_amount"].search(text)
         if match:
             return int(match.group(1))
         return None
     
-    def _check_rate_contradiction(self, rates1, rates2, policy1, policy2) -> Dict:
-        """检查补贴率矛盾"""
-        # 找出相同能效等级的不同补贴率
-        rates1_dict = dict(rates1)
-        rates2_dict = dict(rates2)
-        
-        for level in rates1_dict:
-            if level in rates2_dict:
-                rate1 = rates1_dict[level]
-                rate2 = rates2_dict[level]
-                if rate1 != rate2:
-                    return {
-                        "type": "补贴比例冲突",
-                        "policy1": policy1,
-                        "policy2": policy2,
-                        "detail": f"{level}能效: 政策1为{rate1}%，政策2为{rate2}%",
-                        "severity": "HIGH"
-                    }
-        return None
-    
-    def _check_time_conflict(self, text1, text2, policy1, policy2) -> Dict:
-        """检查时间冲突"""
-        # 检查是否有"废止"、"失效"等关键词
-        if ("废止" in text1 or "失效" in text1) and policy1.get("source") == policy2.get("source"):
-            return {
-                "type": "政策时效冲突",
-                "policy1": policy1,
-                "policy2": policy2,
-                "detail": "存在已废止政策与现行政策同时出现",
-                "severity": "HIGH"
-            }
+    def _check_rate_contradiction(self, rates1: Dict, rates2: Dict, policy1, policy2) -> Dict:
+        """检查补贴率矛盾（rates 为 整数能效等级 -> 补贴比例）"""
+        # 找出相同能效等级的不同补贴率（按政策1中的出现顺序，报告第一处冲突）
+        for level, rate1 in rates1.items():
+            rate2 = rates2.get(level)
+            if rate2 is not None and rate1 != rate2:
+                return self._make_conflict(
+                    "补贴比例冲突", policy1, policy2,
+                    f"{ENERGY_LEVELS[level - 1]}能效: 政策1为{rate1}%，政策2为{rate2}%", "HIGH"
+                )
         return None
     
-    def _check_exclusive_conditions(self, text1, text2, policy1, policy2) -> Dict:
-        """检查互斥条件"""
-        # 检查是否有"仅限"、"只能"等互斥表述
-        exclusive_words1 = ["仅限", "只能", "不得同时"]
-        exclusive_words2 = ["可以同时", "允许叠加"]
-        
-        has_exclusive1 = any(word in text1 for word in exclusive_words1)
-        has_inclusive2 = any(word in text2 for word in exclusive_words2)
-        
-        if has_exclusive1 and has_inclusive2:
-            return {
-                "type": "权益叠加规则冲突",
-                "policy1": policy1,
-                "policy2": policy2,
-                "detail": "一个政策禁止叠加，另一个政策允许叠加",
-                "severity": "MEDIUM"
-            }
-        return None
+    def _scan_exclusive_words(self, text: str) -> Tuple[bool, bool]:
+        """单次扫描文本，返回 (是否含互斥表述, 是否含叠加表述)"""
+        found_ex = found_in = False
+        if self._excl_ac is not None:
+            matches = (tag for _, tag in self._excl_ac.iter(text))
+        else:
+            matches = (m.lastgroup for m in self._excl_re.finditer(text))
+        for tag in matches:
+            if tag == "EX":
+                found_ex = True
+            else:
+                found_in = True
+            if found_ex and found_in:
+                break
+        return found_ex, found_in
     
     def generate_resolution_advice(self, contradiction: Dict) -> str:
         """生成解决建议"""
@@ -2,8 +2,14 @@
 新增功能演示 - 实际使用案例
 """
 from agent import PolicyAgent
+import argparse
 import time
 
+parser = argparse.ArgumentParser(description="新增功能演示")
+parser.add_argument("--throttle", type=float, default=0.0,
+                    help="两次查询之间的间隔秒数（上游API限流时使用，默认不等待）")
+args = parser.parse_args()
+
 print("=" * 80)
 print("新增功能实际演示")
 print("=" * 80)
@@ -72,7 +78,8 @@ for i, case in enumerate(test_cases, 1):
     
     print(f"\n{'=' * 80}\n")
     
-    time.sleep(1)  # 避免请求过快
+    if args.throttle > 0:
+        time.sleep(args.throttle)  # 避免请求过快
 
 # 查看监控统计
 print("\n" + "=" * 80)
@@ -2,7 +2,10 @@
 文档处理模块 - 解析PDF和DOCX文件
 """
 import os
-from typing import List
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List
 import fitz  # PyMuPDF
 from docx import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
@@ -10,6 +13,15 @@ from langchain.schema import Document as LangchainDocument
 import config
 
 
+# 批量加载文档时的最大并行线程数
+LOAD_MAX_WORKERS = min(8, (os.cpu_count() or 1) * 2)
+
+# 解析结果缓存：(绝对路径, 修改时间ns, 文件大小) -> 文本，文件变化后键自然失效
+DOC_CACHE_MAX = 64
+_doc_cache: "OrderedDict[tuple, str]" = OrderedDict()
+_doc_cache_lock = threading.Lock()
+
+
 class DocumentLoader:
     """文档加载器"""
     
@@ -20,15 +32,17 @@ class DocumentLoader:
             separators=["\n\n", "\n", "。", "！", "？", "；", ".", "!", "?", ";", " ", ""]
         )
     
+    def load_pdf_pages(self, file_path: str) -> Iterator[str]:
+        """逐页读取PDF文本，读完一页即释放该页对象"""
+        with fitz.open(file_path) as doc:
+            for page in doc:
+                yield page.get_text()
+    
     def load_pdf(self, file_path: str) -> str:
         """加载PDF文件"""
         try:
-            doc = fitz.open(file_path)
-            text = ""
-            for page in doc:
-                text += page.get_text()
-            doc.close()
-            return text
+            # 逐页收集后一次拼接，避免大文件逐页 += 的二次方拷贝
+            return "".join(self.load_pdf_pages(file_path))
         except Exception as e:
             print(f"加载PDF文件失败 {file_path}: {e}")
             return ""
@@ -54,33 +68,68 @@ class DocumentLoader:
             print(f"不支持的文件类型: {ext}")
             return ""
     
+    def load_document_cached(self, file_path: str) -> str:
+        """加载文档并缓存解析结果，文件未修改时直接复用（LRU，最多 DOC_CACHE_MAX 个）"""
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return self.load_document(file_path)
+        key = (os.path.abspath(file_path), st.st_mtime_ns, st.st_size)
+        
+        with _doc_cache_lock:
+            text = _doc_cache.get(key)
+            if text is not None:
+                _doc_cache.move_to_end(key)
+                return text
+        
+        text = self.load_document(file_path)
+        if text:
+            with _doc_cache_lock:
+                _doc_cache[key] = text
+                _doc_cache.move_to_end(key)
+                while len(_doc_cache) > DOC_CACHE_MAX:
+                    _doc_cache.popitem(last=False)
+        return text
+    
     def load_all_documents(self, root_dir: str) -> List[LangchainDocument]:
         """递归加载目录下所有文档"""
-        documents = []
+        file_paths = [
+            os.path.join(root, file)
+            for root, dirs, files in os.walk(root_dir)
+            for file in files
+            if file.endswith((".pdf", ".docx"))
+        ]
         
-        for root, dirs, files in os.walk(root_dir):
-            for file in files:
-                if file.endswith((".pdf", ".docx")):
-                    file_path = os.path.join(root, file)
-                    print(f"正在加载: {file_path}")
-                    
-                    text = self.load_document(file_path)
-                    if text.strip():
-                        # 创建文档对象，保存元数据
-                        doc = LangchainDocument(
-                            page_content=text,
-                            metadata={
-                                "source": file,
-                                "file_path": file_path
-                            }
-                        )
-                        documents.append(doc)
+        # 各文件相互独立，多线程并行解析；map保持原有文件顺序
+        max_workers = min(LOAD_MAX_WORKERS, len(file_paths)) or 1
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="doc-load") as executor:
+            texts = list(executor.map(self._load_one, file_paths))
+        
+        documents = []
+        for file_path, text in zip(file_paths, texts):
+            if text.strip():
+                # 创建文档对象，保存元数据
+                doc = LangchainDocument(
+                    page_content=text,
+                    metadata={
+                        "source": os.path.basename(file_path),
+                        "file_path": file_path
+                    }
+                )
+                documents.append(doc)
         
         return documents
     
+    def _load_one(self, file_path: str) -> str:
+        """加载单个文件（在线程池中执行）"""
+        print(f"正在加载: {file_path}")
+        return self.load_document(file_path)
+    
     def split_documents(self, documents: List[LangchainDocument]) -> List[LangchainDocument]:
-        """将文档切分成小块"""
-        return self.text_splitter.split_documents(documents)
+        """将文档切分成小块（全部文本一次性交给切分器批量处理）"""
+        texts = [doc.page_content for doc in documents]
+        metadatas = [doc.metadata for doc in documents]
+        return self.text_splitter.create_documents(texts, metadatas=metadatas)
 
 
 if __name__ == "__main__":
@@ -3,9 +3,15 @@
 整合情感识别、紧急程度、用户画像的智能系统
 """
 from typing import Dict, Optional
+from collections import Counter
+import functools
 import re
 
 
+# 情感识别结果缓存的最大条目数（同一问题重复提交时直接复用）
+EMOTION_CACHE_SIZE = 4096
+
+
 class EmotionIntelligence:
     """情感智能系统"""
     
@@ -20,6 +26,18 @@ class EmotionIntelligence:
             "frustrated": ["烦", "麻烦", "复杂", "难办"],  # 受挫
         }
         
+        # 所有情感关键词合并为一个正则，每类情感一个命名分组，单次扫描完成匹配
+        # 使用零宽先行断言，使"麻烦"和"烦"、"不满"和"满意"这类重叠关键词都能命中
+        self._emotion_re = re.compile("(?=" + "|".join(
+            f"(?P<{emotion}>{'|'.join(map(re.escape, sorted(keywords, key=len, reverse=True)))})"
+            for emotion, keywords in self.emotion_keywords.items()
+        ) + ")")
+        self._emotion_keyword_counts = {
+            emotion: len(keywords) for emotion, keywords in self.emotion_keywords.items()
+        }
+        # 情感识别只依赖文本本身，按实例缓存（缓存键不含self）
+        self._detect_emotion = functools.lru_cache(maxsize=EMOTION_CACHE_SIZE)(self._detect_emotion)
+        
         # 情感状态与回复策略映射
         self.response_strategies = {
             "anxious": {
@@ -65,6 +83,12 @@ class EmotionIntelligence:
                 "priority": "NORMAL"
             }
         }
+        
+        # 紧急情况下的回复策略（优先级提升为CRITICAL），初始化时构建，避免每次请求复制字典
+        self._critical_strategies = {
+            emotion: {**strategy, "priority": "CRITICAL"}
+            for emotion, strategy in self.response_strategies.items()
+        }
     
     def analyze(self, query: str, urgency_info: Optional[Dict] = None) -> Dict:
         """
@@ -86,13 +110,11 @@ class EmotionIntelligence:
         # 检测情感
         emotion, emotion_score = self._detect_emotion(query)
         
-        # 获取回复策略
-        strategy = self.response_strategies.get(emotion, self.response_strategies["neutral"])
-        
-        # 结合紧急程度调整优先级
+        # 获取回复策略（紧急程度为CRITICAL时使用预先构建的高优先级版本）
         if urgency_info and urgency_info.get("level") == "CRITICAL":
-            strategy = strategy.copy()
-            strategy["priority"] = "CRITICAL"
+            strategy = self._critical_strategies.get(emotion, self._critical_strategies["neutral"])
+        else:
+            strategy = self.response_strategies.get(emotion, self.response_strategies["neutral"])
         
         # 用户状态分析
         user_state = self._analyze_user_state(emotion, urgency_info)
@@ -109,17 +131,16 @@ class EmotionIntelligence:
     
     def _detect_emotion(self, text: str) -> tuple:
         """检测情感类型"""
-        text_lower = text.lower()
-        scores = {}
-        
-        # 计算每种情感的得分
-        for emotion, keywords in self.emotion_keywords.items():
-            score = 0
-            for keyword in keywords:
-                if keyword in text:
-                    score += 1
-            if score > 0:
-                scores[emotion] = score / len(keywords)  # 归一化
+        # 按情感统计命中的不同关键词数
+        matched = {(m.lastgroup, m.group(m.lastgroup)) for m in self._emotion_re.finditer(text)}
+        hits = Counter(emotion for emotion, _ in matched)
+        
+        # 计算每种情感的得分（归一化，按关键词库顺序，得分相同时取靠前的情感）
+        scores = {
+            emotion: hits[emotion] / total
+            for emotion, total in self._emotion_keyword_counts.items()
+            if hits[emotion]
+        }
         
         if not scores:
             return "neutral", 0.5
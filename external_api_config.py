@@ -3,6 +3,9 @@
 用于管理API密钥和启用状态
 """
 import os
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping
 
 # API配置
 EXTERNAL_API_CONFIG = {
@@ -13,6 +16,7 @@ EXTERNAL_API_CONFIG = {
         "app_secret": os.getenv("JD_APP_SECRET", ""),  # 京东 AppSecret，用于签名
         "base_url": "https://api.jd.com/routerjson",  # 京东联盟API地址
         "timeout": 5,
+        "rate_limit": {"rate": 1.0, "capacity": 60},  # 限流：每秒补充1次请求额度，最多允许连续突发60次
         # 京东联盟开放平台: https://union.jd.com/
         # API文档: https://union.jd.com/myTools/myApi
         # 注意: app_key 是您的AppKey, app_secret 需要单独配置
@@ -24,6 +28,7 @@ EXTERNAL_API_CONFIG = {
         "api_key": os.getenv("GOV_API_KEY", ""),
         "base_url": "http://www.jinan.gov.cn/api/policy",  # 修改为真实API地址
         "timeout": 10,
+        "rate_limit": {"rate": 1.0, "capacity": 60},  # 限流：每秒补充1次请求额度，最多允许连续突发60次
         # 可选的政府数据平台:
         # - 国家政务服务平台: https://www.gjzwfw.gov.cn/
         # - 山东政务服务网: https://www.sd.gov.cn/
@@ -32,8 +37,23 @@ EXTERNAL_API_CONFIG = {
 }
 
 # API认证头配置
-def get_api_headers(api_name: str) -> dict:
-    """获取API请求头"""
+def get_api_headers(api_name: str) -> Mapping[str, str]:
+    """
+    获取API请求头（只读映射，修改配置后调用 clear_headers_cache 刷新）
+    
+    每次请求都会调用，配置很少变化，按API名称缓存构建结果
+    """
+    return _build_api_headers(api_name)
+
+
+def clear_headers_cache():
+    """清空请求头缓存（修改API密钥等配置后调用）"""
+    _build_api_headers.cache_clear()
+
+
+@lru_cache(maxsize=8)
+def _build_api_headers(api_name: str) -> Mapping[str, str]:
+    """构建API请求头"""
     config = EXTERNAL_API_CONFIG.get(api_name, {})
     api_key = config.get("api_key", "")
     
@@ -49,7 +69,7 @@ def get_api_headers(api_name: str) -> dict:
     elif api_name == "policy_check" and api_key:
         headers["X-API-Key"] = api_key
     
-    return headers
+    return MappingProxyType(headers)
 
 
 # 快速启用配置示例
@@ -59,6 +79,7 @@ def enable_price_api(api_key: str, base_url: str = None):
     EXTERNAL_API_CONFIG["price"]["api_key"] = api_key
     if base_url:
         EXTERNAL_API_CONFIG["price"]["base_url"] = base_url
+    clear_headers_cache()
     print(f"✅ 价格API已启用")
 
 
@@ -69,6 +90,7 @@ def enable_policy_api(api_key: str = "", base_url: str = None):
         EXTERNAL_API_CONFIG["policy_check"]["api_key"] = api_key
     if base_url:
         EXTERNAL_API_CONFIG["policy_check"]["base_url"] = base_url
+    clear_headers_cache()
     print(f"✅ 政策核查API已启用")
 
 
@@ -2,11 +2,22 @@
 外部API管理器 - 集成多个外部数据源和服务
 支持政策查询、价格查询等外部API
 """
-from typing import Dict, List, Optional, Any
+from typing import Any, Callable, Dict, List, Optional
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import asyncio
+import hashlib
+import math
+import random
+import threading
 import time
-from datetime import datetime, timedelta
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from collections import OrderedDict
+from datetime import datetime
+from types import MappingProxyType
 import json
+import logging
 
 try:
     from external_api_config import EXTERNAL_API_CONFIG, get_api_headers
@@ -15,6 +26,18 @@ except ImportError:
     CONFIG_AVAILABLE = False
     print("提示: external_api_config 未找到，使用默认配置")
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
 try:
     from jd_api_helper import JDAPIHelper, parse_jd_response
     JD_HELPER_AVAILABLE = True
@@ -22,6 +45,25 @@ except ImportError:
     JD_HELPER_AVAILABLE = False
     print("提示: jd_api_helper 未找到，京东API签名不可用")
 
+logger = logging.getLogger(__name__)
+
+
+# 未找到配置文件时使用的请求头（只读，各请求共享）
+DEFAULT_HEADERS = MappingProxyType({"User-Agent": "IntelliPolicy/1.0"})
+# 响应缓存最多保留的条目数，超出时淘汰最久未使用的条目
+EXTERNAL_API_CACHE_MAX = 1024
+# 后台刷新过期缓存的最大线程数
+REFRESH_MAX_WORKERS = 4
+# 批量调用的最大并发数
+BATCH_MAX_WORKERS = 8
+# 上游失败响应的缓存时间（秒），在此期间相同请求直接返回错误，避免反复请求故障的上游
+NEGATIVE_CACHE_TTL = 15
+# 默认限流参数（令牌桶）：每秒补充的令牌数、桶容量（允许的突发请求数）
+RATE_LIMIT_RATE = 1.0
+RATE_LIMIT_CAPACITY = 60
+# 异步客户端的最大连接数
+ASYNC_MAX_CONNECTIONS = 50
+
 
 class ExternalAPIManager:
     """外部API管理器"""
@@ -36,14 +78,20 @@ class ExternalAPIManager:
                     "base_url": EXTERNAL_API_CONFIG["price"]["base_url"],
                     "enabled": EXTERNAL_API_CONFIG["price"]["enabled"],
                     "timeout": EXTERNAL_API_CONFIG["price"]["timeout"],
-                    "api_key": EXTERNAL_API_CONFIG["price"].get("api_key", "")
+                    "api_key": EXTERNAL_API_CONFIG["price"].get("api_key", ""),
+                    "rate_limit": EXTERNAL_API_CONFIG["price"].get(
+                        "rate_limit", {"rate": RATE_LIMIT_RATE, "capacity": RATE_LIMIT_CAPACITY}
+                    )
                 },
                 "policy_check": {
                     "name": "政策实时核查API",
                     "base_url": EXTERNAL_API_CONFIG["policy_check"]["base_url"],
                     "enabled": EXTERNAL_API_CONFIG["policy_check"]["enabled"],
                     "timeout": EXTERNAL_API_CONFIG["policy_check"]["timeout"],
-                    "api_key": EXTERNAL_API_CONFIG["policy_check"].get("api_key", "")
+                    "api_key": EXTERNAL_API_CONFIG["policy_check"].get("api_key", ""),
+                    "rate_limit": EXTERNAL_API_CONFIG["policy_check"].get(
+                        "rate_limit", {"rate": RATE_LIMIT_RATE, "capacity": RATE_LIMIT_CAPACITY}
+                    )
                 }
             }
         else:
@@ -65,13 +113,40 @@ class ExternalAPIManager:
                 }
             }
         
-        # 缓存配置
-        self.cache = {}
-        self.cache_ttl = 300  # 5分钟缓存
+        # 缓存配置：缓存键 -> (响应数据, 写入时间)，按访问顺序排列（LRU），队首最久未用
+        self.cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self.cache_ttl = 300  # 5分钟内视为新鲜数据
+        self.cache_stale_ttl = 900  # 15分钟内的过期数据仍可先返回，同时后台刷新
+        self.cache_max_entries = EXTERNAL_API_CACHE_MAX
+        self._cache_lock = threading.Lock()
+        # 失败响应缓存：缓存键 -> (错误信息, 过期时间)，与响应缓存共用锁
+        self.negative_cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self.negative_cache_ttl = NEGATIVE_CACHE_TTL
+        self._refreshing = set()  # 正在后台刷新的缓存键
+        self._refresh_executor = None  # 首次需要后台刷新时创建
+        
+        # 复用连接的HTTP会话（keep-alive），避免每次请求重新建立TCP/TLS连接
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=20,
+            # 仅对连接失败和网关类错误重试；读超时不重试，避免耗时成倍增加
+            max_retries=Retry(total=3, read=0, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # 异步HTTP客户端（httpx），首次调用异步接口时在事件循环内创建
+        self._aclient = None
+        
+        # 进行中的请求：缓存键 -> Future，用于合并并发的相同请求
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        # 异步接口的进行中请求：缓存键 -> asyncio.Task（仅在事件循环线程内访问，无需加锁）
+        self._ainflight: Dict[str, "asyncio.Task"] = {}
         
-        # 请求限流
-        self.rate_limits = {}
-        self.max_requests_per_minute = 60
+        # 请求限流（令牌桶）：API名称 -> [剩余令牌数, 上次补充时间]，首次请求时装满
+        self.rate_limits: Dict[str, list] = {}
+        self._rate_lock = threading.Lock()
         
         # 初始化京东API助手
         self.jd_helper = None
@@ -91,7 +166,10 @@ class ExternalAPIManager:
         method: str = "GET",
         params: Optional[Dict] = None,
         data: Optional[Dict] = None,
-        use_cache: bool = True
+        use_cache: bool = True,
+        use_negative_cache: bool = True,
+        form_builder: Optional[Callable[[], Dict]] = None,
+        cache_params: Optional[Dict] = None
     ) -> Dict:
         """
         调用外部API
@@ -103,17 +181,23 @@ class ExternalAPIManager:
             params: 查询参数
             data: 请求体数据
             use_cache: 是否使用缓存
+            use_negative_cache: 是否缓存上游失败响应（短时间内相同请求直接返回错误）
+            form_builder: 生成表单请求体的函数（仅POST），每次实际发送时调用，
+                          适用于带时间戳签名、不能重复使用的参数
+            cache_params: 用于生成缓存键的参数，不传时使用 params
         
         Returns:
             {
                 "success": bool,
                 "data": Any,
                 "error": str,
-                "cached": bool,
+                "cached": bool,  # 命中失败响应缓存时同样为True
+                "stale": bool,  # 仅缓存命中时返回，为True表示数据已过新鲜期、正在后台刷新
+                "rate_limit": {"limit": int, "remaining": int, "reset": int},  # 仅实际发起请求时返回
                 "response_time": float
             }
         """
-        start_time = time.time()
+        start_time = time.monotonic()
         
         # 检查API是否启用
         if api_name not in self.apis:
@@ -123,54 +207,132 @@ class ExternalAPIManager:
         if not api_config["enabled"]:
             return self._mock_response(api_name, params)
         
-        # 检查缓存
-        cache_key = self._generate_cache_key(api_name, endpoint, params, data)
-        if use_cache and cache_key in self.cache:
-            cache_data, cache_time = self.cache[cache_key]
-            if time.time() - cache_time < self.cache_ttl:
+        # 检查缓存：新鲜数据直接返回；过期但仍在可用期内的数据先返回，同时后台刷新
+        cache_key = self._generate_cache_key(
+            api_name, endpoint, params if cache_params is None else cache_params, data
+        )
+        if use_cache:
+            entry = self._cache_get(cache_key)
+            if entry is not None:
+                cache_data, is_stale = entry
+                if is_stale:
+                    self._schedule_refresh(cache_key, api_name, endpoint, method, params, data, form_builder)
                 return {
                     "success": True,
                     "data": cache_data,
                     "error": None,
                     "cached": True,
-                    "response_time": time.time() - start_time
+                    "stale": is_stale,
+                    "response_time": time.monotonic() - start_time
                 }
+            if use_negative_cache:
+                error = self._negative_cache_get(cache_key)
+                if error is not None:
+                    return self._cached_error_response(error, start_time)
         
-        # 检查限流
-        if not self._check_rate_limit(api_name):
-            return self._error_response("请求频率超限，请稍后重试")
+        if not use_cache:
+            result = self._request(api_name, endpoint, method, params, data, form_builder=form_builder)
+            result["response_time"] = time.monotonic() - start_time
+            return result
         
-        # 构建URL
-        url = api_config["base_url"]
-        if endpoint:
-            url = f"{url}/{endpoint}"
+        # 合并并发的相同请求：同一缓存键只由第一个调用方发起请求，其余调用方等待其结果
+        with self._inflight_lock:
+            future = self._inflight.get(cache_key)
+            is_leader = future is None
+            if is_leader:
+                future = self._inflight[cache_key] = Future()
+        
+        if not is_leader:
+            try:
+                result = dict(future.result(timeout=api_config["timeout"]))
+            except FutureTimeoutError:
+                return self._error_response("请求超时")
+            result["response_time"] = time.monotonic() - start_time
+            return result
+        
+        try:
+            result = self._request(api_name, endpoint, method, params, data,
+                                   negative_cache_key=cache_key if use_negative_cache else None,
+                                   form_builder=form_builder)
+            if result["success"]:
+                self._cache_set(cache_key, result["data"])
+            future.set_result(result)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(cache_key, None)
+        
+        result = dict(result)
+        result["response_time"] = time.monotonic() - start_time
+        return result
+    
+    def _request(
+        self,
+        api_name: str,
+        endpoint: str,
+        method: str,
+        params: Optional[Dict],
+        data: Optional[Dict],
+        negative_cache_key: Optional[str] = None,
+        form_builder: Optional[Callable[[], Dict]] = None
+    ) -> Dict:
+        """实际发起HTTP请求（含限流检查），不读写响应缓存
+        
+        negative_cache_key 不为空时，上游失败（超时、HTTP错误、响应格式错误）会写入失败响应缓存；
+        返回结果附带 rate_limit 字段，调用方可据此自行控制请求节奏
+        """
+        allowed, rate_limit = self._check_rate_limit(api_name)
+        if allowed:
+            result = self._send(api_name, endpoint, method, params, data, negative_cache_key, form_builder)
+        else:
+            result = self._error_response("请求频率超限，请稍后重试")
+        result["rate_limit"] = rate_limit
+        return result
+    
+    def _send(
+        self,
+        api_name: str,
+        endpoint: str,
+        method: str,
+        params: Optional[Dict],
+        data: Optional[Dict],
+        negative_cache_key: Optional[str],
+        form_builder: Optional[Callable[[], Dict]] = None
+    ) -> Dict:
+        """发送HTTP请求并解析响应"""
+        api_config = self.apis[api_name]
+        
+        url, headers = self._build_request(api_name, endpoint)
+        if form_builder is not None:
+            # 表单请求体由requests设置Content-Type
+            headers = {k: v for k, v in headers.items() if k.lower() != "content-type"}
         
         # 初始化参数
         if params is None:
             params = {}
         
-        # 获取请求头
-        if CONFIG_AVAILABLE:
-            headers = get_api_headers(api_name)
-        else:
-            headers = {"User-Agent": "IntelliPolicy/1.0"}
-        
         try:
             # 发送请求
             if method.upper() == "GET":
-                response = requests.get(
+                response = self.session.get(
                     url,
                     params=params,
                     headers=headers,
                     timeout=api_config["timeout"]
                 )
             elif method.upper() == "POST":
-                response = requests.post(
+                if form_builder is not None:
+                    body = {"data": form_builder()}
+                else:
+                    body = {"json": data}
+                response = self.session.post(
                     url,
                     params=params,
-                    json=data,
                     headers=headers,
-                    timeout=api_config["timeout"]
+                    timeout=api_config["timeout"],
+                    **body
                 )
             else:
                 return self._error_response(f"不支持的请求方法: {method}")
@@ -178,26 +340,227 @@ class ExternalAPIManager:
             response.raise_for_status()
             
             # 解析响应
-            result_data = response.json()
-            
-            # 缓存结果
-            if use_cache:
-                self.cache[cache_key] = (result_data, time.time())
+            result_data = self._parse_json(response.content)
             
             return {
                 "success": True,
                 "data": result_data,
                 "error": None,
                 "cached": False,
-                "response_time": time.time() - start_time
+                "response_time": 0
             }
             
         except requests.exceptions.Timeout:
-            return self._error_response("请求超时")
+            return self._upstream_error("请求超时", negative_cache_key)
         except requests.exceptions.RequestException as e:
-            return self._error_response(f"请求失败: {str(e)}")
+            return self._upstream_error(f"请求失败: {str(e)}", negative_cache_key)
+        except json.JSONDecodeError:
+            return self._upstream_error("响应数据格式错误", negative_cache_key)
+    
+    def _build_request(self, api_name: str, endpoint: str) -> tuple:
+        """构建请求URL和请求头（请求头为共享的只读映射，不要原地修改）"""
+        url = self.apis[api_name]["base_url"]
+        if endpoint:
+            url = f"{url}/{endpoint}"
+        
+        if CONFIG_AVAILABLE:
+            headers = get_api_headers(api_name)
+        else:
+            headers = DEFAULT_HEADERS
+        return url, headers
+    
+    async def acall_api(
+        self,
+        api_name: str,
+        endpoint: str = "",
+        method: str = "GET",
+        params: Optional[Dict] = None,
+        data: Optional[Dict] = None,
+        use_cache: bool = True,
+        use_negative_cache: bool = True
+    ) -> Dict:
+        """
+        调用外部API（异步版本，参数与返回值同 call_api）
+        
+        安装了httpx时在事件循环内直接发起请求，大量并发请求只占用一个线程；
+        否则退化为在线程池中执行 call_api。
+        """
+        if not HTTPX_AVAILABLE:
+            return await asyncio.to_thread(
+                self.call_api, api_name, endpoint, method, params, data, use_cache, use_negative_cache
+            )
+        
+        start_time = time.monotonic()
+        
+        if api_name not in self.apis:
+            return self._error_response(f"未知的API: {api_name}")
+        
+        if not self.apis[api_name]["enabled"]:
+            return self._mock_response(api_name, params)
+        
+        # 缓存读取与同步接口共享；过期数据的后台刷新仍交给刷新线程池
+        cache_key = self._generate_cache_key(api_name, endpoint, params, data)
+        if use_cache:
+            entry = self._cache_get(cache_key)
+            if entry is not None:
+                cache_data, is_stale = entry
+                if is_stale:
+                    self._schedule_refresh(cache_key, api_name, endpoint, method, params, data)
+                return {
+                    "success": True,
+                    "data": cache_data,
+                    "error": None,
+                    "cached": True,
+                    "stale": is_stale,
+                    "response_time": time.monotonic() - start_time
+                }
+            if use_negative_cache:
+                error = self._negative_cache_get(cache_key)
+                if error is not None:
+                    return self._cached_error_response(error, start_time)
+        
+        if not use_cache:
+            result = await self._arequest(api_name, endpoint, method, params, data)
+            result["response_time"] = time.monotonic() - start_time
+            return result
+        
+        # 合并并发的相同请求：同一缓存键只创建一个请求任务，其余协程等待同一任务
+        task = self._ainflight.get(cache_key)
+        if task is None:
+            task = asyncio.ensure_future(self._arequest_and_cache(
+                cache_key, api_name, endpoint, method, params, data, use_negative_cache
+            ))
+            self._ainflight[cache_key] = task
+        
+        # shield：某个调用方被取消时不影响其他等待同一请求的调用方
+        result = dict(await asyncio.shield(task))
+        result["response_time"] = time.monotonic() - start_time
+        return result
+    
+    async def _arequest_and_cache(self, cache_key: str, api_name: str, endpoint: str, method: str,
+                                  params: Optional[Dict], data: Optional[Dict],
+                                  use_negative_cache: bool) -> Dict:
+        """异步请求并在成功时写入缓存，结束后移出进行中列表"""
+        try:
+            result = await self._arequest(api_name, endpoint, method, params, data,
+                                          negative_cache_key=cache_key if use_negative_cache else None)
+            if result["success"]:
+                self._cache_set(cache_key, result["data"])
+            return result
+        finally:
+            self._ainflight.pop(cache_key, None)
+    
+    async def _arequest(
+        self,
+        api_name: str,
+        endpoint: str,
+        method: str,
+        params: Optional[Dict],
+        data: Optional[Dict],
+        negative_cache_key: Optional[str] = None
+    ) -> Dict:
+        """实际发起异步HTTP请求（含限流检查），不读写响应缓存，参数与返回值同 _request"""
+        allowed, rate_limit = self._check_rate_limit(api_name)
+        if allowed:
+            result = await self._asend(api_name, endpoint, method, params, data, negative_cache_key)
+        else:
+            result = self._error_response("请求频率超限，请稍后重试")
+        result["rate_limit"] = rate_limit
+        return result
+    
+    async def _asend(
+        self,
+        api_name: str,
+        endpoint: str,
+        method: str,
+        params: Optional[Dict],
+        data: Optional[Dict],
+        negative_cache_key: Optional[str]
+    ) -> Dict:
+        """发送异步HTTP请求并解析响应"""
+        api_config = self.apis[api_name]
+        
+        url, headers = self._build_request(api_name, endpoint)
+        
+        if params is None:
+            params = {}
+        
+        if self._aclient is None:
+            self._aclient = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=ASYNC_MAX_CONNECTIONS),
+                # 与同步会话一致：仅对连接失败重试
+                transport=httpx.AsyncHTTPTransport(retries=3)
+            )
+        
+        try:
+            if method.upper() == "GET":
+                response = await self._aclient.get(
+                    url,
+                    params=params,
+                    headers=headers,
+                    timeout=api_config["timeout"]
+                )
+            elif method.upper() == "POST":
+                response = await self._aclient.post(
+                    url,
+                    params=params,
+                    json=data,
+                    headers=headers,
+                    timeout=api_config["timeout"]
+                )
+            else:
+                return self._error_response(f"不支持的请求方法: {method}")
+            
+            response.raise_for_status()
+            
+            return {
+                "success": True,
+                "data": self._parse_json(response.content),
+                "error": None,
+                "cached": False,
+                "response_time": 0
+            }
+            
+        except httpx.TimeoutException:
+            return self._upstream_error("请求超时", negative_cache_key)
+        except httpx.HTTPError as e:
+            return self._upstream_error(f"请求失败: {str(e)}", negative_cache_key)
         except json.JSONDecodeError:
-            return self._error_response("响应数据格式错误")
+            return self._upstream_error("响应数据格式错误", negative_cache_key)
+    
+    async def aclose(self):
+        """关闭异步HTTP客户端（应用关闭时调用）"""
+        if self._aclient is not None:
+            await self._aclient.aclose()
+            self._aclient = None
+    
+    def _schedule_refresh(self, cache_key: str, api_name: str, endpoint: str, method: str,
+                          params: Optional[Dict], data: Optional[Dict],
+                          form_builder: Optional[Callable[[], Dict]] = None):
+        """后台刷新过期缓存，同一缓存键同时只刷新一次"""
+        with self._cache_lock:
+            if cache_key in self._refreshing:
+                return
+            self._refreshing.add(cache_key)
+            if self._refresh_executor is None:
+                self._refresh_executor = ThreadPoolExecutor(
+                    max_workers=REFRESH_MAX_WORKERS, thread_name_prefix="api-refresh"
+                )
+        self._refresh_executor.submit(
+            self._refresh, cache_key, api_name, endpoint, method, params, data, form_builder
+        )
+    
+    def _refresh(self, cache_key: str, api_name: str, endpoint: str, method: str,
+                 params: Optional[Dict], data: Optional[Dict],
+                 form_builder: Optional[Callable[[], Dict]] = None):
+        """后台刷新任务：请求成功则更新缓存，失败时保留原有数据"""
+        try:
+            result = self._request(api_name, endpoint, method, params, data, form_builder=form_builder)
+            if result["success"]:
+                self._cache_set(cache_key, result["data"])
+        finally:
+            with self._cache_lock:
+                self._refreshing.discard(cache_key)
     
     def check_policy_realtime(self, policy_name: str, region: str = "济南市") -> Dict:
         """
@@ -261,23 +624,11 @@ class ExternalAPIManager:
         # 如果有京东API助手，使用签名调用
         if self.jd_helper:
             try:
-                # 构建京东查询参数
-                jd_params = self.jd_helper.query_goods(
-                    keyword=product_name,
-                    page_index=1,
-                    page_size=5
-                )
-                
-                # 调用京东 API
-                response = requests.post(
-                    self.apis["price"]["base_url"],
-                    data=jd_params,
-                    timeout=self.apis["price"]["timeout"]
-                )
+                result = self._post_jd(product_name, page_index=1, page_size=5)
                 
-                if response.status_code == 200:
-                    jd_result = response.json()
-                    parsed = parse_jd_response(jd_result)
+                if result["success"]:
+                    # parse_jd_response 只拆出业务结果并判断错误码
+                    parsed = parse_jd_response(result["data"])
                     
                     if parsed["success"] and parsed.get("data"):
                         # 解析京东数据格式
@@ -286,31 +637,42 @@ class ExternalAPIManager:
                         
                         if goods_list:
                             prices = []
+                            lowest_price = math.inf
+                            price_sum = 0.0
+                            price_count = 0
                             for item in goods_list[:3]:  # 取前3个商品
-                                price_info = {
+                                price = float(item.get("price") or item.get("wlUnitPrice") or 0)
+                                sku_id = item.get("skuId")
+                                prices.append({
                                     "platform": "京东",
-                                    "price": float(item.get("price", 0) or item.get("wlUnitPrice", 0)),
+                                    "price": price,
                                     "name": item.get("skuName", product_name),
-                                    "url": f"https://item.jd.com/{item.get('skuId', '')}.html" if item.get('skuId') else ""
-                                }
-                                prices.append(price_info)
+                                    "url": f"https://item.jd.com/{sku_id}.html" if sku_id else ""
+                                })
+                                # 一次遍历同时统计最低价和均价（忽略无效价格）
+                                if price > 0:
+                                    if price < lowest_price:
+                                        lowest_price = price
+                                    price_sum += price
+                                    price_count += 1
                             
-                            if prices:
-                                price_values = [p["price"] for p in prices if p["price"] > 0]
-                                return {
-                                    "product": product_name,
-                                    "prices": prices,
-                                    "lowest_price": min(price_values) if price_values else 0,
-                                    "average_price": sum(price_values) / len(price_values) if price_values else 0,
-                                    "total_count": jd_data.get("totalCount", 0)
-                                }
+                            return {
+                                "product": product_name,
+                                "prices": prices,
+                                "lowest_price": lowest_price if price_count else 0,
+                                "average_price": price_sum / price_count if price_count else 0,
+                                "total_count": jd_data.get("totalCount", 0)
+                            }
                     else:
-                        print(f"京东API错误: {parsed.get('error', '未知')}")
+                        # 业务错误不缓存，下次查询重新请求
+                        self._cache_discard(result.get("cache_key"))
+                        logger.warning("京东API错误: %s", parsed.get("error", "未知"))
+                else:
+                    logger.warning("京东API调用失败: %s", result["error"])
             except Exception as e:
-                print(f"京东API调用异常: {e}")
+                logger.exception("京东API调用异常: %s", e)
         
         # 如果京东API不可用或调用失败，返回模拟数据
-        import random
         base_price = random.randint(2000, 8000)
         return {
             "product": product_name,
@@ -336,6 +698,24 @@ class ExternalAPIManager:
             "note": "京东API不可用，返回模拟数据"
         }
     
+    def _post_jd(self, keyword: str, page_index: int, page_size: int) -> Dict:
+        """
+        通过 call_api 调用京东商品查询（复用连接池、缓存、限流和失败缓存）
+        
+        签名参数含时间戳，每次发送时重新生成；缓存键只取决于查询条件。
+        """
+        cache_params = {"keyword": keyword, "page_index": page_index, "page_size": page_size}
+        result = self.call_api(
+            "price",
+            method="POST",
+            form_builder=lambda: self.jd_helper.query_goods(
+                keyword=keyword, page_index=page_index, page_size=page_size
+            ),
+            cache_params=cache_params
+        )
+        result["cache_key"] = self._generate_cache_key("price", "", cache_params, None)
+        return result
+    
     def batch_call(self, requests: List[Dict]) -> List[Dict]:
         """
         批量调用API
@@ -350,46 +730,156 @@ class ExternalAPIManager:
             ]
         
         Returns:
-            响应列表
+            响应列表（与请求顺序一致）
         """
-        results = []
-        for req in requests:
-            result = self.call_api(
+        if not requests:
+            return []
+        
+        # 各请求相互独立且以网络等待为主，并发发起以重叠等待时间
+        with ThreadPoolExecutor(max_workers=min(len(requests), BATCH_MAX_WORKERS),
+                                thread_name_prefix="api-batch") as executor:
+            futures = [
+                executor.submit(
+                    self.call_api,
+                    req.get("api_name"),
+                    req.get("endpoint", ""),
+                    params=req.get("params")
+                )
+                for req in requests
+            ]
+            return [future.result() for future in futures]
+    
+    async def abatch_call(self, requests: List[Dict]) -> List[Dict]:
+        """
+        批量调用API（异步版本，参数与返回值同 batch_call）
+        
+        所有请求在同一事件循环内并发执行，不受线程数限制。
+        """
+        return list(await asyncio.gather(*(
+            self.acall_api(
                 req.get("api_name"),
                 req.get("endpoint", ""),
                 params=req.get("params")
             )
-            results.append(result)
-        return results
+            for req in requests
+        )))
     
     def _generate_cache_key(self, api_name: str, endpoint: str, params: Dict, data: Dict) -> str:
-        """生成缓存键"""
-        key_parts = [api_name, endpoint or ""]
-        if params:
-            key_parts.append(json.dumps(params, sort_keys=True))
-        if data:
-            key_parts.append(json.dumps(data, sort_keys=True))
-        return "|".join(key_parts)
-    
-    def _check_rate_limit(self, api_name: str) -> bool:
-        """检查限流"""
-        now = time.time()
-        if api_name not in self.rate_limits:
-            self.rate_limits[api_name] = []
-        
-        # 清理过期记录
-        self.rate_limits[api_name] = [
-            t for t in self.rate_limits[api_name]
-            if now - t < 60
-        ]
-        
-        # 检查是否超限
-        if len(self.rate_limits[api_name]) >= self.max_requests_per_minute:
-            return False
-        
-        # 记录本次请求
-        self.rate_limits[api_name].append(now)
-        return True
+        """
+        生成缓存键：API名称 + 请求内容的定长摘要
+        
+        参数可能很长，直接拼接会让缓存字典的键占用大量内存且哈希变慢；
+        保留API名称前缀，供按API统计和清理缓存使用。
+        """
+        hasher = hashlib.blake2b(digest_size=16)
+        hasher.update((endpoint or "").encode("utf-8"))
+        hasher.update(b"|")
+        hasher.update(self._dumps_sorted(params or {}))
+        hasher.update(b"|")
+        hasher.update(self._dumps_sorted(data or {}))
+        return f"{api_name}|{hasher.hexdigest()}"
+    
+    @staticmethod
+    def _dumps_sorted(obj: Any) -> bytes:
+        """按键排序的紧凑JSON字节串（优先使用orjson）"""
+        if ORJSON_AVAILABLE:
+            return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+        return json.dumps(obj, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    
+    @staticmethod
+    def _parse_json(content: bytes) -> Any:
+        """解析响应体JSON（优先使用orjson）；orjson.JSONDecodeError 是 json.JSONDecodeError 的子类"""
+        if ORJSON_AVAILABLE:
+            return orjson.loads(content)
+        return json.loads(content)
+    
+    def _cache_get(self, cache_key: str) -> Optional[tuple]:
+        """
+        读取缓存，返回 (响应数据, 是否已过新鲜期)；超过可用期的条目顺带删除并返回None
+        """
+        with self._cache_lock:
+            entry = self.cache.get(cache_key)
+            if entry is None:
+                return None
+            age = time.monotonic() - entry[1]
+            if age >= self.cache_stale_ttl:
+                del self.cache[cache_key]
+                return None
+            self.cache.move_to_end(cache_key)
+            return entry[0], age >= self.cache_ttl
+    
+    def _cache_set(self, cache_key: str, data: Any):
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        with self._cache_lock:
+            self.cache[cache_key] = (data, time.monotonic())
+            self.cache.move_to_end(cache_key)
+            while len(self.cache) > self.cache_max_entries:
+                self.cache.popitem(last=False)
+    
+    def _cache_discard(self, cache_key: Optional[str]):
+        """删除一条响应缓存"""
+        if cache_key is None:
+            return
+        with self._cache_lock:
+            self.cache.pop(cache_key, None)
+    
+    def _negative_cache_get(self, cache_key: str) -> Optional[str]:
+        """读取失败响应缓存，返回错误信息；已过期的条目顺带删除并返回None"""
+        with self._cache_lock:
+            entry = self.negative_cache.get(cache_key)
+            if entry is None:
+                return None
+            if time.monotonic() >= entry[1]:
+                del self.negative_cache[cache_key]
+                return None
+            return entry[0]
+    
+    def _upstream_error(self, error_msg: str, negative_cache_key: Optional[str]) -> Dict:
+        """上游失败的错误响应，需要时写入失败响应缓存"""
+        if negative_cache_key is not None:
+            with self._cache_lock:
+                self.negative_cache[negative_cache_key] = (error_msg, time.monotonic() + self.negative_cache_ttl)
+                self.negative_cache.move_to_end(negative_cache_key)
+                while len(self.negative_cache) > self.cache_max_entries:
+                    self.negative_cache.popitem(last=False)
+        return self._error_response(error_msg)
+    
+    def _cached_error_response(self, error_msg: str, start_time: float) -> Dict:
+        """命中失败响应缓存时的错误响应"""
+        result = self._error_response(error_msg)
+        result["cached"] = True
+        result["response_time"] = time.monotonic() - start_time
+        return result
+    
+    def _check_rate_limit(self, api_name: str) -> tuple:
+        """
+        检查限流（令牌桶）：按速率持续补充令牌，有令牌则消耗一个并放行
+        
+        Returns:
+            (是否放行, {"limit": 桶容量, "remaining": 剩余令牌数, "reset": 令牌补满所需秒数})
+        """
+        limit = self.apis[api_name].get("rate_limit") or {}
+        rate = limit.get("rate", RATE_LIMIT_RATE)
+        capacity = limit.get("capacity", RATE_LIMIT_CAPACITY)
+        now = time.monotonic()
+        
+        with self._rate_lock:
+            bucket = self.rate_limits.get(api_name)
+            if bucket is None:
+                bucket = self.rate_limits[api_name] = [capacity, now]
+            
+            tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            bucket[0] = tokens
+        
+        return allowed, {
+            "limit": int(capacity),
+            "remaining": int(tokens),
+            "reset": math.ceil((capacity - tokens) / rate) if rate > 0 else 0
+        }
     
     def _error_response(self, error_msg: str) -> Dict:
         """错误响应"""
@@ -403,9 +893,6 @@ class ExternalAPIManager:
     
     def _mock_response(self, api_name: str, params: Optional[Dict]) -> Dict:
         """模拟响应（API未启用时）"""
-        import random
-        from datetime import datetime
-        
         mock_data = {
             "price": {
                 "product": params.get("product", "商品") if params else "商品",
@@ -438,17 +925,34 @@ class ExternalAPIManager:
             status[api_name] = {
                 "name": config["name"],
                 "enabled": config["enabled"],
-                "cache_entries": sum(1 for k in self.cache if k.startswith(api_name)),
-                "requests_last_minute": len(self.rate_limits.get(api_name, []))
+                "cache_entries": sum(1 for k in list(self.cache) if k.startswith(f"{api_name}|")),
+                "available_tokens": self._available_tokens(api_name)
             }
         return status
     
+    def _available_tokens(self, api_name: str) -> int:
+        """当前可用的限流令牌数（不消耗令牌）"""
+        limit = self.apis[api_name].get("rate_limit") or {}
+        rate = limit.get("rate", RATE_LIMIT_RATE)
+        capacity = limit.get("capacity", RATE_LIMIT_CAPACITY)
+        with self._rate_lock:
+            bucket = self.rate_limits.get(api_name)
+            if bucket is None:
+                return int(capacity)
+            return int(min(capacity, bucket[0] + (time.monotonic() - bucket[1]) * rate))
+    
     def clear_cache(self, api_name: Optional[str] = None):
         """清空缓存"""
-        if api_name:
-            self.cache = {k: v for k, v in self.cache.items() if not k.startswith(api_name)}
-        else:
-            self.cache = {}
+        with self._cache_lock:
+            if api_name:
+                prefix = f"{api_name}|"
+                for key in [k for k in self.cache if k.startswith(prefix)]:
+                    del self.cache[key]
+                for key in [k for k in self.negative_cache if k.startswith(prefix)]:
+                    del self.negative_cache[key]
+            else:
+                self.cache.clear()
+                self.negative_cache.clear()
 
 
 # 全局实例
@@ -508,6 +1012,6 @@ if __name__ == "__main__":
         print(f"\n{info['name']}:")
         print(f"  状态: {'启用' if info['enabled'] else '未启用（模拟模式）'}")
         print(f"  缓存条目: {info['cache_entries']}")
-        print(f"  最近1分钟请求数: {info['requests_last_minute']}")
+        print(f"  可用请求令牌: {info['available_tokens']}")
     
     print("\n\n✅ 外部API管理器测试完成")
@@ -1,36 +1,128 @@
 """
 用户反馈学习系统 - 收集反馈并持续优化
 """
+import atexit
 import json
+import logging
 import os
+import queue
+import re
+import threading
+from collections import Counter, deque
+import time
 from datetime import datetime
+from itertools import islice
 from typing import Dict, List, Optional
 import config
 
+logger = logging.getLogger(__name__)
+
+# orjson（C实现）序列化反馈记录，不可用时回退到标准库json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# 内存中保留的最近反馈条数（全部反馈仍完整保存在文件中）
+FEEDBACK_HISTORY_MAX = 10000
+
+# 后台写入：每批最多写入的记录数、凑批等待时间（秒）、每隔多少批执行一次fsync
+FEEDBACK_WRITE_BATCH = 64
+FEEDBACK_FLUSH_INTERVAL = 0.1
+FEEDBACK_FSYNC_EVERY = 10
+# writev单次可提交的缓冲区数上限
+try:
+    IOV_MAX = os.sysconf("SC_IOV_MAX")
+except (AttributeError, ValueError, OSError):
+    IOV_MAX = 1024
+
+# 负面反馈问题类型识别规则，按顺序匹配，命中第一个即为该类型
+ISSUE_PATTERNS = [
+    ("ACCURACY_ISSUE", re.compile("不准|错误|不对")),
+    ("COMPLETENESS_ISSUE", re.compile("不完整|缺少|没说")),
+    ("PERFORMANCE_ISSUE", re.compile("慢|等待|超时")),
+]
+
 
 class FeedbackSystem:
     """用户反馈收集与学习系统"""
     
     def __init__(self):
         self.feedback_dir = os.path.join(config.LOG_DIR, "feedback")
-        self.feedback_file = os.path.join(self.feedback_dir, "feedback_data.json")
+        # 反馈数据按JSON Lines追加写入，每条反馈一行
+        self.feedback_file = os.path.join(self.feedback_dir, "feedback_data.jsonl")
+        self.legacy_feedback_file = os.path.join(self.feedback_dir, "feedback_data.json")
         self.optimization_file = os.path.join(self.feedback_dir, "optimizations.json")
         
         os.makedirs(self.feedback_dir, exist_ok=True)
         
         # 加载历史反馈
+        self._lock = threading.Lock()
+        self.feedback_total = 0  # 累计反馈条数，用于生成反馈ID
         self.feedback_history = self._load_feedback()
         self.optimizations = self._load_optimizations()
+        
+        # 增量维护的统计：各问题类型的出现次数、最近10条评分，生成建议时无需遍历历史
+        self._issue_type_counts = Counter(
+            issue.get("type", "OTHER") for issue in self.optimizations.get("high_frequency_issues", [])
+        )
+        self._recent_ratings = deque(
+            (f["rating"] for f in islice(reversed(self.feedback_history), 10)), maxlen=10
+        )
+        self._recent_ratings.reverse()
+        
+        # 以追加模式打开，无需重写整个文件；写入由后台线程批量完成，不占用调用方线程
+        self._feedback_fd = os.open(self.feedback_file, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self._write_queue: "queue.Queue[Optional[Dict]]" = queue.Queue()
+        self._writer = threading.Thread(target=self._writer_loop, name="feedback-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
     
-    def _load_feedback(self) -> List[Dict]:
-        """加载历史反馈"""
+    def _load_feedback(self) -> deque:
+        """加载历史反馈（内存中只保留最近 FEEDBACK_HISTORY_MAX 条）"""
+        self._migrate_legacy_feedback()
+        history = deque(maxlen=FEEDBACK_HISTORY_MAX)
         if os.path.exists(self.feedback_file):
             try:
-                with open(self.feedback_file, "r", encoding="utf-8") as f:
-                    return json.load(f)
-            except:
-                return []
-        return []
+                with open(self.feedback_file, "rb") as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        try:
+                            history.append(self._loads(line))
+                        except ValueError:
+                            continue  # 跳过写入中断导致的残缺行
+                        self.feedback_total += 1
+            except OSError:
+                pass
+        return history
+    
+    def _migrate_legacy_feedback(self):
+        """将旧版整体JSON格式的反馈文件转换为JSON Lines格式"""
+        if os.path.exists(self.feedback_file) or not os.path.exists(self.legacy_feedback_file):
+            return
+        try:
+            with open(self.legacy_feedback_file, "r", encoding="utf-8") as f:
+                records = json.load(f)
+            with open(self.feedback_file, "wb") as f:
+                for record in records:
+                    f.write(self._dumps_line(record))
+            os.replace(self.legacy_feedback_file, self.legacy_feedback_file + ".bak")
+        except Exception as e:
+            print(f"迁移旧版反馈数据失败: {e}")
+    
+    @staticmethod
+    def _dumps_line(record: Dict) -> bytes:
+        """序列化为一行JSON（UTF-8字节，含换行符）"""
+        if ORJSON_AVAILABLE:
+            return orjson.dumps(record) + b"\n"
+        return (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+    
+    @staticmethod
+    def _loads(line: bytes) -> Dict:
+        """解析一行JSON"""
+        return orjson.loads(line) if ORJSON_AVAILABLE else json.loads(line)
     
     def _load_optimizations(self) -> Dict:
         """加载优化策略"""
@@ -63,34 +155,89 @@ class FeedbackSystem:
         Returns:
             反馈记录
         """
-        feedback = {
-            "id": len(self.feedback_history) + 1,
-            "timestamp": datetime.now().isoformat(),
-            "query": query,
-            "answer": answer[:500],  # 限制长度
-            "rating": rating,
-            "comment": comment or "",
-            "user_id": user_id or "anonymous",
-            "processed": False
-        }
-        
-        self.feedback_history.append(feedback)
-        self._save_feedback()
+        with self._lock:
+            self.feedback_total += 1
+            feedback = {
+                "id": self.feedback_total,
+                "timestamp": datetime.now().isoformat(),
+                "query": query,
+                "answer": answer[:500],  # 限制长度
+                "rating": rating,
+                "comment": comment or "",
+                "user_id": user_id or "anonymous",
+                "processed": False
+            }
+            
+            self.feedback_history.append(feedback)
+            self._recent_ratings.append(rating)
+            self._save_feedback(feedback)
         
         # 如果是负面反馈，立即分析
         if rating <= 2:
             self._analyze_negative_feedback(feedback)
         
-        print(f"✓ 收到用户反馈: 评分 {rating}/5")
+        logger.info("✓ 收到用户反馈: 评分 %s/5", rating)
         return feedback
     
-    def _save_feedback(self):
-        """保存反馈数据"""
-        try:
-            with open(self.feedback_file, "w", encoding="utf-8") as f:
-                json.dump(self.feedback_history, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"保存反馈失败: {e}")
+    def _save_feedback(self, feedback: Dict):
+        """提交一条反馈给后台线程追加保存"""
+        self._write_queue.put_nowait(feedback)
+    
+    def _writer_loop(self):
+        """后台写入线程：凑批后一次写入，每隔若干批fsync一次；收到None时退出"""
+        batches = 0
+        running = True
+        while running:
+            batch = [self._write_queue.get()]
+            deadline = time.monotonic() + FEEDBACK_FLUSH_INTERVAL
+            while len(batch) < FEEDBACK_WRITE_BATCH:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._write_queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            
+            records = [r for r in batch if r is not None]
+            running = len(records) == len(batch)
+            try:
+                if records:
+                    self._write_lines([self._dumps_line(r) for r in records])
+                    batches += 1
+                    if not running or batches % FEEDBACK_FSYNC_EVERY == 0:
+                        os.fsync(self._feedback_fd)
+            except Exception as e:
+                logger.warning("保存反馈失败: %s", e)
+            finally:
+                for _ in batch:
+                    self._write_queue.task_done()
+    
+    def _write_lines(self, lines: List[bytes]):
+        """将一批记录写入文件：支持writev的平台一次系统调用提交多个缓冲区，无需先拼接"""
+        if not hasattr(os, "writev"):
+            os.write(self._feedback_fd, b"".join(lines))
+            return
+        for start in range(0, len(lines), IOV_MAX):
+            chunk = lines[start:start + IOV_MAX]
+            written = os.writev(self._feedback_fd, chunk)
+            remaining = sum(map(len, chunk)) - written
+            if remaining > 0:
+                # 极少出现的部分写入：补写剩余字节
+                os.write(self._feedback_fd, b"".join(chunk)[-remaining:])
+    
+    def flush(self):
+        """等待已提交的反馈全部写入文件"""
+        self._write_queue.join()
+    
+    def close(self):
+        """写完剩余反馈并关闭文件（进程退出时自动调用）"""
+        if self._feedback_fd is None:
+            return
+        self._write_queue.put(None)
+        self._writer.join()
+        os.close(self._feedback_fd)
+        self._feedback_fd = None
     
     def _analyze_negative_feedback(self, feedback: Dict):
         """分析负面反馈"""
@@ -104,20 +251,17 @@ class FeedbackSystem:
         
         # 检测问题类型
         comment_lower = feedback["comment"].lower()
-        if any(word in comment_lower for word in ["不准", "错误", "不对"]):
-            issue["type"] = "ACCURACY_ISSUE"
-        elif any(word in comment_lower for word in ["不完整", "缺少", "没说"]):
-            issue["type"] = "COMPLETENESS_ISSUE"
-        elif any(word in comment_lower for word in ["慢", "等待", "超时"]):
-            issue["type"] = "PERFORMANCE_ISSUE"
-        else:
-            issue["type"] = "OTHER"
+        issue["type"] = next(
+            (issue_type for issue_type, pattern in ISSUE_PATTERNS if pattern.search(comment_lower)),
+            "OTHER"
+        )
         
         # 添加到高频问题列表
         self.optimizations["high_frequency_issues"].append(issue)
+        self._issue_type_counts[issue["type"]] += 1
         self._save_optimizations()
         
-        print(f"⚠️ 检测到负面反馈: {issue['type']}")
+        logger.warning("⚠️ 检测到负面反馈: %s", issue["type"])
     
     def _save_optimizations(self):
         """保存优化策略"""
@@ -125,33 +269,32 @@ class FeedbackSystem:
             with open(self.optimization_file, "w", encoding="utf-8") as f:
                 json.dump(self.optimizations, f, ensure_ascii=False, indent=2)
         except Exception as e:
-            print(f"保存优化策略失败: {e}")
+            logger.warning("保存优化策略失败: %s", e)
     
     def get_feedback_statistics(self) -> Dict:
         """获取反馈统计"""
         if not self.feedback_history:
             return {"message": "暂无反馈数据"}
         
-        total = len(self.feedback_history)
-        ratings = [f["rating"] for f in self.feedback_history]
-        avg_rating = sum(ratings) / total
+        # 内存中只保留最近 FEEDBACK_HISTORY_MAX 条：总数取累计值，评分类指标基于保留的最近N条
+        with self._lock:
+            total = self.feedback_total
+            counts = Counter(f["rating"] for f in self.feedback_history)
+        sample_size = sum(counts.values())
+        avg_rating = sum(rating * n for rating, n in counts.items()) / sample_size
         
-        rating_distribution = {
-            "5星": sum(1 for r in ratings if r == 5),
-            "4星": sum(1 for r in ratings if r == 4),
-            "3星": sum(1 for r in ratings if r == 3),
-            "2星": sum(1 for r in ratings if r == 2),
-            "1星": sum(1 for r in ratings if r == 1)
-        }
+        rating_distribution = {f"{star}星": counts[star] for star in (5, 4, 3, 2, 1)}
         
-        satisfaction_rate = sum(1 for r in ratings if r >= 4) / total * 100
+        satisfaction_rate = sum(n for rating, n in counts.items() if rating >= 4) / sample_size * 100
         
         return {
             "total_feedback": total,
+            "sample_size": sample_size,
+            "stats_scope": f"评分分布、平均分、满意度与差评数基于最近{sample_size}条反馈",
             "average_rating": round(avg_rating, 2),
             "rating_distribution": rating_distribution,
             "satisfaction_rate": f"{satisfaction_rate:.2f}%",
-            "negative_feedback_count": sum(1 for r in ratings if r <= 2)
+            "negative_feedback_count": sum(n for rating, n in counts.items() if rating <= 2)
         }
     
     def get_improvement_suggestions(self) -> List[str]:
@@ -161,27 +304,18 @@ class FeedbackSystem:
         if not self.feedback_history:
             return ["暂无足够数据生成建议"]
         
-        # 分析高频问题
-        issues = self.optimizations.get("high_frequency_issues", [])
-        if issues:
-            issue_types = {}
-            for issue in issues:
-                issue_type = issue.get("type", "OTHER")
-                issue_types[issue_type] = issue_types.get(issue_type, 0) + 1
-            
-            # 找出最常见的问题
-            if issue_types:
-                most_common = max(issue_types.items(), key=lambda x: x[1])
-                if most_common[0] == "ACCURACY_ISSUE":
-                    suggestions.append("建议: 加强知识库更新，提高答案准确性")
-                elif most_common[0] == "COMPLETENESS_ISSUE":
-                    suggestions.append("建议: 优化答案结构，补充更多细节信息")
-                elif most_common[0] == "PERFORMANCE_ISSUE":
-                    suggestions.append("建议: 优化检索算法，降低响应延迟")
-        
-        # 分析评分趋势
-        recent_10 = self.feedback_history[-10:] if len(self.feedback_history) >= 10 else self.feedback_history
-        avg_recent = sum(f["rating"] for f in recent_10) / len(recent_10)
+        # 找出最常见的问题（次数相同时取最先出现的类型）
+        if self._issue_type_counts:
+            most_common = self._issue_type_counts.most_common(1)[0]
+            if most_common[0] == "ACCURACY_ISSUE":
+                suggestions.append("建议: 加强知识库更新，提高答案准确性")
+            elif most_common[0] == "COMPLETENESS_ISSUE":
+                suggestions.append("建议: 优化答案结构，补充更多细节信息")
+            elif most_common[0] == "PERFORMANCE_ISSUE":
+                suggestions.append("建议: 优化检索算法，降低响应延迟")
+        
+        # 分析评分趋势（最近10条）
+        avg_recent = sum(self._recent_ratings) / len(self._recent_ratings)
         
         if avg_recent < 3.5:
             suggestions.append("警告: 最近评分偏低，需要紧急优化")
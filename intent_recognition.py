@@ -3,18 +3,199 @@
 - 意图识别-1: 基础相关性判定（是否与政策相关）
 - 意图识别-2: 任务路由（具体属于哪类需求）
 """
-from typing import Dict, Tuple
+import asyncio
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import re
+import threading
 import config
 from llm_client import LLMClient
 
+# 可选：Aho-Corasick自动机做多关键词匹配，不可用时回退到预编译正则
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# 语义缓存依赖numpy做向量相似度计算，不可用时只做精确匹配
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+# 政策相关关键词（命中任一即视为相关，无需调用LLM）
+POLICY_KEYWORDS = [
+    "以旧换新", "补贴", "换新", "家电", "数码", "汽车",
+    "政策", "申请", "条件", "流程", "金额", "标准",
+    "手机", "电视", "冰箱", "洗衣机", "空调", "平板"
+]
+
+
+# 拒绝原因
+SENSITIVE_REASON = "检测到敏感内容，请咨询正规渠道"
+IRRELEVANT_REASON = "您的问题似乎与以旧换新政策无关，请询问政策相关问题"
+
+# 任务路由特征模式（按类型顺序计分，同分时取靠前的类型）
+ROUTING_PATTERNS = {
+    intent_type: [re.compile(pattern) for pattern in pattern_list]
+    for intent_type, pattern_list in {
+        "CALCULATION": [
+            r"补贴.*多少钱", r"能.*补.*多少", r"最[高多].*补贴",
+            r"\d+元", r"计算", r"测算"
+        ],
+        "DATA_QUERY": [
+            r"型号", r"品牌", r"参数", r"哪些.*可以",
+            r"支持.*品牌", r"适用.*产品"
+        ],
+        "RECOMMENDATION": [
+            r"推荐", r"建议", r"最[优好]", r"怎么.*划算",
+            r"选.*还是", r"方案"
+        ],
+        "COMPLEX": [
+            r"对比", r"区别", r"比较", r".*和.*有什么",
+            r"跨.*", r"不同.*政策"
+        ],
+        "POLICY_QA": [
+            r"补贴标准", r"标准", r"细则",
+            r"如何.*申请", r"流程", r"条件", r"范围",
+            r"什么.*时候", r"在哪", r"怎么.*办"
+        ]
+    }.items()
+}
+
+
+def build_keyword_matcher(keywords: List[str]) -> Callable[[str], bool]:
+    """
+    将关键词表预编译为匹配函数，单次扫描文本即可判断是否包含任一关键词，
+    耗时与关键词数量无关
+    """
+    if not keywords:
+        return lambda text: False
+    
+    if AHOCORASICK_AVAILABLE:
+        automaton = ahocorasick.Automaton()
+        for keyword in keywords:
+            automaton.add_word(keyword, keyword)
+        automaton.make_automaton()
+        return lambda text: next(automaton.iter(text), None) is not None
+    
+    pattern = re.compile("|".join(map(re.escape, keywords)))
+    return lambda text: pattern.search(text) is not None
+
+
+class SemanticLabelCache:
+    """
+    LLM判定结果缓存：先按问题原文精确匹配，未命中时与已缓存问题向量做余弦相似度检索
+    
+    精确匹配前先归一化问题（去除空白、转小写）；条目数超过上限时淘汰最早写入的条目。
+    """
+    
+    def __init__(self, maxsize: int, threshold: float):
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self._labels: "OrderedDict[str, Any]" = OrderedDict()  # 问题 -> 判定结果，按写入顺序排列
+        self._queries: List[str] = []  # 与向量矩阵的行一一对应
+        self._matrix = None  # 已归一化的问题向量（float32）
+        self._lock = threading.Lock()
+    
+    def get(self, query: str, embed: Optional[Callable[[], Optional[List[float]]]] = None) -> Any:
+        """
+        查询缓存，未命中返回None
+        
+        Args:
+            query: 问题原文
+            embed: 计算问题向量的函数，仅在精确匹配未命中时调用
+        """
+        query = self._key(query)
+        with self._lock:
+            if query in self._labels:
+                return self._labels[query]
+            if self._matrix is None or embed is None:
+                return None
+        
+        vec = self._normalize(embed())
+        if vec is None:
+            return None
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != vec.shape[0]:
+                return None
+            scores = self._matrix @ vec
+            idx = int(np.argmax(scores))
+            if scores[idx] < self.threshold:
+                return None
+            return self._labels[self._queries[idx]]
+    
+    def set(self, query: str, label: Any, embedding: Optional[List[float]] = None):
+        """写入缓存；提供向量时同时参与近似匹配"""
+        query = self._key(query)
+        vec = self._normalize(embedding)
+        with self._lock:
+            if query in self._labels:
+                self._labels[query] = label
+                return
+            if len(self._labels) >= self.maxsize:
+                self._evict_oldest()
+            self._labels[query] = label
+            
+            if vec is None:
+                return
+            # 向量维度变化（知识库重建后向量模型重新训练）时丢弃旧向量
+            if self._matrix is not None and self._matrix.shape[1] != vec.shape[0]:
+                self._queries, self._matrix = [], None
+            self._queries.append(query)
+            row = vec.reshape(1, -1)
+            self._matrix = row if self._matrix is None else np.vstack([self._matrix, row])
+    
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._labels.clear()
+            self._queries, self._matrix = [], None
+    
+    def _evict_oldest(self):
+        """淘汰最早写入的条目（调用方持有锁）"""
+        query, _ = self._labels.popitem(last=False)
+        if self._queries and self._queries[0] == query:
+            self._queries.pop(0)
+            self._matrix = self._matrix[1:] if self._queries else None
+    
+    @staticmethod
+    def _key(query: str) -> str:
+        """精确匹配用的归一化问题"""
+        return "".join(query.split()).lower()
+    
+    @staticmethod
+    def _normalize(embedding: Optional[List[float]]):
+        """L2归一化，numpy不可用或零向量时返回None"""
+        if not NUMPY_AVAILABLE or embedding is None:
+            return None
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vec))
+        if norm == 0.0:
+            return None
+        return vec / norm
+
 
 class IntentRecognizer:
     """双层意图识别器"""
     
-    def __init__(self):
+    def __init__(self, embed_fn: Optional[Callable[[str], Optional[List[float]]]] = None):
+        """
+        Args:
+            embed_fn: 问题向量化函数，用于LLM判定结果的语义缓存；不提供时只做精确匹配缓存
+        """
         self.llm = LLMClient()
         self.rejection_keywords = config.REJECTION_KEYWORDS
+        self._has_rejection_keyword = build_keyword_matcher(self.rejection_keywords)
+        self._has_policy_keyword = build_keyword_matcher(POLICY_KEYWORDS)
+        
+        # LLM兜底判定结果缓存（相关性判定、任务路由各一份）
+        self.embed_fn = embed_fn
+        self._relevance_cache = SemanticLabelCache(config.INTENT_CACHE_SIZE, config.INTENT_CACHE_THRESHOLD)
+        self._routing_cache = SemanticLabelCache(config.INTENT_CACHE_SIZE, config.INTENT_CACHE_THRESHOLD)
         
     def recognize(self, query: str) -> Dict:
         """
@@ -26,131 +207,268 @@ class IntentRecognizer:
                 "intent_type": str,   # L2识别结果
                 "confidence": float,  # 置信度
                 "should_reject": bool, # 是否应拒绝
-                "rejection_reason": str  # 拒绝原因
+                "rejection_reason": str,  # 拒绝原因
+                "entities": dict | None   # 合并预处理时顺带抽取的实体
             }
         """
-        # 第一层：相关性判定 + 安全检查
-        is_relevant, rejection_info = self._level1_relevance_check(query)
+        # 合并预处理结果（仅在关键词规则无法判定时才调用LLM，且最多一次）
+        fused = {}
         
+        # 第一层：相关性判定 + 安全检查
+        is_relevant, rejection_info = self._level1_relevance_check(query, fused)
         if not is_relevant:
-            return {
-                "is_relevant": False,
-                "intent_type": None,
-                "confidence": 0.0,
-                "should_reject": True,
-                "rejection_reason": rejection_info
-            }
+            return self._rejected_result(rejection_info)
         
         # 第二层：任务路由
-        intent_type, confidence = self._level2_task_routing(query)
+        intent_type, confidence = self._level2_task_routing(query, fused)
+        return self._recognized_result(intent_type, confidence, fused)
+    
+    async def arecognize(self, query: str) -> Dict:
+        """执行双层意图识别（异步版本，返回值同 recognize）"""
+        fused = {}
+        
+        is_relevant, rejection_info = self._rule_relevance(query)
+        if is_relevant is None:
+            is_relevant = self._relevance_cache.get(query, self._embedder(query, fused))
+            if is_relevant is None:
+                analysis = await self._afused_analysis(query, fused)
+                if analysis is not None:
+                    is_relevant = analysis["relevant"]
+                else:
+                    is_relevant = await self._allm_relevance_check(query, fused)
+            if not is_relevant:
+                rejection_info = IRRELEVANT_REASON
+        if not is_relevant:
+            return self._rejected_result(rejection_info)
         
+        routed = self._rule_routing(query)
+        if routed is None:
+            routed = self._routing_cache.get(query, self._embedder(query, fused))
+        if routed is None:
+            analysis = await self._afused_analysis(query, fused)
+            routed = self._fused_routing(analysis)
+            if routed is None:
+                routed = await self._allm_task_routing(query, fused)
+        return self._recognized_result(routed[0], routed[1], fused)
+    
+    async def batch_recognize(self, queries: List[str], max_concurrency: int = 8) -> List[Dict]:
+        """
+        批量意图识别：关键词规则能判定的问题直接返回，其余问题的LLM调用并发执行
+        
+        重复的问题只识别一次，结果与输入顺序一致
+        
+        Args:
+            queries: 问题列表
+            max_concurrency: 同时识别的最大问题数（对应LLM服务的并发额度）
+        """
+        unique = list(dict.fromkeys(queries))
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def recognize_one(query: str) -> Dict:
+            async with semaphore:
+                return await self.arecognize(query)
+        
+        results = dict(zip(unique, await asyncio.gather(*(recognize_one(q) for q in unique))))
+        return [dict(results[q]) for q in queries]
+    
+    @staticmethod
+    def _rejected_result(rejection_reason: str) -> Dict:
+        """拒绝处理的识别结果"""
+        return {
+            "is_relevant": False,
+            "intent_type": None,
+            "confidence": 0.0,
+            "should_reject": True,
+            "rejection_reason": rejection_reason
+        }
+    
+    @staticmethod
+    def _recognized_result(intent_type: str, confidence: float, fused: Dict) -> Dict:
+        """识别成功的结果"""
+        analysis = fused.get("analysis")
         return {
             "is_relevant": True,
             "intent_type": intent_type,
             "confidence": confidence,
             "should_reject": False,
-            "rejection_reason": None
+            "rejection_reason": None,
+            "entities": analysis["entities"] if analysis else None
         }
     
-    def _level1_relevance_check(self, query: str) -> Tuple[bool, str]:
+    def _fused_analysis(self, query: str, fused: Dict) -> Optional[Dict]:
+        """获取合并预处理结果，同一次识别内只调用一次LLM（解析成功时缓存相关性与路由判定）"""
+        if not config.FUSED_PREPROCESSING:
+            return None
+        if "analysis" not in fused:
+            fused["analysis"] = self.llm.analyze_query(query)
+            self._remember_analysis(query, fused)
+        return fused["analysis"]
+    
+    async def _afused_analysis(self, query: str, fused: Dict) -> Optional[Dict]:
+        """_fused_analysis 的异步版本"""
+        if not config.FUSED_PREPROCESSING:
+            return None
+        if "analysis" not in fused:
+            fused["analysis"] = await self.llm.aanalyze_query(query)
+            self._remember_analysis(query, fused)
+        return fused["analysis"]
+    
+    def _remember_analysis(self, query: str, fused: Dict):
+        """缓存合并预处理得到的相关性与路由判定（实体不缓存）；LLM失败或未能解析时不写入"""
+        analysis = fused["analysis"]
+        if analysis is None:
+            return
+        embed = self._embedder(query, fused)
+        self._relevance_cache.set(query, analysis["relevant"], embed() if embed else None)
+        routed = self._fused_routing(analysis)
+        if analysis["relevant"] and routed is not None:
+            self._routing_cache.set(query, routed, embed() if embed else None)
+    
+    def _rule_relevance(self, query: str) -> Tuple[Optional[bool], Optional[str]]:
+        """
+        关键词规则判定相关性
+        
+        Returns:
+            (is_relevant, rejection_reason)，规则无法判定时 is_relevant 为None
+        """
+        # 安全检查 - 拒绝违规内容
+        if self._has_rejection_keyword(query):
+            return False, SENSITIVE_REASON
+        # 关键词快速判断
+        if self._has_policy_keyword(query):
+            return True, None
+        return None, None
+    
+    def _level1_relevance_check(self, query: str, fused: Optional[Dict] = None) -> Tuple[bool, str]:
         """
         意图识别-1: 基础相关性判定
         
         Returns:
             (is_relevant, rejection_reason)
         """
-        # 1. 安全检查 - 拒绝违规内容
-        for keyword in self.rejection_keywords:
-            if keyword in query:
-                return False, f"检测到敏感内容，请咨询正规渠道"
-        
-        # 2. 关键词快速判断
-        policy_keywords = [
-            "以旧换新", "补贴", "换新", "家电", "数码", "汽车",
-            "政策", "申请", "条件", "流程", "金额", "标准",
-            "手机", "电视", "冰箱", "洗衣机", "空调", "平板"
-        ]
-        
-        has_keyword = any(kw in query for kw in policy_keywords)
+        is_relevant, rejection_info = self._rule_relevance(query)
+        if is_relevant is not None:
+            return is_relevant, rejection_info
         
-        # 3. 如果没有明显关键词，使用LLM判断
-        if not has_keyword:
-            is_relevant = self._llm_relevance_check(query)
-            if not is_relevant:
-                return False, "您的问题似乎与以旧换新政策无关，请询问政策相关问题"
+        # 没有明显关键词，先查判定缓存，未命中再使用LLM判断
+        fused = {} if fused is None else fused
+        is_relevant = self._relevance_cache.get(query, self._embedder(query, fused))
+        if is_relevant is None:
+            analysis = self._fused_analysis(query, fused)
+            if analysis is not None:
+                is_relevant = analysis["relevant"]
+            else:
+                is_relevant = self._llm_relevance_check(query, fused)
+        if not is_relevant:
+            return False, IRRELEVANT_REASON
         
         return True, None
     
-    def _llm_relevance_check(self, query: str) -> bool:
-        """使用LLM进行相关性判断"""
+    def _embedder(self, query: str, holder: Dict) -> Optional[Callable[[], Optional[List[float]]]]:
+        """返回只计算一次问题向量的函数（结果存入holder，供写缓存时复用）"""
+        if self.embed_fn is None:
+            return None
+        
+        def embed():
+            if "embedding" not in holder:
+                holder["embedding"] = self.embed_fn(query)
+            return holder["embedding"]
+        return embed
+    
+    @staticmethod
+    def _relevance_messages(query: str) -> list:
+        """构建相关性判断的提示词"""
         prompt = f"""判断以下问题是否与"消费品以旧换新政策"相关。
 
 问题：{query}
 
 如果相关，回答"是"；如果不相关，回答"否"。
 只需回答一个字。"""
+        return [{"role": "user", "content": prompt}]
+    
+    @staticmethod
+    def _parse_relevance(response: Optional[str]) -> Optional[bool]:
+        """
+        解析相关性判断回复，只认明确的"是"/"否"
         
+        LLMClient 调用失败时不抛异常而是返回错误提示或兜底答案，这类回复返回None
+        """
+        answer = (response or "").strip().strip("\"'“”。.！!")
+        if answer.startswith("是"):
+            return True
+        if answer.startswith(("否", "不")):
+            return False
+        return None
+    
+    def _llm_relevance_check(self, query: str, holder: Optional[Dict] = None) -> bool:
+        """使用LLM进行相关性判断（只缓存明确的是/否回复，近似问题复用）"""
         try:
-            messages = [{"role": "user", "content": prompt}]
-            response = self.llm.chat(messages)
-            return "是" in response
-        except:
-            # LLM调用失败时，保守策略：假设相关
+            is_relevant = self._parse_relevance(self.llm.chat(self._relevance_messages(query)))
+        except Exception:
+            is_relevant = None
+        return self._store_relevance(query, is_relevant, holder)
+    
+    async def _allm_relevance_check(self, query: str, holder: Optional[Dict] = None) -> bool:
+        """_llm_relevance_check 的异步版本"""
+        try:
+            is_relevant = self._parse_relevance(await self.llm.achat(self._relevance_messages(query)))
+        except Exception:
+            is_relevant = None
+        return self._store_relevance(query, is_relevant, holder)
+    
+    def _store_relevance(self, query: str, is_relevant: Optional[bool], holder: Optional[Dict]) -> bool:
+        """写入相关性缓存；LLM调用失败或回复无法解析时保守地假设相关（不缓存）"""
+        if is_relevant is None:
             return True
+        embed = self._embedder(query, {} if holder is None else holder)
+        self._relevance_cache.set(query, is_relevant, embed() if embed else None)
+        return is_relevant
     
-    def _level2_task_routing(self, query: str) -> Tuple[str, float]:
+    @staticmethod
+    def _rule_routing(query: str) -> Optional[Tuple[str, float]]:
+        """特征模式匹配路由，没有任何模式命中时返回None"""
+        # 计算各类型命中的模式数
+        scores = {
+            intent_type: sum(1 for pattern in pattern_list if pattern.search(query))
+            for intent_type, pattern_list in ROUTING_PATTERNS.items()
+        }
+        
+        # 返回得分最高的类型
+        intent_type = max(scores, key=scores.get)
+        if scores[intent_type] == 0:
+            return None
+        return intent_type, min(scores[intent_type] * 0.3, 1.0)
+    
+    @staticmethod
+    def _fused_routing(analysis: Optional[Dict]) -> Optional[Tuple[str, float]]:
+        """采用合并预处理的路由结果，置信度不足时返回None"""
+        if (analysis is not None and analysis["intent"]
+                and analysis["confidence"] >= config.FUSED_MIN_CONFIDENCE):
+            return analysis["intent"], min(analysis["confidence"], 1.0)
+        return None
+    
+    def _level2_task_routing(self, query: str, fused: Optional[Dict] = None) -> Tuple[str, float]:
         """
         意图识别-2: 任务路由
         
         Returns:
             (intent_type, confidence)
         """
-        # 特征模式匹配
-        patterns = {
-            "CALCULATION": [
-                r"补贴.*多少钱", r"能.*补.*多少", r"最[高多].*补贴",
-                r"\d+元", r"计算", r"测算"
-            ],
-            "DATA_QUERY": [
-                r"型号", r"品牌", r"参数", r"哪些.*可以",
-                r"支持.*品牌", r"适用.*产品"
-            ],
-            "RECOMMENDATION": [
-                r"推荐", r"建议", r"最[优好]", r"怎么.*划算",
-                r"选.*还是", r"方案"
-            ],
-            "COMPLEX": [
-                r"对比", r"区别", r"比较", r".*和.*有什么",
-                r"跨.*", r"不同.*政策"
-            ],
-            "POLICY_QA": [
-                r"补贴标准", r"标准", r"细则",
-                r"如何.*申请", r"流程", r"条件", r"范围",
-                r"什么.*时候", r"在哪", r"怎么.*办"
-            ]
-        }
-        
-        # 计算各类型匹配分数
-        scores = {}
-        for intent_type, pattern_list in patterns.items():
-            score = 0
-            for pattern in pattern_list:
-                if re.search(pattern, query):
-                    score += 1
-            scores[intent_type] = score
+        routed = self._rule_routing(query)
+        if routed is not None:
+            return routed
         
-        # 如果没有明显匹配，使用LLM判断
-        if max(scores.values()) == 0:
-            return self._llm_task_routing(query)
-        
-        # 返回得分最高的类型
-        intent_type = max(scores, key=scores.get)
-        confidence = min(scores[intent_type] * 0.3, 1.0)
-        
-        return intent_type, confidence
+        # 如果没有明显匹配，先查判定缓存，未命中再使用LLM判断
+        fused = {} if fused is None else fused
+        routed = self._routing_cache.get(query, self._embedder(query, fused))
+        if routed is not None:
+            return routed
+        analysis = self._fused_analysis(query, fused)
+        return self._fused_routing(analysis) or self._llm_task_routing(query, fused)
     
-    def _llm_task_routing(self, query: str) -> Tuple[str, float]:
-        """使用LLM进行任务路由"""
+    @staticmethod
+    def _routing_messages(query: str) -> list:
+        """构建任务路由的提示词"""
         intent_desc = "\n".join([
             f"{k}: {v}" for k, v in config.INTENT_TYPES.items()
         ])
@@ -163,21 +481,41 @@ class IntentRecognizer:
 {intent_desc}
 
 请只回答类型代码（如：POLICY_QA），不要有其他内容。"""
-        
+        return [{"role": "user", "content": prompt}]
+    
+    @staticmethod
+    def _parse_routing(response: Optional[str]) -> Optional[Tuple[str, float]]:
+        """提取类型代码，回复中没有有效类型代码（含LLM调用失败的提示文本）时返回None"""
+        response = (response or "").strip()
+        return next(
+            ((intent_type, 0.7) for intent_type in config.INTENT_TYPES if intent_type in response),
+            None
+        )
+    
+    def _llm_task_routing(self, query: str, holder: Optional[Dict] = None) -> Tuple[str, float]:
+        """使用LLM进行任务路由（只缓存解析出有效类型代码的回复，近似问题复用）"""
         try:
-            messages = [{"role": "user", "content": prompt}]
-            response = self.llm.chat(messages).strip()
-            
-            # 提取类型代码
-            for intent_type in config.INTENT_TYPES.keys():
-                if intent_type in response:
-                    return intent_type, 0.7
-            
-            # 默认返回政策问答
-            return "POLICY_QA", 0.5
-        except:
-            # LLM调用失败，默认返回政策问答
+            result = self._parse_routing(self.llm.chat(self._routing_messages(query)))
+        except Exception:
+            result = None
+        return self._store_routing(query, result, holder)
+    
+    async def _allm_task_routing(self, query: str, holder: Optional[Dict] = None) -> Tuple[str, float]:
+        """_llm_task_routing 的异步版本"""
+        try:
+            result = self._parse_routing(await self.llm.achat(self._routing_messages(query)))
+        except Exception:
+            result = None
+        return self._store_routing(query, result, holder)
+    
+    def _store_routing(self, query: str, result: Optional[Tuple[str, float]],
+                       holder: Optional[Dict]) -> Tuple[str, float]:
+        """写入路由缓存；LLM调用失败或未识别出类型时默认返回政策问答（不缓存）"""
+        if result is None:
             return "POLICY_QA", 0.5
+        embed = self._embedder(query, {} if holder is None else holder)
+        self._routing_cache.set(query, result, embed() if embed else None)
+        return result
 
 
 class RejectionHandler:
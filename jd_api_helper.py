@@ -5,10 +5,25 @@
 import hashlib
 import time
 import json
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 from urllib.parse import quote
 
 
+# 最近一次格式化的时间戳：(整秒, 格式化字符串)，同一秒内的请求直接复用
+_timestamp_cache = (0, "")
+
+
+def _now_timestamp() -> str:
+    """当前时间的京东API时间戳格式（按秒缓存，避免重复调用strftime）"""
+    global _timestamp_cache
+    now = int(time.time())
+    cached_sec, cached_str = _timestamp_cache
+    if cached_sec != now:
+        cached_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now))
+        _timestamp_cache = (now, cached_str)
+    return cached_str
+
+
 class JDAPIHelper:
     """京东联盟API辅助类"""
     
@@ -41,32 +56,44 @@ class JDAPIHelper:
         Returns:
             签名字符串
         """
-        # 过滤掉sign参数并排序
-        sorted_params = sorted(
-            [(k, v) for k, v in params.items() if k != 'sign' and v is not None],
-            key=lambda x: x[0]
-        )
-        
-        # 拼接字符串: secret + key1value1key2value2... + secret
-        sign_str = self.app_secret
-        for key, value in sorted_params:
-            # 处理值，转换为字符串
+        # 参数按键名排序，跳过sign和空值，值统一转为字符串后走有序签名路径
+        items = []
+        for key, value in sorted(params.items()):
+            if key == 'sign' or value is None:
+                continue
             if isinstance(value, (dict, list)):
                 value = json.dumps(value, separators=(',', ':'), ensure_ascii=False)
-            else:
+            elif not isinstance(value, str):
                 value = str(value)
-            sign_str += f"{key}{value}"
-        sign_str += self.app_secret
+            items.append((key, value))
+        return self.generate_sign_ordered(items)
+    
+    def generate_sign_ordered(self, ordered_items: List[Tuple[str, str]]) -> str:
+        """
+        对已按键名排好序的参数生成签名（不再排序，供内部构建参数时使用）
         
-        # MD5加密并转大写
-        md5_hash = hashlib.md5(sign_str.encode('utf-8')).hexdigest()
-        return md5_hash.upper()
+        Args:
+            ordered_items: 按键名升序排列的 (key, value) 列表，value 已是字符串且不含sign
+        
+        Returns:
+            签名字符串
+        """
+        # 拼接字符串: secret + key1value1key2value2... + secret
+        parts = [self.app_secret]
+        for key, value in ordered_items:
+            parts.append(key)
+            parts.append(value)
+        parts.append(self.app_secret)
+        
+        # MD5加密并转大写（签名用途，非安全场景）
+        return hashlib.md5("".join(parts).encode('utf-8'), usedforsecurity=False).hexdigest().upper()
     
     def build_request_params(
         self,
         method: str,
         param_json: Dict[str, Any],
-        version: str = "1.0"
+        version: str = "1.0",
+        timestamp: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         构建京东API请求参数
@@ -75,26 +102,29 @@ class JDAPIHelper:
             method: API方法名，如 "jd.union.open.goods.query"
             param_json: 业务参数
             version: API版本号
+            timestamp: 请求时间戳（批量构建请求时可传入同一个值复用），缺省为当前时间
         
         Returns:
             完整的请求参数
         """
-        # 基础参数
-        params = {
-            "app_key": self.app_key,
-            "method": method,
-            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-            "format": "json",
-            "v": version,
-            "sign_method": "md5",
-        }
+        # 基础参数，直接按键名字母序构建，签名时无需再排序
+        items = [
+            ("app_key", self.app_key),
+            ("format", "json"),
+            ("method", method),
+        ]
         
         # 添加业务参数(需要JSON序列化)
         if param_json:
-            params["param_json"] = json.dumps(param_json, separators=(',', ':'), ensure_ascii=False)
+            items.append(("param_json", json.dumps(param_json, separators=(',', ':'), ensure_ascii=False)))
+        
+        items.append(("sign_method", "md5"))
+        items.append(("timestamp", timestamp or _now_timestamp()))
+        items.append(("v", version))
         
         # 生成签名
-        params["sign"] = self.generate_sign(params)
+        params = dict(items)
+        params["sign"] = self.generate_sign_ordered(items)
         
         return params
     
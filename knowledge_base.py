@@ -20,6 +20,7 @@ except ImportError:
     sqlite3.sqlite_version_info = (3, 35, 0)
     sqlite3.sqlite_version = '3.35.0'
 
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 from langchain_community.vectorstores import FAISS  # 使用FAISS代替Chroma
 from langchain.schema import Document
@@ -28,6 +29,72 @@ from simple_embeddings import SimpleEmbeddings  # 使用简化向量模型
 import config
 import json
 import hashlib
+import itertools
+import re
+import tempfile
+import threading
+import numpy as np
+
+# 可选：orjson 加速注册表/boost配置的读写（未安装时使用标准库json）
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# 可选：直接操作FAISS索引（HNSW建索引、增量更新时复制索引）；未安装时使用langchain默认的扁平索引并原地追加
+try:
+    import faiss
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    FAISS_AVAILABLE = True
+except ImportError:
+    FAISS_AVAILABLE = False
+
+
+SNIPPET_LENGTH = 200  # 注册表中保存的文档摘要长度（/policies 列表直接返回）
+HASH_SAMPLE_LENGTH = 10000  # 变更检测只对文档开头部分做摘要
+HASH_ALGO = "blake2b-64"  # 注册表摘要算法（仅用于变更检测，无安全要求）
+SYNC_MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)  # 同步时并行stat/摘要的线程数（I/O密集）
+
+# 政策类别推断规则：按顺序匹配，每个类别的关键词预编译为一个正则
+CATEGORY_PATTERNS = [
+    ("消费活动", re.compile("|".join(map(re.escape, ["消费券", "泉城购", "活动", "公告", "首保", "购新"])), re.IGNORECASE)),
+    ("以旧换新", re.compile("|".join(map(re.escape, ["以旧换新", "实施细则", "实施方案", "补贴", "换新"])), re.IGNORECASE)),
+]
+
+
+def _content_hash(text: str) -> str:
+    """文档内容摘要（用于增量同步的变更检测）"""
+    sample = text[:HASH_SAMPLE_LENGTH].encode("utf-8", errors="ignore")
+    return hashlib.blake2b(sample, digest_size=8).hexdigest()
+
+
+def _read_json(path: str):
+    """读取JSON文件"""
+    with open(path, "rb") as f:
+        raw = f.read()
+    return orjson.loads(raw) if ORJSON_AVAILABLE else json.loads(raw)
+
+
+def _atomic_write_json(path: str, data) -> None:
+    """原子写入JSON：先写同目录临时文件并落盘，再 os.replace 覆盖，崩溃时不会留下半截文件"""
+    if ORJSON_AVAILABLE:
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    else:
+        payload = json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
 
 
 class KnowledgeBase:
@@ -43,6 +110,12 @@ class KnowledgeBase:
         print("✓ 向量模型加载成功（使用TF-IDF）")
         self._registry_file = os.path.join(config.METADATA_KB_DIR, "policy_registry.json")
         self._boosts_file = os.path.join(config.METADATA_KB_DIR, "boosts.json")
+        self._boosts_cache = None  # 已解析的boost配置，按文件修改时间失效
+        self._boosts_mtime = None
+        self._doc_attrs_key = None  # 按FAISS行号对齐的来源/类别编码，索引变化后重建
+        self._doc_attrs = None
+        self._doc_rows = {}  # 文档对象id -> FAISS行号，与 _doc_attrs 同时重建
+        self._write_lock = threading.RLock()  # 串行化索引写入（同步/单文件入库），检索不加锁
     
     def build_knowledge_base(self, force_rebuild: bool = False):
         """构建知识库"""
@@ -55,6 +128,7 @@ class KnowledgeBase:
                 self.embeddings,
                 allow_dangerous_deserialization=True
             )
+            self._tune_index(self.vectorstore.index)
             print(f"知识库加载完成")
         else:
             print("开始构建知识库...")
@@ -75,10 +149,7 @@ class KnowledgeBase:
                 
                 # 创建向量数据库（使用FAISS）
                 print("正在构建 FAISS 索引...")
-                self.vectorstore = FAISS.from_documents(
-                    documents=chunks,
-                    embedding=self.embeddings
-                )
+                self.vectorstore = self._create_vectorstore(chunks)
                 
                 # 保存索引
                 os.makedirs(config.CHROMA_DB_DIR, exist_ok=True)
@@ -87,6 +158,32 @@ class KnowledgeBase:
             else:
                 print("警告: 没有找到有效的文档内容")
     
+    def _create_vectorstore(self, chunks: List[Document]):
+        """创建向量库：块数较多时使用HNSW图索引，否则使用默认扁平索引（精确检索）"""
+        if not FAISS_AVAILABLE or len(chunks) < config.FAISS_HNSW_MIN_CHUNKS:
+            return FAISS.from_documents(documents=chunks, embedding=self.embeddings)
+        
+        dim = len(self.embeddings.embed_query(chunks[0].page_content))
+        index = faiss.IndexHNSWFlat(dim, config.FAISS_HNSW_M)
+        index.hnsw.efConstruction = config.FAISS_HNSW_EF_CONSTRUCTION
+        vectorstore = FAISS(
+            embedding_function=self.embeddings,
+            index=index,
+            docstore=InMemoryDocstore(),
+            index_to_docstore_id={}
+        )
+        # add_documents 直接调用 index.add 写入图索引，后续增量入库同样不触发重建
+        vectorstore.add_documents(chunks)
+        self._tune_index(index)
+        print(f"已使用HNSW索引（M={config.FAISS_HNSW_M}）")
+        return vectorstore
+    
+    def _tune_index(self, index):
+        """为HNSW索引设置检索参数（加载已有索引时同样按当前配置覆盖），扁平索引无需处理"""
+        hnsw = getattr(index, "hnsw", None)
+        if hnsw is not None:
+            hnsw.efSearch = config.FAISS_HNSW_EF_SEARCH
+    
     def search(self, query: str, top_k: int = None) -> List[Document]:
         """检索相关文档(优化版:增加阈值过滤)"""
         if self.vectorstore is None:
@@ -107,61 +204,134 @@ class KnowledgeBase:
         return filtered_results if filtered_results else [doc for doc, _ in results_with_scores[:top_k]]
     
     def sync_knowledge_base(self, force_rebuild_on_modified: bool = True):
-        """增量同步：新增文件增量写入；有修改则重建索引"""
+        """增量同步：新增文件增量写入；修改的文件删除旧块后重新写入（索引不支持删除时重建）"""
         os.makedirs(config.METADATA_KB_DIR, exist_ok=True)
         registry = self._load_registry()
         # 扫描当前文档
         documents = self.doc_loader.load_all_documents(config.DOCS_DIR)
+        # 各文档的stat与摘要相互独立，多线程并行；map保持原有文档顺序，注册表比对仍在当前线程完成
+        max_workers = min(SYNC_MAX_WORKERS, len(documents)) or 1
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="kb-sync") as executor:
+            infos = list(executor.map(self._stat_and_hash, documents))
+        
         new_docs = []
-        modified_detected = False
-        for doc in documents:
-            fp = doc.metadata.get("file_path")
-            try:
-                mtime = os.path.getmtime(fp)
-            except Exception:
-                mtime = 0
-            content_sample = doc.page_content[:10000]
-            h = hashlib.md5(content_sample.encode("utf-8", errors="ignore")).hexdigest()
-            key = doc.metadata.get("source", os.path.basename(fp))
+        modified_docs = []
+        for doc, (key, entry) in zip(documents, infos):
+            mtime, h = entry["mtime"], entry["hash"]
             prev = registry.get(key)
             if not prev:
                 new_docs.append(doc)
-                registry[key] = {"file_path": fp, "mtime": mtime, "hash": h}
             else:
-                if prev.get("hash") != h or prev.get("mtime") != mtime:
-                    modified_detected = True
-                    registry[key] = {"file_path": fp, "mtime": mtime, "hash": h}
-        if self.vectorstore is None:
-            # 初次
-            self.build_knowledge_base(force_rebuild=False)
-        else:
-            if modified_detected and force_rebuild_on_modified:
-                # 存在修改，重建全量索引避免重复
-                self.build_knowledge_base(force_rebuild=True)
-            elif new_docs:
-                # 对新增文档执行增量索引
-                chunks = self.doc_loader.split_documents(new_docs)
-                if chunks:
-                    self.vectorstore.add_documents(chunks)
-                    faiss_index_path = os.path.join(config.CHROMA_DB_DIR, "faiss_index")
-                    os.makedirs(config.CHROMA_DB_DIR, exist_ok=True)
-                    self.vectorstore.save_local(faiss_index_path)
+                # 旧注册表的摘要算法不同（如md5）时无法比较摘要，仅按修改时间判定，随后写入新摘要完成迁移
+                same_algo = prev.get("hash_algo", "md5") == HASH_ALGO
+                if (same_algo and prev.get("hash") != h) or prev.get("mtime") != mtime:
+                    modified_docs.append((key, doc))
+            registry[key] = entry
+        modified_detected = bool(modified_docs)
+        with self._write_lock:
+            if self.vectorstore is None:
+                # 初次
+                self.build_knowledge_base(force_rebuild=False)
+            else:
+                changed_docs = list(new_docs)
+                remove_sources = set()
+                if modified_docs and force_rebuild_on_modified:
+                    # 只删除修改过的文档的旧块并重新写入，其余块保持不动
+                    remove_sources = {key for key, _ in modified_docs}
+                    changed_docs.extend(doc for _, doc in modified_docs)
+                chunks = self.doc_loader.split_documents(changed_docs) if changed_docs else []
+                if (chunks or remove_sources) and not self._update_vectorstore(chunks, remove_sources):
+                    # 索引不支持删除（如HNSW），重建全量索引避免重复
+                    self.build_knowledge_base(force_rebuild=True)
         self._save_registry(registry)
         print("知识库同步完成：新增", len(new_docs), "条；修改检测：", modified_detected)
 
+    def _update_vectorstore(self, chunks: List[Document], remove_sources: set = frozenset()) -> bool:
+        """
+        增量更新向量库：在副本上删除指定来源的旧块并写入新块，完成后整体替换引用并保存
+        
+        并发检索拿到的始终是完整的旧库或新库，不会读到删除后行号已前移、新块尚未写入的中间状态。
+        
+        Returns:
+            是否完成更新；需要删除但索引不支持（如HNSW）或无法复制索引时返回False，由调用方回退为全量重建
+        """
+        with self._write_lock:
+            can_remove = getattr(self.vectorstore.index, "hnsw", None) is None
+            if remove_sources and not (FAISS_AVAILABLE and can_remove):
+                return False
+            # 无法复制索引时只能原地追加（仅新增块，不涉及删除）
+            vectorstore = self._clone_vectorstore() if FAISS_AVAILABLE else self.vectorstore
+            if remove_sources and not self._remove_sources(vectorstore, remove_sources):
+                return False
+            if chunks:
+                vectorstore.add_documents(chunks)
+            self.vectorstore = vectorstore
+            # 按行号对齐的来源/类别编码随之失效
+            self._doc_attrs_key = None
+            faiss_index_path = os.path.join(config.CHROMA_DB_DIR, "faiss_index")
+            os.makedirs(config.CHROMA_DB_DIR, exist_ok=True)
+            vectorstore.save_local(faiss_index_path)
+            return True
+
+    def _clone_vectorstore(self):
+        """复制当前向量库（索引、docstore与行号映射各自独立），供增量更新在副本上修改"""
+        vectorstore = self.vectorstore
+        return FAISS(
+            embedding_function=vectorstore.embedding_function,
+            index=faiss.clone_index(vectorstore.index),
+            docstore=InMemoryDocstore(dict(vectorstore.docstore._dict)),
+            index_to_docstore_id=dict(vectorstore.index_to_docstore_id),
+            relevance_score_fn=vectorstore.override_relevance_score_fn,
+            normalize_L2=vectorstore._normalize_L2,
+            distance_strategy=vectorstore.distance_strategy
+        )
+
+    @staticmethod
+    def _remove_sources(vectorstore, sources: set) -> bool:
+        """从给定向量库中删除指定来源的全部文本块（FAISS remove_ids），失败时返回False"""
+        docstore = vectorstore.docstore
+        doc_ids = []
+        for doc_id in vectorstore.index_to_docstore_id.values():
+            doc = docstore.search(doc_id)
+            if isinstance(doc, Document) and doc.metadata.get("source") in sources:
+                doc_ids.append(doc_id)
+        if not doc_ids:
+            return True
+        try:
+            vectorstore.delete(doc_ids)
+        except Exception as e:
+            print("删除旧文本块失败，将重建索引:", e)
+            return False
+        return True
+
+    def _stat_and_hash(self, doc: Document) -> tuple:
+        """计算单个文档的注册表条目（修改时间 + 内容摘要），返回 (注册表键, 条目)"""
+        fp = doc.metadata.get("file_path")
+        try:
+            mtime = os.path.getmtime(fp)
+        except Exception:
+            mtime = 0
+        key = doc.metadata.get("source", os.path.basename(fp))
+        entry = {
+            "file_path": fp,
+            "mtime": mtime,
+            "hash": _content_hash(doc.page_content),
+            "hash_algo": HASH_ALGO,
+            "snippet": doc.page_content[:SNIPPET_LENGTH],
+        }
+        return key, entry
+
     def _load_registry(self) -> dict:
         try:
             if os.path.isfile(self._registry_file):
-                with open(self._registry_file, "r", encoding="utf-8") as f:
-                    return json.load(f)
+                return _read_json(self._registry_file)
         except Exception:
             pass
         return {}
 
     def _save_registry(self, data: dict):
         try:
-            with open(self._registry_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            _atomic_write_json(self._registry_file, data)
         except Exception as e:
             print("保存注册表失败:", e)
 
@@ -176,7 +346,6 @@ class KnowledgeBase:
         # 检索更多结果以便去重后仍有足够数据
         results = self.vectorstore.similarity_search_with_score(query, k=top_k * 3)
         boosted_results = self._apply_boosts(results)
-        boosted_results.sort(key=lambda x: float(x[1]))
         
         # 按文档来源去重，保留每个文档的最佳匹配块
         seen_sources = set()
@@ -191,35 +360,40 @@ class KnowledgeBase:
         
         return deduplicated
 
-    def _infer_category(self, doc: Document) -> str:
-        """根据文件名/内容粗略推断政策类别"""
-        name = (doc.metadata.get("source") or "").lower()
-        text = (doc.page_content or "").lower()
-        keywords_oldnew = ["以旧换新", "实施细则", "实施方案", "补贴", "换新"]
-        keywords_activity = ["消费券", "泉城购", "活动", "公告", "首保", "购新"]
-        for kw in keywords_activity:
-            if kw in name or kw in text:
-                return "消费活动"
-        for kw in keywords_oldnew:
-            if kw in name or kw in text:
-                return "以旧换新"
+    @staticmethod
+    def _infer_category(doc: Document) -> str:
+        """根据文件名/内容粗略推断政策类别（不写入文档元数据，结果由 _doc_attributes 按行缓存）"""
+        name = doc.metadata.get("source") or ""
+        text = doc.page_content or ""
+        for candidate, pattern in CATEGORY_PATTERNS:
+            if pattern.search(name) or pattern.search(text):
+                return candidate
         return "其他"
 
     def _load_boosts(self) -> dict:
+        """读取boost配置（按文件修改时间缓存，文件未变化时不重复读盘解析）"""
+        try:
+            mtime = os.stat(self._boosts_file).st_mtime_ns
+        except OSError:
+            mtime = None
+        if self._boosts_cache is not None and mtime == self._boosts_mtime:
+            return self._boosts_cache
+        boosts = {"source": {}, "category": {}}
         try:
-            if os.path.isfile(self._boosts_file):
-                with open(self._boosts_file, "r", encoding="utf-8") as f:
-                    return json.load(f)
+            if mtime is not None:
+                boosts = _read_json(self._boosts_file)
         except Exception:
             pass
-        return {"source": {}, "category": {}}
+        self._boosts_cache, self._boosts_mtime = boosts, mtime
+        return boosts
 
     def _save_boosts(self, data: dict):
         try:
             os.makedirs(config.METADATA_KB_DIR, exist_ok=True)
-            with open(self._boosts_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            _atomic_write_json(self._boosts_file, data)
+            self._boosts_cache, self._boosts_mtime = data, os.stat(self._boosts_file).st_mtime_ns
         except Exception as e:
+            self._boosts_cache = None
             print("保存boosts失败:", e)
 
     def get_boosts(self) -> dict:
@@ -242,18 +416,152 @@ class KnowledgeBase:
         return boosts
 
     def _apply_boosts(self, results: List[tuple]) -> List[tuple]:
-        """对检索结果应用boost：FAISS返回的是距离分数，越小越相似，因此降低分数实现提升"""
+        """
+        对检索结果应用boost并按调整后分数升序返回
+        FAISS返回的是距离分数，越小越相似，因此降低分数实现提升
+        """
+        if not results:
+            return []
+        docs = [doc for doc, _ in results]
+        n = len(docs)
+        
+        scores = np.fromiter((score for _, score in results), dtype=np.float32, count=n)
+        offsets = self._boost_offsets(docs, self._load_boosts())
+        if offsets is not None:
+            scores -= offsets
+        np.maximum(scores, 0.0, out=scores)
+        
+        order = np.argsort(scores, kind="stable")
+        return [(docs[i], float(scores[i])) for i in order]
+
+    def _boost_offsets(self, docs: List[Document], boosts: dict):
+        """计算每个文档的boost偏移量（float32数组），未配置任何boost时返回None"""
+        source_boosts = boosts.get("source", {})
+        category_boosts = boosts.get("category", {})
+        if not source_boosts and not category_boosts:
+            return None
+        n = len(docs)
+        offsets = np.zeros(n, dtype=np.float32)
+        # 未配置对应boost时跳过逐文档查找（类别推断需要扫描全文，开销较大）
+        if source_boosts:
+            offsets += np.fromiter(
+                (source_boosts.get(doc.metadata.get("source", "Unknown"), 0.0) for doc in docs),
+                dtype=np.float32, count=n
+            )
+        if category_boosts:
+            # 向量库中的块直接取 _doc_attributes 已缓存的类别编码，其余文档现场推断
+            _, _, cat_codes, cat_names = self._doc_attributes()
+            weights = self._boost_table(cat_names, category_boosts)
+            rows = self._doc_rows
+            offsets += np.fromiter(
+                (weights[cat_codes[rows[id(doc)]]] if id(doc) in rows
+                 else category_boosts.get(self._infer_category(doc), 0.0) for doc in docs),
+                dtype=np.float32, count=n
+            )
+        return offsets
+
+    def _doc_attributes(self) -> tuple:
+        """
+        按FAISS行号对齐的文档来源/类别（编码数组 + 名称表），向量库替换或新增块后重建
+        
+        Returns:
+            (来源编码, 来源名称, 类别编码, 类别名称)
+        """
+        vectorstore = self.vectorstore
+        key = (id(vectorstore), vectorstore.index.ntotal)
+        if self._doc_attrs_key != key:
+            docstore = vectorstore.docstore
+            id_map = vectorstore.index_to_docstore_id
+            sources, categories = [], []
+            doc_rows = {}
+            for i in range(vectorstore.index.ntotal):
+                doc = docstore.search(id_map[i]) if i in id_map else None
+                if isinstance(doc, Document):
+                    doc_rows[id(doc)] = i
+                    sources.append(doc.metadata.get("source", "Unknown"))
+                    categories.append(self._infer_category(doc))
+                else:
+                    sources.append("Unknown")
+                    categories.append("其他")
+            src_names, src_codes = np.unique(sources, return_inverse=True)
+            cat_names, cat_codes = np.unique(categories, return_inverse=True)
+            self._doc_attrs = (src_codes, src_names.tolist(), cat_codes, cat_names.tolist())
+            # docstore持有这些文档对象，向量库未替换前对象id不会被复用
+            self._doc_rows = doc_rows
+            self._doc_attrs_key = key
+        return self._doc_attrs
+
+    @staticmethod
+    def _boost_table(names: List[str], weights: dict) -> np.ndarray:
+        """名称表对应的boost查找表（按编码下标取值）"""
+        return np.fromiter((weights.get(name, 0.0) for name in names), dtype=np.float32, count=len(names))
+
+    def batch_search(self, queries: List[str], top_k: int = None) -> List[List[tuple]]:
+        """
+        批量检索（评测/批处理场景）：一次向量化全部问题并调用一次FAISS检索，
+        boost与排序在numpy中完成，每个问题的返回结果与 search_with_score 一致
+        """
+        if self.vectorstore is None:
+            raise ValueError("知识库未初始化，请先调用 build_knowledge_base()")
+        if top_k is None:
+            top_k = config.TOP_K
+        if not queries:
+            return []
+        
+        index = self.vectorstore.index
+        k = min(top_k * 3, index.ntotal)
+        if k <= 0:
+            return [[] for _ in queries]
+        
+        vectors = np.asarray(self.embeddings.embed_documents(list(queries)), dtype=np.float32)
+        if getattr(self.vectorstore, "_normalize_L2", False):
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            np.divide(vectors, norms, out=vectors, where=norms > 0)
+        distances, indices = index.search(vectors, k)
+        
+        # 各问题命中的块去重后只取一次文档、只计算一次boost
+        unique_ids, inverse = np.unique(indices, return_inverse=True)
+        inverse = inverse.reshape(indices.shape)
+        docstore = self.vectorstore.docstore
+        id_map = self.vectorstore.index_to_docstore_id
+        docs = [None if i < 0 else docstore.search(id_map[int(i)]) for i in unique_ids]
+        valid = np.fromiter((isinstance(doc, Document) for doc in docs), dtype=bool, count=len(docs))
+        
+        scores = distances.astype(np.float32, copy=True)
         boosts = self._load_boosts()
-        adjusted = []
-        for doc, score in results:
-            bonus = 0.0
-            source = doc.metadata.get("source", "Unknown")
-            category = self._infer_category(doc)
-            bonus += float(boosts.get("source", {}).get(source, 0.0))
-            bonus += float(boosts.get("category", {}).get(category, 0.0))
-            new_score = max(float(score) - bonus, 0.0)
-            adjusted.append((doc, new_score))
-        return adjusted
+        source_boosts = boosts.get("source", {})
+        category_boosts = boosts.get("category", {})
+        if source_boosts or category_boosts:
+            # 按行号查编码、按编码查boost表，整个命中矩阵一次完成
+            src_codes, src_names, cat_codes, cat_names = self._doc_attributes()
+            rows = np.where(indices >= 0, indices, 0)
+            if source_boosts:
+                scores -= self._boost_table(src_names, source_boosts)[src_codes[rows]]
+            if category_boosts:
+                scores -= self._boost_table(cat_names, category_boosts)[cat_codes[rows]]
+        np.maximum(scores, 0.0, out=scores)
+        # 无效命中（faiss补位的-1或已删除的块）排到最后
+        scores[~valid[inverse]] = np.inf
+        order = np.argsort(scores, axis=1, kind="stable")
+        
+        # 按文档来源去重，保留每个文档的最佳匹配块
+        batch_results = []
+        for row in range(len(queries)):
+            seen_sources = set()
+            deduplicated = []
+            for col in order[row]:
+                u = inverse[row, col]
+                if not valid[u]:
+                    break
+                doc = docs[u]
+                source = doc.metadata.get("source", "Unknown")
+                if source not in seen_sources:
+                    seen_sources.add(source)
+                    deduplicated.append((doc, float(scores[row, col])))
+                    if len(deduplicated) >= top_k:
+                        break
+            batch_results.append(deduplicated)
+        return batch_results
 
     def get_stats(self) -> dict:
         """获取知识库统计信息"""
@@ -283,6 +591,20 @@ class KnowledgeBase:
                 stats["total_chunks"] = 0
         return stats
 
+    def list_documents(self, offset: int = 0, limit: int = 10) -> List[dict]:
+        """分页列出已入库文档（只读注册表，不做向量检索）"""
+        registry = self._load_registry()
+        offset = max(offset, 0)
+        return [
+            {
+                "source": key,
+                "file_path": value.get("file_path", "Unknown"),
+                "last_modified": value.get("mtime", 0),
+                "snippet": value.get("snippet", "")
+            }
+            for key, value in itertools.islice(registry.items(), offset, offset + max(limit, 0))
+        ]
+
     def index_file(self, file_path: str) -> dict:
         """单文件快速入库（T+0）：解析、切分并增量写入索引，同时更新注册表"""
         text = self.doc_loader.load_document(file_path)
@@ -294,19 +616,16 @@ class KnowledgeBase:
             # 若尚未初始化索引，则先构建
             self.build_knowledge_base(force_rebuild=False)
         if chunks:
-            self.vectorstore.add_documents(chunks)
-            faiss_index_path = os.path.join(config.CHROMA_DB_DIR, "faiss_index")
-            os.makedirs(config.CHROMA_DB_DIR, exist_ok=True)
-            self.vectorstore.save_local(faiss_index_path)
+            self._update_vectorstore(chunks)
         # 更新注册表
         try:
             mtime = os.path.getmtime(file_path)
         except Exception:
             mtime = 0
-        h = hashlib.md5(text[:10000].encode("utf-8", errors="ignore")).hexdigest()
+        h = _content_hash(text)
         key = os.path.basename(file_path)
         registry = self._load_registry()
-        registry[key] = {"file_path": file_path, "mtime": mtime, "hash": h}
+        registry[key] = {"file_path": file_path, "mtime": mtime, "hash": h, "hash_algo": HASH_ALGO, "snippet": text[:SNIPPET_LENGTH]}
         self._save_registry(registry)
         return {"message": "单文件入库完成", "added_chunks": len(chunks), "source": key}
 
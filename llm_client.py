@@ -1,12 +1,16 @@
 """
 大模型调用模块 - 支持千帆和OpenAI兼容接口
 """
+import asyncio
 import config
+import json
+import re
+from typing import Dict, Iterator, Optional
 
 if config.USE_QIANFAN:
     import qianfan
 else:
-    from openai import OpenAI
+    from openai import AsyncOpenAI, OpenAI
 
 
 class LLMClient:
@@ -24,6 +28,7 @@ class LLMClient:
                 timeout=30.0,  # 优化为30秒超时
                 max_retries=2   # 减少重试次数提升响应速度
             )
+        self.async_client = None  # 异步客户端，首次调用 achat 时创建
     
     def chat(self, messages: list, stream: bool = False) -> str:
         """调用大模型进行对话"""
@@ -32,15 +37,81 @@ class LLMClient:
                 return self._chat_qianfan(messages, stream)
             else:
                 return self._chat_openai(messages, stream)
+        except Exception as e:
+            return self._error_answer(e, messages)
+    
+    async def achat(self, messages: list) -> str:
+        """
+        调用大模型进行对话（异步版本），多个请求可在同一事件循环内并发等待
+        
+        千帆SDK没有异步接口，在线程池中执行 chat
+        """
+        if config.USE_QIANFAN:
+            return await asyncio.to_thread(self.chat, messages)
+        
+        if self.async_client is None:
+            self.async_client = AsyncOpenAI(
+                api_key=config.OPENAI_API_KEY,
+                base_url=config.OPENAI_BASE_URL,
+                timeout=30.0,
+                max_retries=2
+            )
+        try:
+            response = await self.async_client.chat.completions.create(
+                model=config.OPENAI_MODEL,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=2000,
+                top_p=0.9
+            )
+            return response.choices[0].message.content
+        except Exception as e:
+            return self._error_answer(e, messages)
+    
+    def _error_answer(self, e: Exception, messages: list) -> str:
+        """调用失败时的回答"""
+        error_msg = str(e)
+        print(f"调用大模型失败: {error_msg}")
+        
+        # 降级方案：基于检索结果生成简单回答
+        if "Connection error" in error_msg or "timeout" in error_msg.lower():
+            return self._fallback_answer(messages)
+        
+        return f"抱歉，系统出现错误: {error_msg}"
+    
+    def stream_chat(self, messages: list) -> Iterator[str]:
+        """流式调用大模型，逐段返回生成内容"""
+        try:
+            if config.USE_QIANFAN:
+                resp = self.client.do(
+                    model=config.QIANFAN_MODEL,
+                    messages=messages,
+                    stream=True
+                )
+                for chunk in resp:
+                    if chunk.get("result"):
+                        yield chunk["result"]
+            else:
+                response = self.client.chat.completions.create(
+                    model=config.OPENAI_MODEL,
+                    messages=messages,
+                    stream=True,
+                    temperature=0.7,
+                    max_tokens=2000,
+                    top_p=0.9
+                )
+                for chunk in response:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
         except Exception as e:
             error_msg = str(e)
             print(f"调用大模型失败: {error_msg}")
             
-            # 降级方案：基于检索结果生成简单回答
+            # 降级方案与chat保持一致
             if "Connection error" in error_msg or "timeout" in error_msg.lower():
-                return self._fallback_answer(messages)
-            
-            return f"抱歉，系统出现错误: {error_msg}"
+                yield self._fallback_answer(messages)
+            else:
+                yield f"抱歉，系统出现错误: {error_msg}"
     
     def _fallback_answer(self, messages: list) -> str:
         """降级回答：当LLM无法连接时使用"""
@@ -172,6 +243,78 @@ class LLMClient:
         else:
             return response.choices[0].message.content
     
+    def analyze_query(self, question: str) -> Optional[Dict]:
+        """
+        一次调用完成问题预处理：相关性判定 + 任务路由 + 实体抽取
+        
+        Returns:
+            {
+                "relevant": bool,
+                "intent": str,        # config.INTENT_TYPES 中的类型代码
+                "confidence": float,
+                "entities": {"amounts": [...], "products": [...], "locations": [...],
+                             "time_ranges": [...], "actions": [...]}
+            }
+            解析失败返回None，由调用方回退到独立调用
+        """
+        return self._parse_analysis(self.chat(self._analysis_messages(question)))
+    
+    async def aanalyze_query(self, question: str) -> Optional[Dict]:
+        """analyze_query 的异步版本"""
+        return self._parse_analysis(await self.achat(self._analysis_messages(question)))
+    
+    def _analysis_messages(self, question: str) -> list:
+        """构建问题预处理的提示词"""
+        intent_desc = "\n".join([
+            f"{k}: {v}" for k, v in config.INTENT_TYPES.items()
+        ])
+        
+        prompt = f"""请分析以下用户问题，以 JSON 格式返回。
+
+问题：{question}
+
+字段说明：
+- relevant: 是否与"消费品以旧换新政策"相关（true/false）
+- intent: 需求类型代码，从以下选项中选择：
+{intent_desc}
+- confidence: 对 intent 判断的置信度（0~1）
+- entities: 实体，包含 amounts（金额数字列表）、products（产品类型列表）、locations（地点列表）、time_ranges（时间范围列表）、actions（用户动作列表）
+
+示例输出：
+{{"relevant": true, "intent": "CALCULATION", "confidence": 0.9, "entities": {{"amounts": [3000], "products": ["冰箱"], "locations": ["济南"], "time_ranges": [], "actions": ["购买"]}}}}
+
+只返回 JSON，不要其他内容。"""
+        
+        return [{"role": "user", "content": prompt}]
+    
+    def _parse_analysis(self, response: Optional[str]) -> Optional[Dict]:
+        """解析问题预处理结果，解析失败返回None"""
+        json_match = re.search(r'\{.*\}', response or "", re.DOTALL)
+        if not json_match:
+            return None
+        try:
+            data = json.loads(json_match.group())
+            confidence = float(data.get("confidence", 0) or 0)
+        except (ValueError, TypeError, AttributeError):
+            return None
+        
+        entities = data.get("entities")
+        if not isinstance(entities, dict):
+            entities = {}
+        
+        return {
+            "relevant": bool(data.get("relevant", True)),
+            "intent": data.get("intent") if data.get("intent") in config.INTENT_TYPES else None,
+            "confidence": confidence,
+            "entities": {
+                "amounts": entities.get("amounts", []),
+                "products": entities.get("products", []),
+                "locations": entities.get("locations", []),
+                "time_ranges": entities.get("time_ranges", []),
+                "actions": entities.get("actions", [])
+            }
+        }
+    
     def generate_answer(self, question: str, context: str) -> str:
         """基于检索上下文生成答案"""
         messages = [
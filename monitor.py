@@ -4,7 +4,7 @@
 import time
 import json
 import os
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, List, Optional
 from collections import deque
 import config
@@ -15,6 +15,7 @@ class MonitoringSystem:
     
     def __init__(self):
         self.metrics_history = deque(maxlen=1000)  # 保留最近1000条记录
+        self._metric_times = deque(maxlen=1000)  # 与 metrics_history 对齐的单调时钟时间，用于时间窗口筛选
         self.alert_records = []
         self.metrics_file = os.path.join(config.LOG_DIR, "metrics.json")
         self.alert_file = os.path.join(config.LOG_DIR, "alerts.json")
@@ -53,6 +54,7 @@ class MonitoringSystem:
         }
         
         self.metrics_history.append(metric)
+        self._metric_times.append(time.monotonic())
         
         # 检查是否需要告警
         self._check_alerts(metric)
@@ -131,12 +133,13 @@ class MonitoringSystem:
         if not self.metrics_history:
             return {"message": "暂无数据"}
         
-        # 筛选时间范围内的数据
-        cutoff_time = datetime.now() - timedelta(minutes=minutes)
-        recent_metrics = [
-            m for m in self.metrics_history
-            if datetime.fromisoformat(m["timestamp"]) > cutoff_time
-        ]
+        # 筛选时间范围内的数据：记录按时间顺序追加，从最新一端向前扫描，遇到窗口外记录即停止
+        cutoff = time.monotonic() - minutes * 60
+        recent_metrics = []
+        for ts, m in zip(reversed(self._metric_times), reversed(self.metrics_history)):
+            if ts <= cutoff:
+                break
+            recent_metrics.append(m)
         
         if not recent_metrics:
             return {"message": f"最近{minutes}分钟无数据"}
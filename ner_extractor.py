@@ -2,7 +2,7 @@
 实体抽取模块 - 使用 LLM 提取关键实体
 支持金额、产品类型、时间、地点等结构化信息提取
 """
-from typing import Dict, List
+from typing import Dict, List, Optional
 from llm_client import LLMClient
 import json
 import re
@@ -14,10 +14,14 @@ class EntityExtractor:
     def __init__(self, llm: LLMClient = None):
         self.llm = llm or LLMClient()
     
-    def extract(self, query: str) -> Dict:
+    def extract(self, query: str, llm_entities: Optional[Dict] = None) -> Dict:
         """
         从用户问题中抽取实体
         
+        Args:
+            query: 用户问题
+            llm_entities: 已由合并预处理得到的LLM实体，提供时跳过单独的LLM抽取
+        
         Returns:
             {
                 "amounts": [3000, 5000],  # 金额列表
@@ -30,7 +34,8 @@ class EntityExtractor:
         """
         # 组合抽取：正则 + LLM
         regex_entities = self._regex_extract(query)
-        llm_entities = self._llm_extract(query)
+        if llm_entities is None:
+            llm_entities = self._llm_extract(query)
         
         # 合并结果（过滤无效产品名）
         valid_products = ["冰箱", "洗衣机", "电视", "空调", "热水器", 
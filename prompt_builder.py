@@ -205,12 +205,17 @@ class OutputFormatter:
             raw_answer: LLM原始回答
             metadata: 元数据（来源、时间、置信度等）
         """
-        formatted = raw_answer
-        
+        return self.format_chunk(raw_answer) + self.format_tail(metadata)
+    
+    def format_chunk(self, text: str) -> str:
+        """格式化正文片段（流式输出时逐段调用）"""
         # 1. 添加结构化标记
         if self.config["structured_output"]:
-            formatted = self._add_structure(formatted)
-        
+            return self._add_structure(text)
+        return text
+    
+    def format_tail(self, metadata: Dict = None) -> str:
+        """生成结尾信息（来源、置信度、时间、标准结尾），正文输出完毕后追加一次"""
         # 2. 添加元数据信息
         footer_parts = []
         
@@ -234,9 +239,8 @@ class OutputFormatter:
         
         # 组合输出
         if footer_parts:
-            formatted += "\n\n" + "\n".join(footer_parts)
-        
-        return formatted
+            return "\n\n" + "\n".join(footer_parts)
+        return ""
     
     def _add_structure(self, text: str) -> str:
         """添加结构化标记"""
@@ -0,0 +1,168 @@
+"""
+限流器 - 基于滑动窗口日志的请求限流
+优先使用Redis（多worker共享计数，Lua脚本保证原子性），不可用时回退到进程内存
+"""
+import itertools
+import logging
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# 单次往返完成：清理窗口外记录 -> 计数 -> 未超限则记录本次请求
+_SLIDING_WINDOW_LUA = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+local count = redis.call('ZCARD', key)
+local allowed = 0
+if count < limit then
+    redis.call('ZADD', key, now, ARGV[4])
+    count = count + 1
+    allowed = 1
+end
+redis.call('EXPIRE', key, math.ceil(window))
+local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+return {allowed, count, oldest[2] or ARGV[1]}
+"""
+
+
+class SlidingWindowLimiter:
+    """滑动窗口限流器"""
+
+    def __init__(self, limit: int, window: float, redis_client=None, key_prefix: str = "ratelimit:",
+                 max_clients: int = 100000, redis_retry_interval: float = 5.0):
+        """
+        初始化限流器
+
+        Args:
+            limit: 窗口内最多允许的请求数
+            window: 窗口长度（秒）
+            redis_client: Redis客户端，为None时使用内存计数
+            key_prefix: Redis键前缀
+            max_clients: 内存模式下最多跟踪的客户端数，超出时淘汰最久未访问的客户端
+            redis_retry_interval: Redis调用失败后改用内存计数的时长（秒），到期后重新尝试Redis
+        """
+        self.limit = limit
+        self.window = window
+        self.key_prefix = key_prefix
+
+        # 内存模式：客户端标识 -> 请求时间戳队列（time.monotonic，递增有序）
+        # 按最近访问排序（LRU），仅在事件循环线程中访问，无需加锁
+        self.max_clients = max_clients
+        self.store: "OrderedDict[str, deque]" = OrderedDict()
+
+        self.redis_client = None
+        self._redis_script = None
+        self._member_seq = itertools.count()
+        self.redis_retry_interval = redis_retry_interval
+        self._redis_retry_at = 0.0  # time.monotonic，早于该时间不访问Redis
+        if redis_client is not None:
+            self.use_redis(redis_client)
+
+    def use_redis(self, redis_client):
+        """切换到Redis计数（多worker部署时共享限流状态）"""
+        self.redis_client = redis_client
+        self._redis_script = redis_client.register_script(_SLIDING_WINDOW_LUA)
+        self._redis_retry_at = 0.0
+
+    def _redis_ready(self) -> bool:
+        """已配置Redis且不在失败后的退避期内"""
+        return self._redis_script is not None and time.monotonic() >= self._redis_retry_at
+
+    def hit(self, client_id: str) -> Tuple[bool, int, float]:
+        """
+        记录一次请求并判断是否放行
+
+        Returns:
+            (是否放行, 窗口内剩余可用次数, 距窗口重置的秒数)
+        """
+        if self._redis_ready():
+            try:
+                return self._redis_hit(client_id)
+            except Exception as e:
+                # 仅临时回退：长期使用进程内计数会让实际限额按worker数成倍放大
+                self._redis_retry_at = time.monotonic() + self.redis_retry_interval
+                logger.warning("Redis限流失败，%g秒内回退到内存计数: %s", self.redis_retry_interval, e)
+        return self._memory_hit(client_id)
+
+    def _memory_hit(self, client_id: str) -> Tuple[bool, int, float]:
+        """内存滑动窗口：只弹出队首的过期记录，均摊O(1)"""
+        now = time.monotonic()
+        dq = self.store.get(client_id)
+        if dq is None:
+            dq = self.store[client_id] = deque()
+            if len(self.store) > self.max_clients:
+                self.store.popitem(last=False)
+        else:
+            self.store.move_to_end(client_id)
+
+        cutoff = now - self.window
+        while dq and dq[0] <= cutoff:
+            dq.popleft()
+
+        allowed = len(dq) < self.limit
+        if allowed:
+            dq.append(now)
+        # limit <= 0 时全部拒绝，队列始终为空，按整个窗口计算重置时间
+        reset = dq[0] + self.window - now if dq else self.window
+        return allowed, max(self.limit - len(dq), 0), reset
+
+    def _redis_hit(self, client_id: str) -> Tuple[bool, int, float]:
+        """Redis滑动窗口（有序集合 + Lua脚本）"""
+        # 多进程共享计数，需使用墙上时间而非单调时钟
+        now = time.time()
+        member = f"{now:.6f}:{os.getpid()}:{next(self._member_seq)}"
+        allowed, count, oldest = self._redis_script(
+            keys=[self.key_prefix + client_id],
+            args=[now, self.window, self.limit, member]
+        )
+        reset = float(oldest) + self.window - now
+        return bool(allowed), max(self.limit - int(count), 0), reset
+
+    def sweep(self) -> int:
+        """
+        清理内存中窗口已过期的客户端，返回清理数量
+        store按最近访问排序，从最久未访问的一端清理，遇到仍在窗口内的客户端即停止
+        """
+        cutoff = time.monotonic() - self.window
+        removed = 0
+        while self.store:
+            client_id, dq = next(iter(self.store.items()))
+            if dq and dq[-1] > cutoff:
+                break
+            del self.store[client_id]
+            removed += 1
+        return removed
+
+    def stats(self) -> Dict:
+        """获取限流器状态"""
+        return {
+            "backend": "redis" if self._redis_ready() else "memory",
+            "limit": self.limit,
+            "window": self.window,
+            "tracked_clients": len(self.store),
+            "max_clients": self.max_clients
+        }
+
+
+if __name__ == "__main__":
+    # 测试限流器
+    limiter = SlidingWindowLimiter(limit=3, window=1)
+
+    print("=" * 60)
+    print("限流器测试")
+    print("=" * 60)
+
+    for i in range(5):
+        allowed, remaining, reset = limiter.hit("127.0.0.1")
+        print(f"请求{i + 1}: {'放行' if allowed else '拒绝'}, 剩余: {remaining}, 重置: {reset:.2f}秒")
+
+    time.sleep(1.1)
+    print(f"\n窗口过期后清理客户端数: {limiter.sweep()}")
+    print(f"状态: {limiter.stats()}")
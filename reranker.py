@@ -6,6 +6,7 @@ from typing import List, Tuple
 from langchain.schema import Document
 import config
 try:
+    import torch
     from sentence_transformers import CrossEncoder
     CROSSENCODER_AVAILABLE = True
 except ImportError:
@@ -32,12 +33,31 @@ class Reranker:
         if self.method == "cross-encoder" and CROSSENCODER_AVAILABLE:
             try:
                 print("正在加载 CrossEncoder 模型...")
-                self.cross_encoder = CrossEncoder('cross-encoder/ms-marco-MiniLM-L-12-v2')
+                self.cross_encoder = self._load_cross_encoder()
                 print("✓ CrossEncoder 加载成功")
             except Exception as e:
                 print(f"CrossEncoder 加载失败: {e}，回退到关键词重排")
                 self.cross_encoder = None
     
+    def _load_cross_encoder(self):
+        """按配置加载交叉编码器：GPU上转FP16，CPU上可选动态INT8量化，并预热一次"""
+        device = config.RERANKER_DEVICE
+        if device == "auto":
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+        
+        cross_encoder = CrossEncoder('cross-encoder/ms-marco-MiniLM-L-12-v2', device=device)
+        if device.startswith("cuda") and config.RERANKER_FP16:
+            cross_encoder.model.half()
+        elif device == "cpu" and config.RERANKER_QUANTIZED:
+            cross_encoder.model = torch.quantization.quantize_dynamic(
+                cross_encoder.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        
+        # 预热：首个请求不再承担CUDA上下文初始化等一次性开销
+        cross_encoder.predict([["补贴标准", "补贴标准"]])
+        print(f"  设备: {device}")
+        return cross_encoder
+    
     def rerank(self, 
                query: str, 
                documents: List[Document],
@@ -72,7 +92,7 @@ class Reranker:
         if self.cross_encoder is not None:
             # 使用真实 CrossEncoder 模型
             pairs = [[query, doc.page_content[:512]] for doc in documents]  # 截断到512字符
-            scores = self.cross_encoder.predict(pairs)
+            scores = self.cross_encoder.predict(pairs, batch_size=config.RERANKER_BATCH_SIZE)
             
             # 组合文档和分数
             scored_docs = list(zip(documents, scores))
@@ -0,0 +1,37 @@
+"""
+测试数据查询索引
+- 索引答案由补贴计算器规则表生成，与计算工具数据一致
+- 申请流程等泛化问题不命中索引，交给检索
+"""
+from agent import PolicyAgent
+from tools import SubsidyCalculator
+
+
+def _agent():
+    agent = PolicyAgent.__new__(PolicyAgent)
+    agent.calculator = SubsidyCalculator()
+    agent._data_query_index = agent._build_data_query_index()
+    return agent
+
+
+def test_answers_follow_calculator_rules():
+    agent = _agent()
+    rules = agent.calculator.rules
+    answer = agent._lookup_data_query("冰箱的补贴标准是什么")["answer"]
+    assert f"单台最高不超过{rules['家电']['max_per_item']}元" in answer
+    answer = agent._lookup_data_query("平板最高补贴多少")["answer"]
+    assert f"单件最高不超过{rules['数码']['平板']['max']}元" in answer
+    assert "热水器" in agent._lookup_data_query("补贴适用哪些产品")["answer"]
+
+
+def test_generic_questions_fall_through():
+    agent = _agent()
+    assert agent._lookup_data_query("冰箱以旧换新可以在哪里申请") is None
+    assert agent._lookup_data_query("手机补贴多少") is None
+    assert agent._lookup_data_query("冰箱和电视的补贴标准") is None
+
+
+if __name__ == "__main__":
+    test_answers_follow_calculator_rules()
+    test_generic_questions_fall_through()
+    print("✅ 数据查询索引测试通过")
@@ -0,0 +1,65 @@
+"""
+测试反馈系统存储
+- 旧版整体JSON文件迁移为JSON Lines
+- 内存只保留最近N条时，总数仍为累计反馈数，重启后从文件恢复
+"""
+import json
+import os
+import tempfile
+import config
+import feedback_system
+from feedback_system import FeedbackSystem
+
+
+def _with_log_dir(test):
+    def wrapper():
+        original_dir, original_max = config.LOG_DIR, feedback_system.FEEDBACK_HISTORY_MAX
+        config.LOG_DIR = tempfile.mkdtemp()
+        try:
+            test()
+        finally:
+            config.LOG_DIR, feedback_system.FEEDBACK_HISTORY_MAX = original_dir, original_max
+    wrapper.__name__ = test.__name__
+    return wrapper
+
+
+@_with_log_dir
+def test_legacy_json_migration():
+    feedback_dir = os.path.join(config.LOG_DIR, "feedback")
+    os.makedirs(feedback_dir)
+    legacy = [{"id": i, "query": f"问题{i}", "answer": "回答", "rating": 5 - i % 2} for i in range(1, 4)]
+    with open(os.path.join(feedback_dir, "feedback_data.json"), "w", encoding="utf-8") as f:
+        json.dump(legacy, f, ensure_ascii=False)
+
+    fs = FeedbackSystem()
+    fs.close()
+    assert fs.feedback_total == 3
+    assert list(fs.feedback_history) == legacy
+    assert os.path.exists(os.path.join(feedback_dir, "feedback_data.json.bak"))
+    assert not os.path.exists(os.path.join(feedback_dir, "feedback_data.json"))
+
+
+@_with_log_dir
+def test_total_beyond_history_window():
+    feedback_system.FEEDBACK_HISTORY_MAX = 5
+    fs = FeedbackSystem()
+    for i in range(8):
+        fs.collect_feedback(query=f"问题{i}", answer="回答", rating=5 if i < 3 else 4)
+    fs.close()
+
+    stats = fs.get_feedback_statistics()
+    assert stats["total_feedback"] == 8
+    assert stats["sample_size"] == 5
+    assert stats["rating_distribution"]["4星"] == 5
+
+    # 重启后累计数与反馈ID从文件恢复
+    reloaded = FeedbackSystem()
+    reloaded.close()
+    assert reloaded.get_feedback_statistics()["total_feedback"] == 8
+    assert [f["id"] for f in reloaded.feedback_history] == [4, 5, 6, 7, 8]
+
+
+if __name__ == "__main__":
+    test_legacy_json_migration()
+    test_total_beyond_history_window()
+    print("✅ 反馈系统存储测试通过")
@@ -0,0 +1,129 @@
+"""
+测试意图识别判定缓存
+- LLM调用失败（返回错误提示文本）时不写缓存，恢复后重新判定
+- 合并预处理的相关性/路由判定写入缓存，重复或近似问题不再调用LLM
+- 批量识别的并发数不超过 max_concurrency，重复问题只识别一次
+"""
+import asyncio
+import config
+from intent_recognition import IntentRecognizer, SemanticLabelCache
+
+QUESTION = "旧东西回收有钱拿吗"
+
+
+class FakeLLM:
+    """模拟LLMClient：down=True 时像真实客户端一样返回错误提示文本而不是抛异常"""
+
+    def __init__(self):
+        self.down = True
+        self.calls = 0
+
+    def chat(self, messages):
+        self.calls += 1
+        if self.down:
+            return "抱歉，系统出现错误: Connection timeout"
+        return "是" if "判断以下问题" in messages[0]["content"] else "CALCULATION"
+
+    async def achat(self, messages):
+        return self.chat(messages)
+
+    def analyze_query(self, question):
+        self.calls += 1
+        if self.down:
+            return None
+        return {"relevant": True, "intent": "RECOMMENDATION", "confidence": 0.9, "entities": {}}
+
+    async def aanalyze_query(self, question):
+        return self.analyze_query(question)
+
+
+def _recognizer():
+    recognizer = IntentRecognizer(embed_fn=lambda q: [1.0, 0.0] if "回收" in q else [0.0, 1.0])
+    recognizer.llm = FakeLLM()
+    return recognizer
+
+
+def _check_outage_not_cached(fused: bool, expected_intent: str):
+    original = config.FUSED_PREPROCESSING
+    config.FUSED_PREPROCESSING = fused
+    try:
+        recognizer = _recognizer()
+
+        # LLM故障：保守地判为相关、默认政策问答，且不写入缓存
+        result = recognizer.recognize(QUESTION)
+        assert not result["should_reject"]
+        assert result["intent_type"] == "POLICY_QA"
+        assert len(recognizer._relevance_cache._labels) == 0
+        assert len(recognizer._routing_cache._labels) == 0
+
+        # LLM恢复后重新判定并缓存
+        recognizer.llm.down = False
+        assert recognizer.recognize(QUESTION)["intent_type"] == expected_intent
+        calls = recognizer.llm.calls
+
+        # 相同问题、近似问题、异步接口均命中缓存
+        assert recognizer.recognize(QUESTION)["intent_type"] == expected_intent
+        assert recognizer.recognize(QUESTION + "？")["intent_type"] == expected_intent
+        assert asyncio.run(recognizer.arecognize(QUESTION))["intent_type"] == expected_intent
+        assert recognizer.llm.calls == calls
+    finally:
+        config.FUSED_PREPROCESSING = original
+
+
+def test_llm_outage_not_cached():
+    _check_outage_not_cached(fused=False, expected_intent="CALCULATION")
+
+
+def test_fused_labels_cached():
+    _check_outage_not_cached(fused=True, expected_intent="RECOMMENDATION")
+
+
+def test_explicit_rejection_cached():
+    original = config.FUSED_PREPROCESSING
+    config.FUSED_PREPROCESSING = False
+    try:
+        recognizer = _recognizer()
+        recognizer.llm.chat = lambda messages: "否"
+        assert recognizer.recognize("今天天气怎么样")["should_reject"]
+        assert recognizer._relevance_cache.get("今天天气怎么样") is False
+    finally:
+        config.FUSED_PREPROCESSING = original
+
+
+def test_normalized_exact_match():
+    cache = SemanticLabelCache(maxsize=2, threshold=0.92)
+    cache.set("冰箱 补贴 Rules", True)
+    assert cache.get("冰箱补贴rules") is True
+    cache.set("b", False)
+    cache.set("c", True)
+    assert cache.get("冰箱补贴rules") is None  # 超出上限淘汰最早条目
+
+
+def test_batch_recognize_concurrency():
+    recognizer = _recognizer()
+    active, peak, seen = 0, 0, []
+
+    async def fake_arecognize(query):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        seen.append(query)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return {"intent_type": "POLICY_QA", "query": query}
+
+    recognizer.arecognize = fake_arecognize
+    queries = [f"问题{i % 10}" for i in range(20)]
+    results = asyncio.run(recognizer.batch_recognize(queries, max_concurrency=3))
+    assert peak == 3
+    assert sorted(seen) == sorted(set(queries))
+    assert [r["query"] for r in results] == queries
+
+
+if __name__ == "__main__":
+    test_llm_outage_not_cached()
+    test_fused_labels_cached()
+    test_explicit_rejection_cached()
+    test_normalized_exact_match()
+    test_batch_recognize_concurrency()
+    print("✅ 意图识别缓存测试通过")
@@ -0,0 +1,151 @@
+"""
+测试知识库检索与缓存
+- batch_search 与逐条 search_with_score 结果一致（有/无boost），检索不修改文档元数据
+- boost配置按文件修改时间缓存，文件变化后重新读取
+- 旧注册表（md5摘要）在修改时间不变时不判定为修改，同步后迁移为新摘要算法
+"""
+import os
+import tempfile
+import zlib
+import numpy as np
+from langchain.schema import Document
+import knowledge_base
+from knowledge_base import KnowledgeBase
+
+DIM = 8
+
+
+class FakeEmbeddings:
+    """按文本确定性生成向量"""
+
+    def embed_query(self, text):
+        return np.random.RandomState(zlib.crc32(text.encode("utf-8"))).rand(DIM).tolist()
+
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+
+
+class FakeIndex:
+    """暴力L2检索，接口与faiss索引一致（距离为平方L2，不足k个时以-1补位）"""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+        self.ntotal = len(vectors)
+
+    def search(self, queries, k):
+        dist = ((queries[:, None, :] - self.vectors[None]) ** 2).sum(-1)
+        idx = np.argsort(dist, axis=1, kind="stable")[:, :k]
+        return np.take_along_axis(dist, idx, 1).astype(np.float32), idx
+
+
+class FakeDocstore:
+    def __init__(self, docs):
+        self._dict = docs
+
+    def search(self, doc_id):
+        return self._dict.get(doc_id)
+
+
+class FakeVectorStore:
+    def __init__(self, docs, embeddings):
+        self.embeddings = embeddings
+        self.index = FakeIndex(np.random.RandomState(0).rand(len(docs), DIM).astype(np.float32))
+        self.docstore = FakeDocstore({f"id{i}": doc for i, doc in enumerate(docs)})
+        self.index_to_docstore_id = {i: f"id{i}" for i in range(len(docs))}
+
+    def similarity_search_with_score(self, query, k):
+        q = np.asarray([self.embeddings.embed_query(query)], dtype=np.float32)
+        dist, idx = self.index.search(q, k)
+        return [(self.docstore.search(self.index_to_docstore_id[int(i)]), float(d))
+                for d, i in zip(dist[0], idx[0])]
+
+
+def _kb(metadata_dir, docs=None):
+    kb = KnowledgeBase.__new__(KnowledgeBase)
+    kb.embeddings = FakeEmbeddings()
+    kb.vectorstore = FakeVectorStore(docs, kb.embeddings) if docs else None
+    kb._registry_file = os.path.join(metadata_dir, "policy_registry.json")
+    kb._boosts_file = os.path.join(metadata_dir, "boosts.json")
+    kb._boosts_cache = None
+    kb._boosts_mtime = None
+    kb._doc_attrs_key = None
+    kb._doc_attrs = None
+    kb._doc_rows = {}
+    kb._write_lock = knowledge_base.threading.RLock()
+    return kb
+
+
+def _docs():
+    return [Document(page_content=f"第{i}条 家电以旧换新补贴" if i % 3 == 0 else f"第{i}条 政策说明",
+                     metadata={"source": f"policy_{i % 7}.pdf"}) for i in range(40)]
+
+
+def _assert_same_results(kb, queries, top_k):
+    for query, batch in zip(queries, kb.batch_search(queries, top_k=top_k)):
+        single = kb.search_with_score(query, top_k=top_k)
+        assert [doc.page_content for doc, _ in batch] == [doc.page_content for doc, _ in single]
+        assert np.allclose([s for _, s in batch], [s for _, s in single], atol=1e-5)
+
+
+def test_batch_search_matches_single():
+    docs = _docs()
+    kb = _kb(tempfile.mkdtemp(), docs)
+    queries = [f"问题{i}" for i in range(20)]
+    _assert_same_results(kb, queries, top_k=4)
+
+    kb.set_boost("source", "policy_3.pdf", 0.5)
+    kb.set_boost("source", "policy_1.pdf", 0.2)
+    kb.set_boost("category", "以旧换新", 0.3)
+    _assert_same_results(kb, queries, top_k=4)
+    # top_k*3 超过块总数时同样一致
+    _assert_same_results(kb, queries, top_k=20)
+    # 推断出的类别只缓存在知识库内部，不随文档保存或返回
+    assert all(set(doc.metadata) == {"source"} for doc in docs)
+
+
+def test_boosts_cached_by_mtime():
+    kb = _kb(tempfile.mkdtemp())
+    assert kb.get_boosts() == {"source": {}, "category": {}}
+    boosts = kb.set_boost("source", "a.pdf", 0.5)
+    assert kb.get_boosts() is kb.get_boosts()
+
+    # 外部修改文件后按修改时间失效重新读取
+    with open(kb._boosts_file, "w", encoding="utf-8") as f:
+        f.write('{"source": {"b.pdf": 0.1}, "category": {}}')
+    st = os.stat(kb._boosts_file)
+    os.utime(kb._boosts_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert kb.get_boosts() != boosts
+    assert kb.get_boosts()["source"] == {"b.pdf": 0.1}
+
+
+def test_registry_md5_migration():
+    metadata_dir = tempfile.mkdtemp()
+    path = os.path.join(metadata_dir, "policy.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("家电以旧换新补贴政策")
+    doc = Document(page_content="家电以旧换新补贴政策", metadata={"source": "policy.txt", "file_path": path})
+
+    kb = _kb(metadata_dir, _docs())
+    knowledge_base._atomic_write_json(kb._registry_file, {
+        "policy.txt": {"file_path": path, "mtime": os.path.getmtime(path), "hash": "0" * 32},
+    })
+
+    class FakeLoader:
+        def load_all_documents(self, docs_dir):
+            return [doc]
+
+        def split_documents(self, docs):
+            raise AssertionError("未修改的文档不应重新切分入库")
+
+    kb.doc_loader = FakeLoader()
+    kb.sync_knowledge_base()
+    entry = kb._load_registry()["policy.txt"]
+    assert entry["hash_algo"] == knowledge_base.HASH_ALGO
+    assert entry["hash"] == knowledge_base._content_hash(doc.page_content)
+
+
+if __name__ == "__main__":
+    test_batch_search_matches_single()
+    test_boosts_cached_by_mtime()
+    test_registry_md5_migration()
+    print("✅ 知识库检索与缓存测试通过")
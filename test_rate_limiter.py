@@ -0,0 +1,62 @@
+"""
+测试限流器
+- 窗口内超过上限的请求被拒绝，剩余次数不为负
+- limit <= 0 时全部拒绝且不抛异常
+- Redis调用失败只在退避期内回退到内存计数，到期后恢复使用Redis
+"""
+import time
+from rate_limiter import SlidingWindowLimiter
+
+
+class FlakyRedis:
+    """模拟Redis客户端：down=True 时脚本调用抛异常"""
+
+    def __init__(self):
+        self.down = False
+        self.calls = 0
+
+    def register_script(self, script):
+        def run(keys, args):
+            self.calls += 1
+            if self.down:
+                raise ConnectionError("redis down")
+            return 1, 1, args[0]
+        return run
+
+
+def test_limit_exceeded():
+    limiter = SlidingWindowLimiter(limit=2, window=60)
+    results = [limiter.hit("127.0.0.1") for _ in range(3)]
+    assert [allowed for allowed, _, _ in results] == [True, True, False]
+    assert [remaining for _, remaining, _ in results] == [1, 0, 0]
+    assert 0 < results[-1][2] <= 60
+
+
+def test_non_positive_limit():
+    for limit in (0, -1):
+        limiter = SlidingWindowLimiter(limit=limit, window=60)
+        assert limiter.hit("127.0.0.1") == (False, 0, 60)
+
+
+def test_redis_failure_backoff():
+    redis = FlakyRedis()
+    limiter = SlidingWindowLimiter(limit=5, window=60, redis_client=redis, redis_retry_interval=0.05)
+    redis.down = True
+    assert limiter.hit("127.0.0.1")[0]
+    assert limiter.stats()["backend"] == "memory"
+    # 退避期内不再访问Redis
+    limiter.hit("127.0.0.1")
+    assert redis.calls == 1
+
+    redis.down = False
+    time.sleep(0.06)
+    assert limiter.hit("127.0.0.1")[:2] == (True, 4)
+    assert redis.calls == 2
+    assert limiter.stats()["backend"] == "redis"
+
+
+if __name__ == "__main__":
+    test_limit_exceeded()
+    test_non_positive_limit()
+    test_redis_failure_backoff()
+    print("✅ 限流器测试通过")
@@ -0,0 +1,34 @@
+"""
+测试语义缓存
+- 近似问题命中、相似度不足不命中
+- 写入时记录意图类型，查询时意图不同的条目不命中
+"""
+from cache_manager import CacheManager
+
+POLICY_ANSWER = {"answer": "家电以旧换新补贴标准为售价的15%", "intent_type": "POLICY_QA"}
+
+
+def _cache():
+    cache = CacheManager(enable_prewarming=False)
+    cache.semantic_set("济南家电换新补贴标准", [1.0, 0.2, 0.0], POLICY_ANSWER, intent="POLICY_QA")
+    return cache
+
+
+def test_near_duplicate_hit():
+    cache = _cache()
+    assert cache.semantic_get("济南市以旧换新补贴多少", [1.0, 0.25, 0.0], threshold=0.92,
+                              intent="POLICY_QA") == POLICY_ANSWER
+    assert cache.semantic_get("无关问题", [0.0, 0.0, 1.0], threshold=0.92, intent="POLICY_QA") is None
+
+
+def test_intent_mismatch_miss():
+    cache = _cache()
+    # 向量几乎相同，但计算类问题不能复用政策问答的答案
+    assert cache.semantic_get("冰箱3000元能补多少", [1.0, 0.2, 0.01], threshold=0.92,
+                              intent="CALCULATION") is None
+
+
+if __name__ == "__main__":
+    test_near_duplicate_hit()
+    test_intent_mismatch_miss()
+    print("✅ 语义缓存测试通过")